@@ -4,19 +4,23 @@ import random
 import string
 import uuid
 import json
-from flask import session, current_app
+from flask import session, current_app, has_request_context
 from sandbox_api import get_access_token, request_aadhaar_otp, verify_aadhaar_otp as sandbox_verify_otp
-from models import AadhaarAPILog, db
+from log_sink import api_log_sink
+from photo_store import extract_photo
+from token_cache import AccessTokenCache, DEFAULT_CACHE_FILE
 
 logger = logging.getLogger(__name__)
 
-# Store the access token in memory for reuse
-access_token = None
+# HTTP statuses meaning the access token was rejected
+TOKEN_REJECTED_STATUSES = (401, 403)
 
 def log_api_interaction(request_type, aadhaar_id=None, reference_id=None, request_payload=None, 
                         response_payload=None, success=False, error_message=None, user_id=None):
     """
     Log all API interactions to the database for audit and troubleshooting.
+    The row is queued and written by a background thread (see log_sink.py), so the
+    request only pays for an enqueue and its own session is left untouched.
     """
     try:
         # Check if we're in a Flask app context
@@ -30,8 +34,8 @@ def log_api_interaction(request_type, aadhaar_id=None, reference_id=None, reques
             session_id = str(uuid.uuid4())
             session['session_id'] = session_id
         
-        # Create log entry
-        log_entry = AadhaarAPILog(
+        # Queue log entry
+        api_log_sink.enqueue(
             aadhaar_id=aadhaar_id,
             reference_id=reference_id,
             request_type=request_type,
@@ -42,22 +46,18 @@ def log_api_interaction(request_type, aadhaar_id=None, reference_id=None, reques
             user_id=user_id,
             session_id=session_id
         )
-        
-        db.session.add(log_entry)
-        db.session.commit()
-        logger.info(f"API log stored: {request_type}, success={success}")
+        logger.info(f"API log queued: {request_type}, success={success}")
         
     except Exception as e:
         logger.exception(f"Failed to log API interaction: {str(e)}")
         # Don't raise the exception - this is a secondary function
 
-def get_stored_access_token():
-    """Get the stored access token or generate a new one."""
-    global access_token
-    if not access_token:
-        response = get_access_token()
-        
-        # Log API interaction
+def fetch_access_token():
+    """Authenticate with the Sandbox API, logging the call when running inside a request."""
+    response = get_access_token()
+    
+    # Background refreshes have no request (and no session) to attach the log to
+    if has_request_context():
         log_api_interaction(
             request_type='token',
             request_payload={},
@@ -65,13 +65,34 @@ def get_stored_access_token():
             success=response.get("success", False),
             error_message=None if response.get("success", False) else response.get("message")
         )
-        
-        if response["success"]:
-            access_token = response["access_token"]
-        else:
-            logger.error(f"Failed to get access token: {response['message']}")
-            return None
-    return access_token
+    else:
+        logger.info(f"Background token request, success={response.get('success', False)}")
+    
+    return response
+
+# One token shared by all workers on this host, refreshed before it expires
+token_cache = AccessTokenCache(
+    fetch_access_token,
+    cache_file=os.getenv("SANDBOX_TOKEN_CACHE_FILE", DEFAULT_CACHE_FILE)
+)
+
+def get_stored_access_token():
+    """Get the cached access token, fetching a new one if it is missing or expired."""
+    return token_cache.get_token()
+
+def call_with_token_retry(api_call, token, *args):
+    """
+    Call a sandbox_api function with the given token. If the API rejects the token
+    (e.g. it was revoked before its expiry), fetch a new one and try once more.
+    """
+    response = api_call(token, *args)
+    if not response.get("success") and response.get("status_code") in TOKEN_REJECTED_STATUSES:
+        logger.warning("Access token rejected by Sandbox API, refreshing")
+        token_cache.invalidate(token)
+        new_token = token_cache.refresh(stale_token=token)
+        if new_token:
+            response = api_call(new_token, *args)
+    return response
 
 def generate_random_id(length=10):
     """Generate a random ID."""
@@ -133,7 +154,7 @@ def generate_aadhaar_otp(aadhaar_id, user_id=None):
     try:
         logger.info(f"Sending OTP request to Sandbox API for Aadhaar: {aadhaar_id}")
         request_payload = {"aadhaar_id": aadhaar_id}
-        response = request_aadhaar_otp(token, aadhaar_id)
+        response = call_with_token_retry(request_aadhaar_otp, token, aadhaar_id)
         
         # Log API interaction
         log_api_interaction(
@@ -267,7 +288,11 @@ def verify_aadhaar_otp(reference_id, otp, user_id=None):
     try:
         logger.info(f"Sending OTP verification request to Sandbox API for reference_id: {reference_id}")
         request_payload = {"reference_id": reference_id, "otp": otp}
-        response = sandbox_verify_otp(token, reference_id, otp)
+        response = call_with_token_retry(sandbox_verify_otp, token, reference_id, otp)
+        
+        # Move the base64 photo to the photo store so logs, sessions and rows only carry its hash
+        if response.get("success"):
+            extract_photo(response.get("aadhaar_data"))
         
         # Log API interaction
         log_api_interaction(
@@ -0,0 +1,202 @@
+"""
+Reading and archiving the aadhaar_api_logs table.
+
+The table grows with every OTP step, so the admin log screen avoids anything that scales
+with its size:
+
+- log_stats() counts every (request_type, success) pair in one GROUP BY.
+- log_page() pages newest first by keyset on (created_at, id), which the created_at index
+  serves directly (InnoDB and SQLite secondary indexes end with the primary key). There is
+  no OFFSET and no COUNT(*), so page 1000 costs the same as page 1. Legacy rows without
+  a created_at sort as the oldest, by id (NULL sorts first on MySQL and SQLite).
+- archive_logs() moves rows older than AADHAAR_LOG_RETENTION_DAYS to gzipped JSON-lines
+  files, one per day, and deletes them in batches. It runs from the command line, e.g.
+  daily from cron:
+
+    python aadhaar_logs.py archive [retention_days]
+
+Each batch is appended and flushed to its archive file before its rows are deleted, so a
+crash can repeat a batch in the archive but never lose it.
+"""
+import datetime
+import gzip
+import json
+import os
+import sys
+from sqlalchemy import and_, func, or_, tuple_
+from extensions import db
+from models import AadhaarAPILog
+
+RETENTION_DAYS = 90
+ARCHIVE_BATCH_SIZE = 1000
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+REQUEST_TYPES = ('token', 'generate_otp', 'verify_otp')
+
+
+def log_stats():
+    """Totals for the log screen, from one GROUP BY request_type, success query."""
+    rows = db.session.query(AadhaarAPILog.request_type, AadhaarAPILog.success, func.count(AadhaarAPILog.id))\
+        .group_by(AadhaarAPILog.request_type, AadhaarAPILog.success).all()
+
+    by_type = {request_type: 0 for request_type in REQUEST_TYPES}
+    total = succeeded = 0
+    for request_type, success, count in rows:
+        by_type[request_type] = by_type.get(request_type, 0) + count
+        total += count
+        if success:
+            succeeded += count
+    return {
+        'total': total,
+        'success': succeeded,
+        'failure': total - succeeded,
+        'success_rate': succeeded / total * 100 if total else 0,
+        'by_type': by_type,
+    }
+
+
+def encode_cursor(log):
+    """Page cursor for a log row: its created_at (empty if it has none) and id."""
+    return f"{log.created_at.isoformat() if log.created_at else ''}_{log.id}"
+
+
+def decode_cursor(cursor):
+    """(created_at or None, id) from encode_cursor(), or None if the cursor is malformed."""
+    try:
+        created_at, log_id = cursor.rsplit('_', 1)
+        return datetime.datetime.fromisoformat(created_at) if created_at else None, int(log_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _older_than(cursor_key):
+    created_at, log_id = cursor_key
+    if created_at is None:
+        return and_(AadhaarAPILog.created_at.is_(None), AadhaarAPILog.id < log_id)
+    return or_(tuple_(AadhaarAPILog.created_at, AadhaarAPILog.id) < cursor_key, AadhaarAPILog.created_at.is_(None))
+
+
+def _newer_than(cursor_key):
+    created_at, log_id = cursor_key
+    if created_at is None:
+        return or_(AadhaarAPILog.created_at.isnot(None),
+                   and_(AadhaarAPILog.created_at.is_(None), AadhaarAPILog.id > log_id))
+    return tuple_(AadhaarAPILog.created_at, AadhaarAPILog.id) > cursor_key
+
+
+class LogPage:
+    """One page of logs, newest first, with cursors for the neighbouring pages (None at either end)."""
+
+    def __init__(self, logs, older_cursor, newer_cursor):
+        self.logs = logs
+        self.older_cursor = older_cursor
+        self.newer_cursor = newer_cursor
+
+
+def log_page(query, before=None, after=None, per_page=PAGE_SIZE):
+    """
+    A page of query's rows, newest first. before/after are cursors from a previous page: the
+    rows just older than before, or just newer than after; neither gives the newest rows.
+    """
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    newest_first = (AadhaarAPILog.created_at.desc(), AadhaarAPILog.id.desc())
+
+    after_key = decode_cursor(after) if after else None
+    if after_key:
+        logs = query.filter(_newer_than(after_key))\
+            .order_by(AadhaarAPILog.created_at, AadhaarAPILog.id)\
+            .limit(per_page + 1).all()
+        has_newer = len(logs) > per_page
+        logs = list(reversed(logs[:per_page]))
+        has_older = True
+    else:
+        before_key = decode_cursor(before) if before else None
+        if before_key:
+            query = query.filter(_older_than(before_key))
+        logs = query.order_by(*newest_first).limit(per_page + 1).all()
+        has_older = len(logs) > per_page
+        logs = logs[:per_page]
+        has_newer = before_key is not None
+
+    return LogPage(
+        logs,
+        older_cursor=encode_cursor(logs[-1]) if logs and has_older else None,
+        newer_cursor=encode_cursor(logs[0]) if logs and has_newer else None,
+    )
+
+
+def _archive_record(log):
+    return {
+        'id': log.id,
+        'aadhaar_id': log.aadhaar_id,
+        'reference_id': log.reference_id,
+        'request_type': log.request_type,
+        'request_payload': log.request_payload,
+        'response_payload': log.response_payload,
+        'success': log.success,
+        'error_message': log.error_message,
+        'created_at': log.created_at.isoformat() if log.created_at else None,
+        'user_id': log.user_id,
+        'session_id': log.session_id,
+    }
+
+
+def archive_path(archive_dir, day):
+    return os.path.join(archive_dir, f"aadhaar_api_logs-{day.isoformat()}.jsonl.gz")
+
+
+def _append_to_archive(path, records):
+    # Each append is a separate gzip member; gzip, zcat and Python read the members as one stream
+    new_file = not os.path.exists(path)
+    with gzip.open(path, 'at', encoding='utf-8') as archive:
+        for record in records:
+            archive.write(json.dumps(record, default=str) + "\n")
+        archive.flush()
+        os.fsync(archive.fileno())
+    if new_file:
+        os.chmod(path, 0o600)  # The logs hold Aadhaar numbers and API responses
+
+
+def archive_logs(archive_dir, retention_days=RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE, now=None):
+    """
+    Move logs older than retention_days to archive_dir, oldest first, batch_size rows per
+    transaction. Returns the number of rows archived.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(days=retention_days)
+    archived = 0
+    while True:
+        logs = AadhaarAPILog.query\
+            .filter(AadhaarAPILog.created_at < cutoff)\
+            .order_by(AadhaarAPILog.created_at, AadhaarAPILog.id)\
+            .limit(batch_size).all()
+        if not logs:
+            break
+
+        by_day = {}
+        for log in logs:
+            by_day.setdefault(log.created_at.date(), []).append(_archive_record(log))
+        for day, records in by_day.items():
+            _append_to_archive(archive_path(archive_dir, day), records)
+
+        AadhaarAPILog.query.filter(AadhaarAPILog.id.in_([log.id for log in logs]))\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        archived += len(logs)
+    return archived
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'archive':
+        print("Usage: python aadhaar_logs.py archive [retention_days]")
+        sys.exit(1)
+
+    from app import script_app as app
+
+    with app.app_context():
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else app.config.get('AADHAAR_LOG_RETENTION_DAYS', RETENTION_DAYS)
+        directory = app.config.get('AADHAAR_LOG_ARCHIVE_DIR')
+        print(f"Archiving Aadhaar API logs older than {days} days to {directory}...")
+        count = archive_logs(directory, days, app.config.get('AADHAAR_LOG_ARCHIVE_BATCH_SIZE', ARCHIVE_BATCH_SIZE))
+        print(f"Archived {count} logs")
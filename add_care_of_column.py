@@ -1,7 +1,7 @@
 """
 Database migration script to add care_of column to helper_profiles table
 """
-from app import app
+from app import script_app as app
 from extensions import db
 from sqlalchemy import text
 
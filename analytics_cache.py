@@ -0,0 +1,149 @@
+"""
+Cached payload for the admin analytics page.
+
+The page lists the top helpers overall, the top helpers in every city and the top cleaning
+helpers, all read from the helper_rating_stats running totals. Each list is one query: the
+per-city list ranks helpers with ROW_NUMBER() OVER (PARTITION BY city ...) where the
+database supports window functions (MySQL 8, MariaDB 10.2, SQLite 3.25), and otherwise
+reads every rated helper ordered by city and rating in one query and keeps the first few
+of each city in Python. So the page costs the same three queries however many cities
+there are.
+
+The built payload holds plain values rather than model instances and is kept for
+ADMIN_ANALYTICS_CACHE_TTL seconds. Review submission calls invalidate(), so this worker
+shows a new review at once; other workers pick it up when their copy expires.
+"""
+import sqlite3
+import threading
+import time
+from flask import current_app
+from sqlalchemy import desc, func
+from extensions import db
+from models import HelperProfile, HelperRatingStats
+
+TOP_OVERALL = 10
+TOP_PER_CITY = 3
+TOP_CLEANING = 5
+
+HELPER_COLUMNS = (HelperProfile.helper_id, HelperProfile.name, HelperProfile.helper_type,
+                  HelperProfile.city, HelperProfile.state)
+
+
+def supports_window_functions(dialect):
+    """Whether the database behind a SQLAlchemy dialect understands ROW_NUMBER() OVER (...)."""
+    if dialect.name == 'sqlite':
+        return sqlite3.sqlite_version_info >= (3, 25)
+    if dialect.name in ('mysql', 'mariadb'):
+        version = dialect.server_version_info or ()
+        return version >= ((10, 2) if getattr(dialect, 'is_mariadb', False) else (8, 0))
+    return True
+
+
+def _average_rating():
+    return (HelperRatingStats.overall_sum / HelperRatingStats.review_count).label('avg_rating')
+
+
+def _rated_helpers(*columns):
+    return db.session.query(*HELPER_COLUMNS, *columns)\
+        .join(HelperRatingStats, HelperProfile.id == HelperRatingStats.helper_profile_id)\
+        .filter(HelperRatingStats.review_count > 0)
+
+
+def _helper_summary(row):
+    return {column.key: getattr(row, column.key) for column in HELPER_COLUMNS}
+
+
+def top_helpers(limit=TOP_OVERALL):
+    """[(helper, avg_rating, review_count)] for the best rated helpers."""
+    rows = _rated_helpers(_average_rating(), HelperRatingStats.review_count)\
+        .order_by(desc('avg_rating'), HelperProfile.id).limit(limit).all()
+    return [(_helper_summary(row), row.avg_rating, row.review_count) for row in rows]
+
+
+def top_cleaning_helpers(limit=TOP_CLEANING):
+    """[(helper, avg_hygiene, avg_rating, review_count)] for the maids with the best hygiene ratings."""
+    avg_hygiene = (HelperRatingStats.hygiene_sum / HelperRatingStats.review_count).label('avg_hygiene')
+    rows = _rated_helpers(avg_hygiene, _average_rating(), HelperRatingStats.review_count)\
+        .filter(HelperProfile.helper_type == 'maid')\
+        .order_by(desc('avg_hygiene'), HelperProfile.id).limit(limit).all()
+    return [(_helper_summary(row), row.avg_hygiene, row.avg_rating, row.review_count) for row in rows]
+
+
+def top_helpers_by_city(per_city=TOP_PER_CITY):
+    """{city: [(helper, avg_rating, review_count)]}, cities in alphabetical order, in one query."""
+    avg_rating = _average_rating()
+    rated = _rated_helpers(avg_rating, HelperRatingStats.review_count)\
+        .filter(HelperProfile.city != None, HelperProfile.city != '')
+
+    if supports_window_functions(db.session.get_bind().dialect):
+        rank = func.row_number().over(partition_by=HelperProfile.city,
+                                      order_by=(desc(avg_rating), HelperProfile.id)).label('city_rank')
+        ranked = rated.add_columns(rank).subquery()
+        rows = db.session.query(ranked)\
+            .filter(ranked.c.city_rank <= per_city)\
+            .order_by(ranked.c.city, ranked.c.city_rank).all()
+    else:
+        rows = rated.order_by(HelperProfile.city, desc('avg_rating'), HelperProfile.id).all()
+
+    by_city = {}
+    for row in rows:
+        helpers = by_city.setdefault(row.city, [])
+        if len(helpers) < per_city:
+            helpers.append((_helper_summary(row), row.avg_rating, row.review_count))
+    return by_city
+
+
+def build_payload():
+    """Everything the analytics page shows from the database."""
+    return {
+        'top_helpers': top_helpers(),
+        'top_helpers_by_city': top_helpers_by_city(),
+        'top_cleaning': top_cleaning_helpers(),
+    }
+
+
+class AnalyticsCache:
+
+    def __init__(self):
+        self._payload = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._hits = 0
+        self._builds = 0
+        self._lock = threading.Lock()
+
+    def payload(self):
+        """The analytics page payload, rebuilt when older than ADMIN_ANALYTICS_CACHE_TTL seconds."""
+        ttl = current_app.config.get('ADMIN_ANALYTICS_CACHE_TTL', 60)
+        with self._lock:
+            if self._payload is not None and time.monotonic() - self._built_at < ttl:
+                self._hits += 1
+                return self._payload
+            generation = self._generation
+
+        payload = build_payload()
+        with self._lock:
+            # Don't keep a payload built from data that was invalidated while it was being read
+            if generation == self._generation:
+                self._payload = payload
+                self._built_at = time.monotonic()
+            self._builds += 1
+        return payload
+
+    def invalidate(self):
+        """Drop the cached payload; call after committing a change to the rating totals."""
+        with self._lock:
+            self._payload = None
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached': self._payload is not None,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._payload is not None else None,
+                'hits': self._hits,
+                'builds': self._builds,
+            }
+
+
+analytics_cache = AnalyticsCache()
@@ -1,11 +1,23 @@
 import os
 import logging
 import re
+import threading
+import click
 from flask import Flask, request, jsonify
+from flask.cli import with_appcontext
 from werkzeug.middleware.proxy_fix import ProxyFix
 import mysql.connector
 from config import config
 from extensions import db, login_manager, bcrypt, csrf
+from log_sink import api_log_sink
+from notifications import notification_queue
+from query_profiler import query_profiler
+from platform_counters import platform_counters
+from owner_dashboard_cache import owner_dashboard_cache
+from helper_search import helper_search
+from uploads import UploadRequest
+from photo_variants import photo_variants
+from session_store import init_session
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -35,10 +47,31 @@ def slugify(value):
     value = re.sub(r'[\s_-]+', '-', value)
     return value
 
+def default_config_name():
+    return os.getenv('FLASK_ENV', 'development')
+
+def create_script_app(config_name=None):
+    """
+    Minimal app for scripts, migrations and analytics: configuration and the database only.
+    No routes, session interface or background workers are set up, and nothing touches the
+    database until the script runs a query.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config[config_name or default_config_name()])
+    db.init_app(app)
+    return app
+
 def create_app(config_name='default'):
-    """Factory function to create and configure the Flask app."""
+    """
+    Factory function to create and configure the Flask app.
+    
+    Building the app does not connect to the database; tables are created with
+    `flask --app app db-init`.
+    """
     # Initialize Flask application
     app = Flask(__name__)
+    # Streams file uploads of @streamed_upload views straight into the upload store
+    app.request_class = UploadRequest
     
     # Load configuration
     app.config.from_object(config[config_name])
@@ -51,7 +84,6 @@ def create_app(config_name='default'):
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['PERMANENT_SESSION_LIFETIME'] = app.config.get('PERMANENT_SESSION_LIFETIME', 3600)  # 1 hour default
-    app.config['SESSION_TYPE'] = 'filesystem'  # More reliable than the default
     
     # Ensure upload folders exist
     upload_folder = app.config['UPLOAD_FOLDER']
@@ -66,26 +98,53 @@ def create_app(config_name='default'):
     login_manager.init_app(app)
     bcrypt.init_app(app)
     csrf.init_app(app)
+    api_log_sink.init_app(app)
+    notification_queue.init_app(app)
+    query_profiler.init_app(app)
+    platform_counters.init_app(app)
+    owner_dashboard_cache.init_app(app)
+    helper_search.init_app(app)
+    photo_variants.init_app(app)
     
-    # Configure session handling
-    from flask_session import Session
-    Session(app)
+    # Configure server-side session storage
+    init_session(app)
     
     with app.app_context():
-        # Import models and create tables
-        from models import User  # This will load all models
-        db.create_all()
-        
         # Register routes
         from routes import register_routes
         register_routes(app)
+    app.add_url_rule('/api/check-aadhaar', view_func=check_aadhaar, methods=['POST'])
+    
+    app.cli.add_command(db_init_command)
     
     return app
 
-# Create the application instance using environment variable or default to development
-app = create_app(os.getenv('FLASK_ENV', 'development'))
+@click.command('db-init')
+@with_appcontext
+def db_init_command():
+    """Create any missing tables (existing tables are left unchanged)."""
+    import models  # noqa: F401 - registers every table on db.metadata
+    db.create_all()
+    click.echo(f"Checked {len(db.metadata.tables)} tables and created any that were missing")
+
+# The application instances are built on first access rather than at import, so importing
+# this module (or anything from it) costs nothing until an app is needed:
+#   app         the full web app, for gunicorn (app:app), main.py and `flask --app app`
+#   script_app  create_script_app(), for the one-off scripts and migrations
+_app_factories = {
+    'app': lambda: create_app(default_config_name()),
+    'script_app': create_script_app,
+}
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    if name not in _app_factories:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if name not in globals():
+            globals()[name] = _app_factories[name]()
+    return globals()[name]
 
-@app.route('/api/check-aadhaar', methods=['POST'])
 def check_aadhaar():
     data = request.get_json()
     aadhaar_id = data.get('aadhaar_id')
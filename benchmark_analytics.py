@@ -0,0 +1,190 @@
+"""
+Benchmark for helper analytics generation.
+Compares the original per-helper loop (one Review query per helper plus lazy-loaded
+task ratings) with the grouped-query implementation in generate_analytics.py on a
+synthetic SQLite dataset.
+
+Usage: python benchmark_analytics.py [num_helpers] [reviews_per_helper]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import datetime
+import pandas as pd
+from flask import Flask
+from sqlalchemy import event
+from extensions import db
+from models import User, HelperProfile, TaskList, Contract, Review, ReviewTaskRating, HelperRatingStats
+from generate_analytics import build_helper_analytics_frame, ANALYTICS_COLUMNS
+
+CITIES = [("Mumbai", "Maharashtra"), ("Bangalore", "Karnataka"), ("Chennai", "Tamil Nadu"),
+          ("Pune", "Maharashtra"), ("Kolkata", "West Bengal"), (None, None)]
+
+def create_benchmark_app(db_path):
+    """Create a minimal app bound to a throwaway SQLite database."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def seed_synthetic_data(num_helpers, reviews_per_helper, seed=42):
+    """Populate the database with helpers, contracts, reviews and task ratings."""
+    rng = random.Random(seed)
+    db.create_all()
+
+    owner = User(name="Benchmark Owner", email="bench@example.com", phone_number="9999999999",
+                 password_hash="x", role='owner')
+    db.session.add(owner)
+    db.session.flush()
+
+    tasks = [TaskList(name=f"Task {i}", category="Cleaning", helper_type='maid') for i in range(12)]
+    db.session.add_all(tasks)
+    db.session.flush()
+    task_ids = [task.id for task in tasks]
+
+    helper_rows = []
+    for i in range(num_helpers):
+        city, state = rng.choice(CITIES)
+        helper_rows.append({
+            'id': i + 1, 'helper_id': f"{100000000000 + i}", 'helper_type': rng.choice(['maid', 'driver']),
+            'name': f"Helper {i}", 'phone_number': "9000000000", 'languages': "Hindi",
+            'city': city, 'state': state, 'verification_status': 'Verified', 'created_by': owner.id
+        })
+    db.session.execute(HelperProfile.__table__.insert(), helper_rows)
+
+    contract_rows = [{
+        'id': i + 1, 'contract_id': f"CT{i}", 'helper_profile_id': i + 1, 'owner_id': owner.id,
+        'tasks': ",".join(map(str, task_ids[:4])), 'start_date': datetime.date(2024, 1, 1), 'monthly_salary': 10000.0
+    } for i in range(num_helpers)]
+    db.session.execute(Contract.__table__.insert(), contract_rows)
+
+    review_rows = []
+    rating_rows = []
+    review_pk = 0
+    for i in range(num_helpers):
+        # Leave some helpers without reviews, as in production
+        if i % 10 == 9:
+            continue
+        for _ in range(reviews_per_helper):
+            review_pk += 1
+            review_rows.append({
+                'id': review_pk, 'review_id': f"REV-{review_pk}", 'helper_profile_id': i + 1,
+                'owner_id': owner.id, 'contract_id': i + 1,
+                'punctuality': float(rng.randint(1, 5)), 'attitude': float(rng.randint(1, 5)),
+                'hygiene': float(rng.randint(1, 5)), 'reliability': float(rng.randint(1, 5)),
+                'communication': float(rng.randint(1, 5)), 'tasks_average': 3.0,
+                'review_date': datetime.date(2024, 1, 1)
+            })
+            ratings = [rng.randint(1, 5) for _ in range(rng.randint(0, 4))]
+            for task_id, rating in zip(rng.sample(task_ids, len(ratings)), ratings):
+                rating_rows.append({'review_id': review_pk, 'task_id': task_id, 'rating': rating})
+            # Same formula as Review.calculate_overall_rating(), which submit_review stores
+            review = review_rows[-1]
+            total_points = sum(review[value] for value in HelperRatingStats.CORE_VALUES) + sum(ratings)
+            review['overall_rating'] = (total_points / ((5 + len(ratings)) * 5)) * 5
+    db.session.execute(Review.__table__.insert(), review_rows)
+    if rating_rows:
+        db.session.execute(ReviewTaskRating.__table__.insert(), rating_rows)
+    db.session.commit()
+    return len(review_rows), len(rating_rows)
+
+def build_helper_analytics_frame_per_helper():
+    """The original N+1 implementation (overall rating derived from task ratings), kept as the baseline."""
+    analytics_data = []
+    for helper in HelperProfile.query.all():
+        reviews = Review.query.filter_by(helper_profile_id=helper.id).all()
+        if not reviews:
+            continue
+
+        task_ratings = {}
+        for review in reviews:
+            for tr in review.task_ratings:
+                task_ratings.setdefault(tr.task.name, []).append(tr.rating)
+
+        city = helper.city or "Unknown"
+        state = helper.state or "Unknown"
+        analytics_data.append({
+            'helper_id': helper.helper_id,
+            'name': helper.name,
+            'helper_type': helper.helper_type,
+            'location': f"{city}, {state}",
+            'city': city,
+            'state': state,
+            'reviews_count': len(reviews),
+            'avg_punctuality': round(sum(r.punctuality for r in reviews) / len(reviews), 2),
+            'avg_attitude': round(sum(r.attitude for r in reviews) / len(reviews), 2),
+            'avg_hygiene': round(sum(r.hygiene for r in reviews) / len(reviews), 2),
+            'avg_reliability': round(sum(r.reliability for r in reviews) / len(reviews), 2),
+            'avg_communication': round(sum(r.communication for r in reviews) / len(reviews), 2),
+            'avg_overall': round(sum(r.calculate_overall_rating() for r in reviews) / len(reviews), 2),
+            'task_ratings': {name: sum(ratings) / len(ratings) for name, ratings in task_ratings.items()}
+        })
+    return pd.DataFrame(analytics_data, columns=ANALYTICS_COLUMNS)
+
+def timed(func):
+    """Run func with a fresh session and return (result, seconds, query_count)."""
+    query_count = [0]
+
+    def count_query(*args):
+        query_count[0] += 1
+
+    db.session.remove()
+    event.listen(db.engine, "before_cursor_execute", count_query)
+    try:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_query)
+    return result, elapsed, query_count[0]
+
+def compare_frames(legacy, grouped):
+    """
+    Return the number of cells that differ between the two frames.
+    
+    Rating averages may differ by one unit in the last decimal when the exact average falls
+    on a half-way point (e.g. 2.805): which way it rounds then depends on float summation
+    order, which SQL AVG does not share with Python's sum(). Those are not counted.
+    """
+    if list(legacy['helper_id']) != list(grouped['helper_id']):
+        return len(legacy.index) or 1
+    legacy = legacy.reset_index(drop=True)
+    grouped = grouped.reset_index(drop=True)
+    differences = 0
+    for column in ANALYTICS_COLUMNS:
+        if column == 'task_ratings':
+            for left, right in zip(legacy[column], grouped[column]):
+                if left.keys() != right.keys() or any(abs(left[k] - right[k]) > 1e-9 for k in left):
+                    differences += 1
+        elif column.startswith('avg_'):
+            differences += int(((legacy[column] - grouped[column]).abs() > 0.01 + 1e-9).sum())
+        else:
+            differences += int((legacy[column] != grouped[column]).sum())
+    return differences
+
+def run_benchmark(num_helpers=2000, reviews_per_helper=5):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_benchmark_app(os.path.join(tmp_dir, "analytics_benchmark.db"))
+        with app.app_context():
+            print(f"Seeding {num_helpers} helpers with {reviews_per_helper} reviews each...")
+            review_count, rating_count = seed_synthetic_data(num_helpers, reviews_per_helper)
+            print(f"Seeded {review_count} reviews and {rating_count} task ratings")
+
+            legacy, legacy_time, legacy_queries = timed(build_helper_analytics_frame_per_helper)
+            grouped, grouped_time, grouped_queries = timed(build_helper_analytics_frame)
+
+            print(f"\n{'Approach':<24}{'Seconds':>10}{'Queries':>10}")
+            print(f"{'Per-helper loop':<24}{legacy_time:>10.3f}{legacy_queries:>10}")
+            print(f"{'Grouped queries':<24}{grouped_time:>10.3f}{grouped_queries:>10}")
+            if grouped_time > 0:
+                print(f"\nSpeedup: {legacy_time / grouped_time:.1f}x")
+            print(f"Differing cells: {compare_frames(legacy, grouped)}")
+            db.session.remove()
+
+if __name__ == "__main__":
+    helpers = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    reviews = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run_benchmark(helpers, reviews)
@@ -0,0 +1,126 @@
+"""
+Benchmark for the helper search.
+Compares the original `name ILIKE '%term%'` query with the in-process index
+(HelperSearchIndex.find(), including loading the page of helpers) on a synthetic SQLite
+dataset of helpers with common Indian names, spelled in the usual variants.
+
+Each approach is timed on the same list of queries (at least 100, so that p99 is a real
+99th percentile); at a million helpers the ILIKE runs take several minutes.
+
+Usage: python benchmark_helper_search.py [num_helpers] [queries]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from flask import Flask
+from extensions import db
+from models import HelperProfile, Language, helper_languages
+from helper_search import HelperSearchIndex, sql_search
+
+FIRST_NAMES = ["Lakshmi", "Laxmi", "Sita", "Seeta", "Geeta", "Gita", "Sunita", "Kavita", "Anjali", "Pooja",
+               "Puja", "Meena", "Rekha", "Radha", "Savitri", "Shanti", "Santosh", "Mohammed", "Muhammad",
+               "Ramesh", "Suresh", "Rajesh", "Mahesh", "Ganesh", "Bhavna", "Bhavana", "Jyoti", "Kamla",
+               "Kamala", "Parvati", "Usha", "Asha", "Nirmala", "Sarita", "Vijay", "Sanjay", "Ravi", "Arun"]
+SURNAMES = ["Devi", "Bai", "Kumari", "Sharma", "Yadav", "Singh", "Khan", "Patil", "Pawar", "Naik", "Reddy",
+            "Nair", "Pillai", "Das", "Mondal", "Gupta", "Verma", "Shaikh", "Kamble", "Jadhav", "Chauhan"]
+CITIES = ["Mumbai", "Bangalore", "Chennai", "Pune", "Kolkata", "New Delhi", "Hyderabad", "Ahmedabad",
+          "Jaipur", "Lucknow", "Noida", "Gurgaon", "Thane", "Navi Mumbai", "Indore", "Bhopal"]
+SOCIETIES = ["Green Park", "Palm Grove", "Sunshine Heights", "Lake View", "Royal Enclave", "Shanti Nagar",
+             "Ashoka Towers", "Silver Oak", "Orchid Residency", "Hill Crest"]
+LANGUAGES = ["English", "Hindi", "Bengali", "Tamil", "Telugu", "Marathi"]
+
+def create_benchmark_app(db_path):
+    """Create a minimal app bound to a throwaway SQLite database."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['HELPER_SEARCH_CHECK_INTERVAL'] = 3600
+    db.init_app(app)
+    return app
+
+def seed_synthetic_data(num_helpers, seed=42, batch_size=50000):
+    """Populate helper_profiles with num_helpers helpers, each speaking one or two languages."""
+    rng = random.Random(seed)
+    db.create_all()
+    db.session.execute(Language.__table__.insert(), [{'name': name} for name in LANGUAGES])
+    for start in range(0, num_helpers, batch_size):
+        helpers, spoken = [], []
+        for helper_pk in range(start + 1, min(start + batch_size, num_helpers) + 1):
+            helpers.append({
+                'id': helper_pk, 'helper_id': f"{rng.randrange(10 ** 11, 10 ** 12)}{helper_pk}",
+                'helper_type': rng.choice(["maid", "driver"]), 'created_by': 1, 'phone_number': "9000000000",
+                'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+                'city': rng.choice(CITIES), 'society': rng.choice(SOCIETIES),
+                'verification_status': "Verified" if rng.random() < 0.3 else "Unverified",
+            })
+            for language_id in rng.sample(range(1, len(LANGUAGES) + 1), rng.randint(1, 2)):
+                spoken.append({'helper_profile_id': helper_pk, 'language_id': language_id})
+        db.session.execute(HelperProfile.__table__.insert(), helpers)
+        db.session.execute(helper_languages.insert(), spoken)
+    db.session.commit()
+
+def ilike_search(term, language_id, limit):
+    """The original query: helper_id exact or name ILIKE '%term%', every match loaded and sorted."""
+    query = HelperProfile.speaking(language_id) if language_id else HelperProfile.query
+    return query.filter((HelperProfile.helper_id == term) | (HelperProfile.name.ilike(f'%{term}%')))\
+        .order_by(HelperProfile.name).all()
+
+def timed_per_query(func, queries, limit):
+    """Return the median and p99 time per call in milliseconds."""
+    samples = []
+    for term, language_id in queries:
+        start = time.perf_counter()
+        func(term, language_id, limit)
+        samples.append((time.perf_counter() - start) * 1e3)
+        db.session.expunge_all()
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+def run_benchmark(num_helpers=1000000, num_queries=200, limit=20):
+    if num_queries < 100:
+        raise ValueError("A p99 needs at least 100 timed queries")
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_benchmark_app(os.path.join(tmp_dir, "benchmark.db"))
+        with app.app_context():
+            print(f"Seeding {num_helpers} helpers...")
+            seed_synthetic_data(num_helpers)
+
+            index = HelperSearchIndex()
+            index.init_app(app)
+            index.build()
+            stats = index.stats()
+            print(f"Index build: {stats['build_seconds']:.1f}s, {stats['documents']} helpers, {stats['keys']} keys")
+
+            queries = []
+            for _ in range(num_queries):
+                kind = rng.random()
+                if kind < 0.5:
+                    term = rng.choice(FIRST_NAMES)
+                elif kind < 0.8:
+                    term = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+                else:
+                    term = rng.choice(FIRST_NAMES)[:rng.randint(3, 5)]
+                language_id = rng.randint(1, len(LANGUAGES)) if rng.random() < 0.3 else None
+                queries.append((term.lower(), language_id))
+
+            # Every approach runs the same queries, so the percentiles compare like with like
+            ilike_median, ilike_p99 = timed_per_query(ilike_search, queries, limit)
+            index_find = lambda term, language_id, limit: index.find(term, language_id, limit=limit)
+            index_median, index_p99 = timed_per_query(index_find, queries, limit)
+            page_median, page_p99 = timed_per_query(lambda term, language_id, limit: sql_search(term, language_id, limit),
+                                                    queries, limit)
+
+            print(f"ILIKE, all matches:        median {ilike_median:9.1f}ms  p99 {ilike_p99:9.1f}ms")
+            print(f"ILIKE, one page (fallback): median {page_median:9.1f}ms  p99 {page_p99:9.1f}ms")
+            print(f"Index search, one page:     median {index_median:9.1f}ms  p99 {index_p99:9.1f}ms")
+            print(f"Speedup at p99: {ilike_p99 / index_p99:.0f}x")
+        with app.app_context():
+            db.engine.dispose()
+
+if __name__ == "__main__":
+    helpers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run_benchmark(helpers, queries)
@@ -0,0 +1,97 @@
+"""
+Benchmark for the admin pincode search.
+Compares the original LIKE '%term%' query with PincodeIndex.search() on a synthetic
+SQLite dataset about the size of the national pincode directory (one row per post office).
+
+Usage: python benchmark_pincode_search.py [num_rows] [queries]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from flask import Flask
+from extensions import db
+from models import PincodeMapping
+from pincode_index import PincodeIndex
+
+CITIES = [("Mumbai", "Maharashtra"), ("Bangalore", "Karnataka"), ("Chennai", "Tamil Nadu"),
+          ("Pune", "Maharashtra"), ("Kolkata", "West Bengal"), ("New Delhi", "Delhi"),
+          ("Hyderabad", "Telangana"), ("Ahmedabad", "Gujarat"), ("Jaipur", "Rajasthan"), ("Lucknow", "Uttar Pradesh")]
+SOCIETY_WORDS = ["Nagar", "Colony", "Road", "Park", "Bazar", "Gate", "Vihar", "Enclave", "West", "East",
+                 "Bandra", "Andheri", "Koramangala", "Indiranagar", "Salt Lake", "Banjara", "Civil Lines"]
+
+def create_benchmark_app(db_path):
+    """Create a minimal app bound to a throwaway SQLite database."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['PINCODE_INDEX_CHECK_INTERVAL'] = 3600
+    db.init_app(app)
+    return app
+
+def seed_synthetic_data(num_rows, seed=42):
+    """Populate pincode_mapping with num_rows post-office style rows."""
+    rng = random.Random(seed)
+    db.create_all()
+    rows = []
+    for i in range(num_rows):
+        city, state = rng.choice(CITIES)
+        rows.append({
+            'pincode': f"{110000 + rng.randrange(745000):06d}",
+            'city': city, 'state': state,
+            'society': f"{rng.choice(SOCIETY_WORDS)} {rng.choice(SOCIETY_WORDS)} {i}"
+        })
+    db.session.execute(PincodeMapping.__table__.insert(), rows)
+    db.session.commit()
+
+def like_search(term, limit):
+    """The original query: LIKE '%term%' on pincode, every match loaded."""
+    pincodes = PincodeMapping.query.filter(PincodeMapping.pincode.contains(term)).all()
+    return [{'id': p.id, 'pincode': p.pincode, 'state': p.state, 'city': p.city, 'society': p.society}
+            for p in pincodes]
+
+def timed_per_query(func, terms, limit):
+    """Return the median and p99 time per call in microseconds."""
+    samples = []
+    for term in terms:
+        start = time.perf_counter()
+        func(term, limit)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def run_benchmark(num_rows=155000, num_queries=500, limit=20):
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_benchmark_app(os.path.join(tmp_dir, "benchmark.db"))
+        with app.app_context():
+            print(f"Seeding {num_rows} pincode rows...")
+            seed_synthetic_data(num_rows)
+
+            index = PincodeIndex()
+            start = time.perf_counter()
+            index.search("1")
+            print(f"Index build: {time.perf_counter() - start:.2f}s")
+
+            pincode_terms = [f"{110000 + rng.randrange(745000):06d}"[:rng.randint(3, 6)] for _ in range(num_queries)]
+            name_terms = [rng.choice(SOCIETY_WORDS + [c for c, _ in CITIES]).lower()[:rng.randint(3, 6)]
+                          for _ in range(num_queries)]
+
+            like_median, like_p99 = timed_per_query(like_search, pincode_terms, limit)
+            index_search = lambda term, limit: index.search(term, limit=limit)
+            pin_median, pin_p99 = timed_per_query(index_search, pincode_terms, limit)
+            name_median, name_p99 = timed_per_query(index_search, name_terms, limit)
+
+            print(f"LIKE '%term%' (pincode):      median {like_median:9.1f}us  p99 {like_p99:9.1f}us")
+            print(f"Index search (pincode prefix): median {pin_median:9.1f}us  p99 {pin_p99:9.1f}us")
+            print(f"Index search (city/society):   median {name_median:9.1f}us  p99 {name_p99:9.1f}us")
+            print(f"Speedup on pincode terms: {like_median / pin_median:.0f}x")
+        with app.app_context():
+            db.engine.dispose()
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 155000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    run_benchmark(rows, queries)
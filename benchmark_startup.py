@@ -0,0 +1,82 @@
+"""
+Benchmark for application cold start.
+Each scenario runs in a fresh Python process against a throwaway SQLite database that
+already has the full schema, and reports the time taken to import app.py and build the app,
+and the number of SQL statements sent while doing so.
+
+    old startup   create_app() followed by db.create_all(), which app.py used to run at import
+    web app       app.app, built lazily without touching the database
+    script app    app.script_app, the configuration-and-database app used by scripts
+    import only   import app, as a script that never needs an app context
+
+Most of the remaining time is importing Flask, SQLAlchemy and the models. create_all()
+introspects every table, one round trip each, so against a remote MySQL server the "old
+startup" cost grows with the query count shown, while the other scenarios send none.
+
+Usage: python benchmark_startup.py [runs]
+"""
+import os
+import sys
+import json
+import tempfile
+import statistics
+import subprocess
+
+SCENARIOS = {
+    'old startup': "from extensions import db\n"
+                   "application = app_module.create_app(app_module.default_config_name())\n"
+                   "with application.app_context():\n"
+                   "    db.create_all()",
+    'web app': "application = app_module.app",
+    'script app': "application = app_module.script_app",
+    'import only': "pass",
+}
+
+CHILD_TEMPLATE = """
+import json, time, sys
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+import config
+for config_class in config.config.values():
+    config_class.SQLALCHEMY_DATABASE_URI = {db_uri!r}
+    config_class.SQLALCHEMY_ENGINE_OPTIONS = {{}}
+    config_class.SESSION_LEGACY_FILE_DIR = None
+import app as app_module
+{scenario}
+print(json.dumps({{'seconds': time.perf_counter() - started, 'queries': len(statements)}}))
+"""
+
+def run_child(code):
+    """Run code in a fresh interpreter and return (in-process seconds, total process seconds, queries)."""
+    import time
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=tempfile.gettempdir())
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    return measured['seconds'], elapsed, measured['queries']
+
+def run_benchmark(runs=5):
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_uri = f"sqlite:///{os.path.join(tmp_dir, 'startup.db')}"
+        # Create the schema once, so every scenario starts from an up-to-date database
+        run_child(CHILD_TEMPLATE.format(root=root, db_uri=db_uri, scenario=SCENARIOS['old startup']))
+
+        print(f"Cold start over {runs} runs each (median):")
+        print(f"{'scenario':<14} {'import + build':>15} {'whole process':>15} {'DB queries':>11}")
+        for name, scenario in SCENARIOS.items():
+            code = CHILD_TEMPLATE.format(root=root, db_uri=db_uri, scenario=scenario)
+            timings = [run_child(code) for _ in range(runs)]
+            build = statistics.median(t[0] for t in timings)
+            total = statistics.median(t[1] for t in timings)
+            print(f"{name:<14} {build * 1000:>12.1f} ms {total * 1000:>12.1f} ms {timings[0][2]:>11}")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -5,7 +5,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from extensions import db
-from app import app
+from app import script_app as app
 from sqlalchemy import text
 
 def check_associations():
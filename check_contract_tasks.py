@@ -28,12 +28,9 @@ def check_contract_tasks():
             print(f"Contract ID: {contract.contract_id}")
             print(f"Tasks (raw): {contract.tasks}")
             
-            # Split task IDs
-            task_ids = contract.tasks.split(',') if contract.tasks else []
-            print(f"Task IDs: {task_ids}")
-            
-            # Get task details
-            tasks = TaskList.query.filter(TaskList.id.in_(task_ids)).all() if task_ids else []
+            # Get task details from the contract_tasks join table
+            tasks = contract.task_items
+            print(f"Task IDs: {[task.id for task in tasks]}")
             
             if tasks:
                 print("Tasks found:")
@@ -1,4 +1,4 @@
-from app import app
+from app import script_app as app
 from models import Language, db
 
 with app.app_context():
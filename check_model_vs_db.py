@@ -6,7 +6,7 @@ import os
 import sys
 import psycopg2
 from sqlalchemy import inspect
-from app import app, db
+from app import script_app as app, db
 from models import OwnerProfile
 from config import Config
 
@@ -1,4 +1,4 @@
-from app import app
+from app import script_app as app
 from models import HelperProfile, Review, ReviewTaskRating
 
 with app.app_context():
@@ -53,12 +53,13 @@ with app.app_context():
             print(f"  Total parameters: {total_params}")
             print(f"  Max possible points: {max_possible}")
             print(f"  Manually calculated rating: {manual_rating:.2f}")
-            print(f"  Overall rating from property: {r.overall_rating:.2f}")
+            print(f"  Overall rating from model: {r.calculate_overall_rating():.2f}")
+            print(f"  Stored overall rating: {r.overall_rating}")
             print("-----")
             
         # Calculate helper's average rating from reviews
         if reviews:
-            total_rating = sum(r.overall_rating for r in reviews)
+            total_rating = sum(r.calculate_overall_rating() for r in reviews)
             avg_rating = total_rating / len(reviews)
             print(f"\nHelper average rating: {avg_rating:.2f}")
     else:
@@ -29,6 +29,74 @@ class Config:
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
     UPLOAD_FOLDER = "static/uploads"
+    HELPER_PHOTO_MAX_BYTES = 2 * 1024 * 1024  # Streamed uploads are cut off once they pass this (see uploads.py)
+    PHOTO_VARIANT_WORKERS = 2  # Threads resizing helper photos (see photo_variants.py); 0 serves originals
+    PHOTO_VARIANT_WAIT = 5  # Seconds a request waits for a new variant before serving the original
+    UPLOAD_MAX_AGE = 3600  # Cache-Control max-age for uploads whose names may be reused (see upload_serving.py)
+    UPLOAD_ACCEL_REDIRECT_PREFIX = os.environ.get('UPLOAD_ACCEL_REDIRECT_PREFIX')  # Internal nginx location serving UPLOAD_FOLDER
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')  # Apache/lighttpd X-Sendfile
+    AADHAAR_PHOTO_FOLDER = os.environ.get('AADHAAR_PHOTO_FOLDER')  # Outside static/; defaults to <instance>/aadhaar_photos (see photo_store.py)
+    AADHAAR_PHOTO_ACCEL_REDIRECT_PREFIX = os.environ.get('AADHAAR_PHOTO_ACCEL_REDIRECT_PREFIX')  # Internal nginx location serving it
+    AADHAAR_PHOTO_MAX_AGE = 365 * 24 * 3600  # Photo store URLs never change content
+    
+    # Aadhaar API log writer (see log_sink.py)
+    API_LOG_QUEUE_SIZE = 10000  # Rows buffered before new ones are dropped
+    API_LOG_BATCH_SIZE = 100  # Rows per multi-row INSERT
+    API_LOG_FLUSH_INTERVAL = 1.0  # Seconds the writer waits for more rows
+    AADHAAR_LOG_RETENTION_DAYS = 90  # Older logs are moved out by `python aadhaar_logs.py archive` (see aadhaar_logs.py)
+    AADHAAR_LOG_ARCHIVE_DIR = os.path.join(os.getcwd(), 'aadhaar_log_archive')  # Gzipped JSON lines, one file per day
+    AADHAAR_LOG_ARCHIVE_BATCH_SIZE = 1000  # Rows archived and deleted per transaction
+    
+    # Background notification sender (see notifications.py)
+    NOTIFICATION_QUEUE_SIZE = 10000  # Notifications buffered before new ones are dropped
+    
+    # Admin verification queue
+    VERIFY_USERS_PAGE_SIZE = 50  # Pending profiles per page
+    
+    # Pincode lookup index (see pincode_index.py)
+    PINCODE_INDEX_CHECK_INTERVAL = 30  # Seconds between checks for changes made by other workers
+    PINCODE_LOOKUP_MAX_AGE = 3600  # Cache-Control max-age for found pincodes
+    PINCODE_LOOKUP_MISS_MAX_AGE = 60  # Cache-Control max-age for unknown pincodes
+    
+    # Language choices (see language_table.py)
+    LANGUAGE_TABLE_CHECK_INTERVAL = 300  # Seconds between checks for languages added by other workers
+    
+    # Task catalog for contract and review forms (see task_catalog.py)
+    TASK_CATALOG_CHECK_INTERVAL = 300  # Seconds between checks for tasks changed by other workers
+    
+    # Server-side sessions (see session_store.py)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sqlalchemy')  # 'sqlalchemy' or 'memory'
+    SESSION_MEMORY_MAX_ENTRIES = 10000  # LRU bound for the memory backend
+    SESSION_SWEEP_INTERVAL = 300  # Seconds between expired-session sweeps
+    SESSION_SIZE_WARNING_BYTES = 64 * 1024  # Log sessions larger than this
+    SESSION_LEGACY_FILE_DIR = os.path.join(os.getcwd(), 'flask_session')  # Old filesystem sessions, read once then deleted
+    
+    # Per-request SQL profiling (see query_profiler.py), off unless enabled
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+    QUERY_PROFILER_HEADERS = None  # X-Query-Count / Server-Timing response headers; None means in debug mode only
+    QUERY_PROFILER_SLOW_MS = 100  # Statements slower than this are logged
+    QUERY_PROFILER_REPEAT_THRESHOLD = 3  # Identical statements per request reported as a likely N+1
+    QUERY_PROFILER_WINDOW = 200  # Recent requests kept per endpoint
+    
+    # Admin analytics page (see analytics_cache.py)
+    ADMIN_ANALYTICS_CACHE_TTL = 60  # Seconds a worker reuses the top-helper lists; review submission clears it
+    
+    # Admin dashboard counters (see platform_counters.py)
+    PLATFORM_COUNTERS_RECONCILE_INTERVAL = 3600  # Seconds between COUNT(*) checks of the running totals; 0 disables
+    PLATFORM_RECENT_SIZE = 5  # Rows kept per "recent" list
+    PLATFORM_RECENT_REFRESH_INTERVAL = 300  # Seconds before a worker reloads its recent lists from the database
+    
+    # Owner dashboard (see owner_dashboard_cache.py)
+    OWNER_DASHBOARD_CONTRACTS_PER_PAGE = 20
+    OWNER_DASHBOARD_HELPERS_PER_PAGE = 24
+    OWNER_DASHBOARD_CACHE_TTL = 60  # Seconds a worker reuses an owner's rendered helper cards; 0 disables
+    OWNER_DASHBOARD_CACHE_MAX_ENTRIES = 5000  # Cached (owner, page) card sets per worker
+    
+    # Helper search index (see helper_search.py)
+    HELPER_SEARCH_INDEX_ENABLED = True  # Build the index on a background thread; False keeps the ILIKE search
+    HELPER_SEARCH_PER_PAGE = 20
+    HELPER_SEARCH_CHECK_INTERVAL = 5  # Seconds between checks for helpers added by other workers
+    HELPER_SEARCH_REBUILD_INTERVAL = 900  # Seconds between full rebuilds, which pick up other workers' edits; 0 builds once
     
     # Uploadcare API keys
     UPLOADCARE_PUBLIC_KEY = "key_live_5FG3zMrDHspKWq5ifOBYBi5J3rcadaGK"
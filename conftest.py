@@ -0,0 +1,52 @@
+"""
+Shared fixtures for the tests that build the whole app.
+
+The tests are unittest TestCases, runnable with pytest or python -m unittest. Those that
+need create_app() subclass AppTestCase instead of registering their own config.
+"""
+import os
+import tempfile
+import unittest
+
+from config import config, DevelopmentConfig
+from extensions import db
+import app as app_module
+
+TEST_SETTINGS = {
+    'SQLALCHEMY_ENGINE_OPTIONS': {},
+    'SESSION_BACKEND': 'memory',
+    'SESSION_LEGACY_FILE_DIR': None,
+    # The indexer thread would still be reading the database when the temporary directory goes
+    'HELPER_SEARCH_INDEX_ENABLED': False,
+}
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    Gives each test a temporary directory (self.tmp_dir) and create_app(**settings), which
+    builds the app on a SQLite database in it. Do not keep an app context pushed around
+    test client requests: the request would reuse it, and with it the logged-in user.
+    """
+
+    config_name = 'test'
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def create_app(self, **settings):
+        """Register config_name with settings over TEST_SETTINGS and build the web app from it."""
+        config[self.config_name] = type('TestConfig', (DevelopmentConfig,), {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.tmp_dir.name, 'app.db')}",
+            **TEST_SETTINGS,
+            **settings,
+        })
+        self.addCleanup(config.pop, self.config_name, None)
+        app = app_module.create_app(self.config_name)
+        self.addCleanup(self._dispose_engine, app)
+        return app
+
+    @staticmethod
+    def _dispose_engine(app):
+        with app.app_context():
+            db.engine.dispose()
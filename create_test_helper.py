@@ -6,7 +6,7 @@ import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from extensions import db
-from app import app
+from app import script_app as app
 from sqlalchemy import text
 from models import User, OwnerHelperAssociation
 
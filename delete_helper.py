@@ -1,5 +1,5 @@
 from extensions import db
-from app import app
+from app import script_app as app
 from models import HelperProfile, HelperDocument, Contract, Review, IncidentReport, OwnerToOwnerConnect
 from sqlalchemy import text
 
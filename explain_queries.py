@@ -0,0 +1,194 @@
+"""
+Script to check that the queries the routes issue are served by indexes.
+
+Coverage is a curated list, not every query the routes issue: route_queries() holds
+hand-written copies of the filtered lookups in routes.py (and the modules they call), with
+sample arguments. Primary-key gets, inserts and updates are left out, and a new or changed
+lookup in routes.py must be added here by hand. The query profiler
+(/admin/query-stats) shows what the routes actually run.
+
+The SQL each entry sends is captured and the database's plan for it printed:
+EXPLAIN on MySQL, EXPLAIN QUERY PLAN on SQLite. Steps that read a whole table are flagged,
+and the script exits with status 1 if there are any.
+
+Run it against a database with the current schema (see migrations/add_lookup_indexes.py).
+MySQL may choose a full scan on a nearly empty table even when an index exists, so run it
+on a copy with realistic data to get meaningful plans.
+
+Usage: python explain_queries.py
+"""
+import datetime
+import sys
+from sqlalchemy import event, func
+from sqlalchemy.orm import contains_eager
+from extensions import db
+from models import (User, OwnerProfile, HelperProfile, Contract, Review, PincodeMapping,
+                    OwnerHelperAssociation, HelperVerificationLog, AadhaarAPILog, HelperRatingStats,
+                    contract_tasks)
+from aadhaar_logs import log_page, log_stats
+from helper_search import sql_search
+
+
+class QueryPlan:
+
+    def __init__(self, name, statements):
+        self.name = name
+        self.statements = statements  # [(sql, [plan line, ...])]
+        self.full_scans = []          # Table names read in full
+
+    def __repr__(self):
+        return f'<QueryPlan {self.name} full_scans={self.full_scans}>'
+
+
+def route_queries():
+    """(name, callable) pairs mirroring the filtered lookups in routes.py. Curated: keep in step by hand."""
+    today = datetime.date.today()
+    month_start = today.replace(day=1)
+    pending = OwnerProfile.verification_status == 'Pending'
+    return [
+        ('login: user by email',
+         lambda: User.query.filter_by(email='owner@example.com').first()),
+        ('register/verify_aadhaar: owner profile by aadhaar_id',
+         lambda: OwnerProfile.query.filter_by(aadhaar_id='123412341234').first()),
+        ('profile: owner profile by owner_id',
+         lambda: OwnerProfile.query.filter_by(owner_id=1).first()),
+        ('verify_users: pending count',
+         lambda: db.session.query(func.count(OwnerProfile.id)).filter(pending).scalar()),
+        ('verify_users: pending page',
+         lambda: db.session.query(OwnerProfile, User).join(User, User.id == OwnerProfile.owner_id)
+            .filter(pending, OwnerProfile.id > 0).order_by(OwnerProfile.id).limit(51).all()),
+        ('helper_detail: helper by helper_id',
+         lambda: HelperProfile.query.filter_by(helper_id='HELPER1').first()),
+        ('helper_detail: association of owner and helper',
+         lambda: OwnerHelperAssociation.query.filter_by(helper_profile_id=1, owner_id=1).first()),
+        ('helper_detail: owners of helper',
+         lambda: OwnerHelperAssociation.query.filter_by(helper_profile_id=1).all()),
+        ('helper_detail: verification logs',
+         lambda: HelperVerificationLog.query.filter_by(helper_profile_id=1)
+            .order_by(HelperVerificationLog.verification_timestamp.desc()).all()),
+        ('helper_detail: reviews newest first',
+         lambda: Review.query.filter_by(helper_profile_id=1).order_by(Review.timestamp.desc()).all()),
+        ('helper_detail: rating totals',
+         lambda: HelperRatingStats.query.filter_by(helper_profile_id=1).first()),
+        ('owner_dashboard: page of helpers of owner',
+         lambda: HelperProfile.query
+            .join(OwnerHelperAssociation, OwnerHelperAssociation.helper_profile_id == HelperProfile.id)
+            .filter(OwnerHelperAssociation.owner_id == 1)
+            .order_by(HelperProfile.name, HelperProfile.id).limit(25).all()),
+        ('owner_dashboard: helper count of owner',
+         lambda: db.session.query(func.count(OwnerHelperAssociation.id))
+            .filter(OwnerHelperAssociation.owner_id == 1).scalar()),
+        ('owner_dashboard: page of contracts with helpers',
+         lambda: Contract.query.join(Contract.helper_profile).options(contains_eager(Contract.helper_profile))
+            .filter(Contract.owner_id == 1)
+            .order_by(Contract.is_terminated, Contract.created_at.desc(), Contract.id.desc()).limit(21).all()),
+        ('contract_detail: contract by contract_id',
+         lambda: Contract.query.filter_by(contract_id='CONTRACT1').first()),
+        ('contract_detail: task ids of contract',
+         lambda: db.session.query(contract_tasks.c.task_id)
+            .filter(contract_tasks.c.contract_id == 1).order_by(contract_tasks.c.task_id).all()),
+        ('submit_review: reviews this month for contract',
+         lambda: Review.query.filter(Review.owner_id == 1, Review.contract_id == 1,
+                                     Review.review_date >= month_start, Review.review_date <= today).count()),
+        ('submit_review: review today for helper',
+         lambda: Review.query.filter(Review.owner_id == 1, Review.helper_profile_id == 1,
+                                     Review.review_date == today).first()),
+        ('search_helper: helper by exact helper_id',
+         lambda: db.session.query(HelperProfile.id).filter(HelperProfile.helper_id == '123412341234').scalar()),
+        ('search_helper: page of ranked helpers',
+         lambda: HelperProfile.query.filter(HelperProfile.id.in_([1, 2, 3])).all()),
+        ('search_helper: helpers speaking a language, before the index is built',
+         lambda: sql_search('', 1)),
+        ('add_pincode: pincode exists',
+         lambda: PincodeMapping.query.filter_by(pincode='560034').first()),
+        ('admin_aadhaar_logs: newest logs',
+         lambda: log_page(AadhaarAPILog.query, per_page=20).logs),
+        ('admin_aadhaar_logs: logs older than a cursor',
+         lambda: log_page(AadhaarAPILog.query, before=f'{month_start.isoformat()}T00:00:00_100', per_page=20).logs),
+        ('admin_aadhaar_logs: logs of one type since a date',
+         lambda: log_page(AadhaarAPILog.query.filter(AadhaarAPILog.request_type == 'verify_otp',
+                                                     AadhaarAPILog.created_at >= month_start), per_page=20).logs),
+        ('admin_aadhaar_logs: counts by type and outcome',
+         log_stats),
+        ('aadhaar_log_detail: related logs of session',
+         lambda: AadhaarAPILog.query.filter(AadhaarAPILog.session_id == 'session', AadhaarAPILog.id != 1)
+            .order_by(AadhaarAPILog.created_at).all()),
+    ]
+
+
+def _capture_statements(query):
+    """Run query() and return the (sql, parameters) of every SELECT it sent."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        query()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def _sqlite_plan(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    lines = [row[-1] for row in rows]
+    # "SCAN t" (or "SCAN TABLE t" on older SQLite) without "USING ... INDEX" reads every row
+    full_scans = [line.split()[-1] for line in lines
+                  if line.startswith('SCAN ') and 'USING' not in line and 'CONSTANT ROW' not in line]
+    return lines, full_scans
+
+
+def _mysql_plan(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+    lines = [f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row['Extra'] or ''}".rstrip()
+             for row in rows]
+    full_scans = [row['table'] for row in rows if row['type'] == 'ALL']
+    return lines, full_scans
+
+
+def explain_query(name, query):
+    """Run one query and return its QueryPlan. Must be called inside an application context."""
+    captured = _capture_statements(query)
+    db.session.rollback()
+
+    explain = _mysql_plan if db.engine.dialect.name == 'mysql' else _sqlite_plan
+    plan = QueryPlan(name, [])
+    with db.engine.connect() as conn:
+        for statement, parameters in captured:
+            lines, full_scans = explain(conn, statement, parameters)
+            plan.statements.append((statement, lines))
+            plan.full_scans.extend(table for table in full_scans if table not in plan.full_scans)
+    return plan
+
+
+def audit(queries=None):
+    """Explain every route query and return the list of QueryPlans."""
+    return [explain_query(name, query) for name, query in (queries or route_queries())]
+
+
+def print_report(plans, verbose=False):
+    flagged = [plan for plan in plans if plan.full_scans]
+    for plan in plans:
+        status = f"FULL SCAN of {', '.join(plan.full_scans)}" if plan.full_scans else "ok"
+        print(f"{'!!' if plan.full_scans else '  '} {plan.name}: {status}")
+        if verbose or plan.full_scans:
+            for statement, lines in plan.statements:
+                print(f"     {' '.join(statement.split())}")
+                for line in lines:
+                    print(f"       -> {line}")
+    print("-" * 50)
+    print(f"{len(plans)} queries explained, {len(flagged)} with full table scans "
+          f"(curated list of route queries, not all of them)")
+    return not flagged
+
+
+if __name__ == "__main__":
+    from app import script_app as app
+
+    with app.app_context():
+        ok = print_report(audit(), verbose='--verbose' in sys.argv[1:])
+    sys.exit(0 if ok else 1)
@@ -56,13 +56,12 @@ def fix_contract_tasks():
                 continue
             
             # Add the first few tasks to this contract
-            task_ids = [str(task.id) for task in relevant_tasks]
-            tasks_str = ','.join(task_ids)
+            task_ids = [task.id for task in relevant_tasks]
             
-            print(f"  Adding tasks: {tasks_str}")
+            print(f"  Adding tasks: {task_ids}")
             
-            # Update the contract
-            contract.tasks = tasks_str
+            # Update the contract (join table and legacy string)
+            contract.set_tasks(task_ids)
             db.session.commit()
             print(f"  Contract updated successfully!")
 
@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, SelectField, SelectMultipleField, TextAreaField, DateField, FloatField, BooleanField, MultipleFileField, HiddenField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, Regexp
+from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, Regexp, Optional
 from flask_wtf.file import FileField, FileAllowed, FileSize
 import datetime
 from models import User
@@ -120,8 +120,17 @@ class CreateHelperForm(FlaskForm):
     submit = SubmitField('Register Helper')
 
 class SearchHelperForm(FlaskForm):
-    search_term = StringField('Search by Aadhaar ID or Name', validators=[DataRequired()])
+    search_term = StringField('Search by Aadhaar ID or Name', validators=[Optional()])
+    language = SelectField('Speaks', coerce=str, validators=[Optional()])  # Choices set from language_table
     submit = SubmitField('Search')
+    
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        if not (self.search_term.data or '').strip() and not self.language.data:
+            self.search_term.errors.append('Enter an Aadhaar ID or name, or choose a language.')
+            return False
+        return True
 
 class ContractForm(FlaskForm):
     helper_id = HiddenField('Helper ID')
@@ -1,78 +1,135 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-from sqlalchemy import func, desc
-from app import app, db
-from models import HelperProfile, Review, Contract, ReviewTaskRating, TaskList
+from sqlalchemy import func
+from extensions import db
+from models import Contract, HelperProfile, Review, ReviewTaskRating, TaskList, contract_tasks
+
+# Column order of the analytics DataFrame (and therefore of the CSV export)
+ANALYTICS_COLUMNS = [
+    'helper_id', 'name', 'helper_type', 'location', 'city', 'state', 'reviews_count',
+    'avg_punctuality', 'avg_attitude', 'avg_hygiene', 'avg_reliability', 'avg_communication',
+    'avg_overall', 'task_ratings'
+]
+
+def _helper_rating_rows():
+    """Per-helper review count, core value averages and overall rating in one grouped query."""
+    return db.session.query(
+        HelperProfile.id.label('helper_pk'),
+        HelperProfile.helper_id,
+        HelperProfile.name,
+        HelperProfile.helper_type,
+        HelperProfile.city,
+        HelperProfile.state,
+        func.count(Review.id).label('reviews_count'),
+        func.avg(Review.punctuality).label('avg_punctuality'),
+        func.avg(Review.attitude).label('avg_attitude'),
+        func.avg(Review.hygiene).label('avg_hygiene'),
+        func.avg(Review.reliability).label('avg_reliability'),
+        func.avg(Review.communication).label('avg_communication'),
+        func.avg(Review.overall_rating).label('avg_overall')
+    ).join(Review, Review.helper_profile_id == HelperProfile.id)\
+     .group_by(HelperProfile.id, HelperProfile.helper_id, HelperProfile.name,
+               HelperProfile.helper_type, HelperProfile.city, HelperProfile.state)\
+     .order_by(HelperProfile.id)\
+     .all()
+
+def _task_rating_rows():
+    """Per-helper, per-task average ratings in one grouped query, in first-rated order."""
+    return db.session.query(
+        Review.helper_profile_id.label('helper_pk'),
+        TaskList.name.label('task_name'),
+        func.avg(ReviewTaskRating.rating).label('avg_rating')
+    ).join(ReviewTaskRating, ReviewTaskRating.review_id == Review.id)\
+     .join(TaskList, TaskList.id == ReviewTaskRating.task_id)\
+     .group_by(Review.helper_profile_id, TaskList.name)\
+     .order_by(Review.helper_profile_id, func.min(ReviewTaskRating.id))\
+     .all()
+
+def task_ratings_by_city(task_name=None, city=None):
+    """
+    Average rating and rating count per (city, task), e.g. ironing across Bangalore.
+    
+    Reads review_task_ratings through its (task_id, review_id) index and filters cities on
+    the helper_profiles.city index, so a single task or city never scans every rating.
+    """
+    query = db.session.query(
+        HelperProfile.city,
+        TaskList.name.label('task_name'),
+        func.avg(ReviewTaskRating.rating).label('avg_rating'),
+        func.count(ReviewTaskRating.id).label('ratings_count')
+    ).select_from(ReviewTaskRating)\
+     .join(TaskList, TaskList.id == ReviewTaskRating.task_id)\
+     .join(Review, Review.id == ReviewTaskRating.review_id)\
+     .join(HelperProfile, HelperProfile.id == Review.helper_profile_id)
+    if task_name:
+        query = query.filter(TaskList.name == task_name)
+    if city:
+        query = query.filter(HelperProfile.city == city)
+    return query.group_by(HelperProfile.city, TaskList.name)\
+        .order_by(HelperProfile.city, TaskList.name)\
+        .all()
+
+def contract_counts_by_task(city=None):
+    """Number of contracts including each task, per helper city, from the contract_tasks table."""
+    query = db.session.query(
+        HelperProfile.city,
+        TaskList.name.label('task_name'),
+        func.count(contract_tasks.c.contract_id).label('contracts_count')
+    ).select_from(contract_tasks)\
+     .join(TaskList, TaskList.id == contract_tasks.c.task_id)\
+     .join(Contract, Contract.id == contract_tasks.c.contract_id)\
+     .join(HelperProfile, HelperProfile.id == Contract.helper_profile_id)
+    if city:
+        query = query.filter(HelperProfile.city == city)
+    return query.group_by(HelperProfile.city, TaskList.name)\
+        .order_by(HelperProfile.city, TaskList.name)\
+        .all()
+
+def build_helper_analytics_frame():
+    """
+    Build the helper analytics DataFrame from grouped SQL aggregates.
+    
+    Must be called inside an application context. Returns an empty DataFrame
+    (with the analytics columns) when no helper has been reviewed yet.
+    """
+    helper_rows = _helper_rating_rows()
+    if not helper_rows:
+        return pd.DataFrame(columns=ANALYTICS_COLUMNS)
+    
+    df = pd.DataFrame([row._asdict() for row in helper_rows])
+    
+    # Location fields, treating NULL and empty strings as unknown
+    for column in ('city', 'state'):
+        df[column] = df[column].fillna('').replace('', 'Unknown')
+    df['location'] = df['city'] + ', ' + df['state']
+    
+    rating_columns = ['avg_punctuality', 'avg_attitude', 'avg_hygiene',
+                      'avg_reliability', 'avg_communication', 'avg_overall']
+    for column in rating_columns:
+        # Python's round() rather than Series.round(): numpy rounds some x.xx5 values the
+        # other way, and the exported CSV should not change
+        df[column] = [round(value, 2) for value in df[column].astype(float)]
+    df['reviews_count'] = df['reviews_count'].astype(int)
+    
+    # Collapse per-task averages into one {task_name: avg} dict per helper
+    task_rows = _task_rating_rows()
+    task_ratings = {}
+    for helper_pk, task_name, avg_rating in task_rows:
+        task_ratings.setdefault(helper_pk, {})[task_name] = float(avg_rating)
+    df['task_ratings'] = df['helper_pk'].map(lambda pk: task_ratings.get(pk, {}))
+    
+    return df[ANALYTICS_COLUMNS]
 
 def generate_helper_analytics():
     """Generate analytics reports for helpers performance"""
+    from app import script_app as app
+    
     with app.app_context():
         print("Generating Helper Analytics Report...")
         
-        # Get all helpers with their review data
-        helpers = HelperProfile.query.all()
-        
-        analytics_data = []
-        
-        for helper in helpers:
-            # Get all reviews for this helper
-            reviews = Review.query.filter_by(helper_profile_id=helper.id).all()
-            
-            # Skip helpers with no reviews
-            if not reviews:
-                continue
-                
-            # Calculate average ratings
-            avg_punctuality = sum(r.punctuality for r in reviews) / len(reviews)
-            avg_attitude = sum(r.attitude for r in reviews) / len(reviews)
-            avg_hygiene = sum(r.hygiene for r in reviews) / len(reviews)
-            avg_reliability = sum(r.reliability for r in reviews) / len(reviews)
-            avg_communication = sum(r.communication for r in reviews) / len(reviews)
-            avg_overall = sum(r.overall_rating for r in reviews) / len(reviews)
-            
-            # Get task ratings details
-            task_ratings = {}
-            for review in reviews:
-                for tr in review.task_ratings:
-                    task_name = tr.task.name
-                    if task_name not in task_ratings:
-                        task_ratings[task_name] = []
-                    task_ratings[task_name].append(tr.rating)
-            
-            # Calculate average for each task
-            avg_task_ratings = {}
-            for task_name, ratings in task_ratings.items():
-                avg_task_ratings[task_name] = sum(ratings) / len(ratings)
-            
-            # Get location data
-            city = helper.city or "Unknown"
-            state = helper.state or "Unknown"
-            location = f"{city}, {state}"
-            
-            # Add to analytics data
-            helper_data = {
-                'helper_id': helper.helper_id,
-                'name': helper.name,
-                'helper_type': helper.helper_type,
-                'location': location,
-                'city': city,
-                'state': state,
-                'reviews_count': len(reviews),
-                'avg_punctuality': round(avg_punctuality, 2),
-                'avg_attitude': round(avg_attitude, 2),
-                'avg_hygiene': round(avg_hygiene, 2),
-                'avg_reliability': round(avg_reliability, 2),
-                'avg_communication': round(avg_communication, 2),
-                'avg_overall': round(avg_overall, 2),
-                'task_ratings': avg_task_ratings
-            }
-            
-            analytics_data.append(helper_data)
+        df = build_helper_analytics_frame()
         
-        # Convert to DataFrame for analysis
-        if analytics_data:
-            df = pd.DataFrame(analytics_data)
-            
+        if not df.empty:
             # Sort by overall rating
             df = df.sort_values('avg_overall', ascending=False)
             
@@ -0,0 +1,480 @@
+"""
+In-process full-text index behind the helper search.
+
+The old search ran `name ILIKE '%term%'`, which no index can serve, loaded every match and
+sorted it by name, and missed the spellings Indian names are commonly written in (Lakshmi
+and Laxmi, Seeta and Sita). Each worker now keeps an inverted index over every helper:
+
+- name words, plus a phonetic key per word that folds common transliteration variants
+  (ksh/ks/x, aspirated consonants, doubled vowels and letters, a trailing a or h) and a
+  consonant skeleton of that key for looser vowel differences (Mohammed, Muhammad);
+- city and society words, and the helper's languages.
+
+Postings are arrays of document numbers. A document is one version of a helper: changing
+a helper adds a new document and marks the old one dead, so postings are only ever
+appended to. Name words also go in a sorted vocabulary, so a query word can match names
+that start with it.
+
+search() scores every helper that matches at least one query word, ranks helpers matching
+more of the words first, then by how well they matched (exact name word, phonetic key,
+name prefix, city/society/language, skeleton), verified helpers first among equals, and
+returns one page of helper ids. An exact helper_id (Aadhaar number or DL) is looked up in
+the database and always comes first.
+
+The index is built on a background thread started by the first request; until it is ready
+searches fall back to a paginated ILIKE query. Helpers committed in this worker are
+re-read on the next search. New helpers from other workers are found through a MAX(id)
+check run at most once every HELPER_SEARCH_CHECK_INTERVAL seconds, and the whole index is
+rebuilt every HELPER_SEARCH_REBUILD_INTERVAL seconds, which picks up other workers' edits
+and drops dead documents.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import repeat
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from lazy_daemon import daemon_thread
+from models import HelperProfile, Language, helper_languages
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 20
+BUILD_BATCH_SIZE = 10000
+PREFIX_EXPANSIONS = 50  # Name words tried for a prefix, nearest first
+
+WORDS = re.compile(r'[^\W_]+')
+
+PHONETIC_RULES = [
+    ('ksh', 'x'), ('ks', 'x'), ('ck', 'k'),
+    ('ph', 'f'), ('sh', 's'), ('th', 't'), ('dh', 'd'), ('bh', 'b'), ('kh', 'k'), ('gh', 'g'),
+    ('jh', 'j'), ('ch', 'c'), ('w', 'v'), ('z', 'j'), ('q', 'k'),
+    ('ee', 'i'), ('ii', 'i'), ('oo', 'u'), ('uu', 'u'), ('aa', 'a'),
+]
+DOUBLED = re.compile(r'(.)\1+')
+VOWELS = re.compile(r'[aeiou]')
+
+# Score of a helper for one query word is its best match. Every matched word adds
+# MATCHED_WORD, so helpers matching more of the query always rank first.
+MATCHED_WORD = 100
+NAME_WEIGHT = 6
+PHONETIC_WEIGHT = 4
+PREFIX_WEIGHT = 3
+PLACE_WEIGHT = 2
+SKELETON_WEIGHT = 1
+
+LIVE = 1
+VERIFIED = 2
+
+
+def words(text):
+    """Lowercased words of a name, city or society."""
+    return WORDS.findall((text or '').lower())
+
+
+def phonetic_key(word):
+    """Key shared by common romanisations of a name word: lakshmi, laxmi -> laxmi."""
+    for spelling, replacement in PHONETIC_RULES:
+        word = word.replace(spelling, replacement)
+    word = DOUBLED.sub(r'\1', word)
+    for ending in ('h', 'a'):
+        if len(word) > 3 and word.endswith(ending):
+            word = word[:-1]
+    return word
+
+
+def skeleton_key(word):
+    """The phonetic key without vowels after the first letter: mohammed, muhammad -> mhmd."""
+    key = phonetic_key(word)
+    return key[:1] + VOWELS.sub('', key[1:])
+
+
+def name_keys(name):
+    """Posting keys of a helper name: each word, its phonetic key and its skeleton."""
+    keys = set()
+    for word in words(name):
+        keys.add('n:' + word)
+        keys.add('p:' + phonetic_key(word))
+        skeleton = skeleton_key(word)
+        if len(skeleton) >= 3:
+            keys.add('s:' + skeleton)
+    return keys
+
+
+def place_keys(city, society):
+    """Posting keys of a helper's city and society words."""
+    return {'c:' + word for word in words(city)} | {'o:' + word for word in words(society)}
+
+
+def language_keys(languages):
+    """Posting keys of a helper's (language id, name) pairs."""
+    keys = set()
+    for language_id, language_name in languages:
+        keys.add(f'L:{language_id}')
+        keys.add('g:' + (language_name or '').lower())
+    return keys
+
+
+def document_keys(name, city, society, languages, cache=None):
+    """
+    Posting keys of one helper. cache, a dict kept across calls, reuses the keys of names,
+    places and language sets that repeat across many helpers.
+    """
+    if cache is None:
+        return name_keys(name) | place_keys(city, society) | language_keys(languages)
+    parts = []
+    for key, compute, args in ((('n', name), name_keys, (name,)),
+                               (('p', city, society), place_keys, (city, society)),
+                               (('l', tuple(languages)), language_keys, (languages,))):
+        keys = cache.get(key)
+        if keys is None:
+            keys = cache[key] = compute(*args)
+        parts.append(keys)
+    return parts[0].union(*parts[1:])
+
+
+class IndexData:
+    """One build of the index. Mutated only under HelperSearchIndex._lock."""
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []  # Sorted name words
+        self.doc_helper = array('i')  # Document -> helper primary key
+        self.doc_flags = bytearray()  # Document -> LIVE | VERIFIED bits
+        self.helper_doc = array('i')  # Helper primary key -> current document, or -1
+        self.max_id = 0
+        self.dead = 0
+        self._speakers = {}
+
+    def speakers(self, language_id):
+        """Set of the documents of a language, kept until the language gains a document."""
+        docs = self.postings.get(f'L:{language_id}', ())
+        cached = self._speakers.get(language_id)
+        if cached is None or cached[0] != len(docs):
+            cached = self._speakers[language_id] = (len(docs), set(docs))
+        return cached[1]
+
+    def current_doc(self, helper_pk):
+        return self.helper_doc[helper_pk] if helper_pk < len(self.helper_doc) else -1
+
+    def remove(self, helper_pk):
+        doc = self.current_doc(helper_pk)
+        if doc >= 0:
+            self.doc_flags[doc] &= ~LIVE
+            self.helper_doc[helper_pk] = -1
+            self.dead += 1
+
+    def add(self, helper_pk, keys, verified, new_words=None):
+        self.remove(helper_pk)
+        doc = len(self.doc_helper)
+        self.doc_helper.append(helper_pk)
+        self.doc_flags.append(LIVE | (VERIFIED if verified else 0))
+        if helper_pk >= len(self.helper_doc):
+            self.helper_doc.extend(array('i', [-1]) * (helper_pk + 1 - len(self.helper_doc) + len(self.helper_doc) // 4))
+        self.helper_doc[helper_pk] = doc
+        self.max_id = max(self.max_id, helper_pk)
+        postings = self.postings
+        for key in keys:
+            docs = postings.get(key)
+            if docs is None:
+                docs = postings[key] = array('i')
+                if key.startswith('n:'):
+                    if new_words is None:
+                        bisect.insort(self.vocabulary, key[2:])
+                    else:
+                        new_words.append(key[2:])
+            docs.append(doc)
+
+
+def _helper_batches(ids=None, after_id=0, batch_size=BUILD_BATCH_SIZE):
+    """
+    Yield lists of (id, name, city, society, verification_status, languages) for the helpers
+    in ids, or for every helper after after_id, in batches of at most batch_size.
+    """
+    columns = (HelperProfile.id, HelperProfile.name, HelperProfile.city, HelperProfile.society,
+               HelperProfile.verification_status)
+    ids = sorted(ids) if ids is not None else None
+    while True:
+        query = db.session.query(*columns)
+        languages = db.session.query(helper_languages.c.helper_profile_id, Language.id, Language.name)\
+            .join(Language, Language.id == helper_languages.c.language_id)
+        if ids is not None:
+            if not ids:
+                return
+            batch_ids, ids = ids[:batch_size], ids[batch_size:]
+            rows = query.filter(HelperProfile.id.in_(batch_ids)).all()
+            languages = languages.filter(helper_languages.c.helper_profile_id.in_(batch_ids))
+        else:
+            rows = query.filter(HelperProfile.id > after_id).order_by(HelperProfile.id).limit(batch_size).all()
+            if not rows:
+                return
+            after_id = rows[-1].id
+            languages = languages.filter(helper_languages.c.helper_profile_id.between(rows[0].id, after_id))
+        if not rows:
+            continue
+        spoken = {}
+        for helper_pk, language_id, language_name in languages:
+            spoken.setdefault(helper_pk, []).append((language_id, language_name))
+        yield [(row.id, row.name, row.city, row.society, row.verification_status, spoken.get(row.id, ()))
+               for row in rows]
+
+
+class HelperSearchIndex:
+
+    def __init__(self):
+        self.version = 0
+        self.check_interval = 5
+        self.rebuild_interval = 900
+        self.searches = 0
+        self.fallbacks = 0
+        self.build_seconds = None
+        self.app = None
+        self._data = None
+        self._pending = set()  # Helper ids committed in this worker since the last search
+        self._changed_during_build = None
+        self._checked_at = 0.0
+        self._indexer = daemon_thread(self._index_loop, 'helper-search-indexer')
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['helper_search'] = self
+        self.app = app
+        self.check_interval = app.config.get('HELPER_SEARCH_CHECK_INTERVAL', 5)
+        self.rebuild_interval = app.config.get('HELPER_SEARCH_REBUILD_INTERVAL', 900)
+        if app.config.get('HELPER_SEARCH_INDEX_ENABLED', True):
+            app.before_request(self._indexer.ensure)
+
+    @property
+    def ready(self):
+        return self._data is not None
+
+    def build(self):
+        """Build the index from the helper tables and start serving searches from it."""
+        start = time.perf_counter()
+        with self._lock:
+            self._changed_during_build = set()
+        data = IndexData()
+        new_words = []
+        key_cache = {}
+        for batch in _helper_batches():
+            for helper_pk, name, city, society, status, languages in batch:
+                keys = document_keys(name, city, society, languages, key_cache)
+                data.add(helper_pk, keys, status == 'Verified', new_words)
+        data.vocabulary = sorted(new_words)
+        with self._lock:
+            self._data = data
+            # Rows committed while the build read the table may have been read before the commit
+            self._pending |= self._changed_during_build
+            self._changed_during_build = None
+            self._checked_at = time.monotonic()
+            self.build_seconds = time.perf_counter() - start
+            self.version += 1
+        return data
+
+    def _index_loop(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    try:
+                        self.build()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.exception("Helper search index build failed")
+            if not self.rebuild_interval:
+                return
+            time.sleep(self.rebuild_interval)
+
+    def _refresh(self, data):
+        """Apply this worker's committed changes and pick up helpers added by other workers."""
+        now = time.monotonic()
+        with self._lock:
+            changed, self._pending = self._pending, set()
+            check = now - self._checked_at >= self.check_interval
+            if check:
+                self._checked_at = now
+        if check:
+            max_id = db.session.query(func.max(HelperProfile.id)).scalar() or 0
+            if max_id > data.max_id:
+                changed.update(range(data.max_id + 1, max_id + 1))
+        if not changed:
+            return
+        found = set()
+        rows = [row for batch in _helper_batches(changed) for row in batch]
+        with self._lock:
+            for helper_pk, name, city, society, status, languages in rows:
+                data.add(helper_pk, document_keys(name, city, society, languages), status == 'Verified')
+                found.add(helper_pk)
+            for helper_pk in changed - found:
+                data.remove(helper_pk)
+            if check:
+                data.max_id = max(data.max_id, max_id)
+            self.version += 1
+
+    def _word_scores(self, data, word):
+        """Document -> best weight for one query word."""
+        scores = {}
+        postings = data.postings
+        skeleton = skeleton_key(word)
+        keys = [(SKELETON_WEIGHT, 's:' + skeleton)] if len(skeleton) >= 3 else []
+        keys += [(PLACE_WEIGHT, 'c:' + word), (PLACE_WEIGHT, 'o:' + word), (PLACE_WEIGHT, 'g:' + word)]
+        if len(word) >= 2:
+            vocabulary = data.vocabulary
+            start = bisect.bisect_left(vocabulary, word)
+            for name_word in vocabulary[start:start + PREFIX_EXPANSIONS + 1]:
+                if not name_word.startswith(word):
+                    break
+                if name_word != word:
+                    keys.append((PREFIX_WEIGHT, 'n:' + name_word))
+        keys += [(PHONETIC_WEIGHT, 'p:' + phonetic_key(word)), (NAME_WEIGHT, 'n:' + word)]
+        # Weakest first, so a stronger match overwrites a weaker one
+        for weight, key in keys:
+            docs = postings.get(key)
+            if docs:
+                scores.update(zip(docs, repeat(MATCHED_WORD + weight)))
+        return scores
+
+    def search(self, term, language_id=None, limit=PAGE_SIZE, offset=0):
+        """
+        Return (helper ids, has_more) for one page of helpers matching term, best first,
+        optionally only those speaking language_id. Returns None while the index is being built.
+        """
+        data = self._data
+        if data is None:
+            return None
+        self._refresh(data)
+        self.searches += 1
+
+        term = (term or '').strip()
+        query_words = list(dict.fromkeys(words(term)))
+        language_docs = data.postings.get(f'L:{language_id}', array('i')) if language_id else None
+        speakers = data.speakers(language_id) if language_id else None
+        wanted = offset + limit + 1
+
+        word_scores = [scores for scores in (self._word_scores(data, word) for word in query_words) if scores]
+        if not query_words:
+            scores = dict.fromkeys(language_docs or (), 0)
+        elif len(word_scores) <= 1:
+            scores = word_scores[0] if word_scores else {}
+        else:
+            everywhere = set(word_scores[0]).intersection(*word_scores[1:])
+            if speakers is not None:
+                everywhere &= speakers
+            if len(everywhere) >= wanted:
+                # Helpers matching every word fill the page, and outrank the rest
+                scores = {doc: sum(scores[doc] for scores in word_scores) for doc in everywhere}
+            else:
+                scores = dict(word_scores[0])
+                for more in word_scores[1:]:
+                    for doc, score in more.items():
+                        scores[doc] = scores.get(doc, 0) + score
+        if speakers is not None and query_words:
+            if len(scores) <= len(speakers):
+                scores = {doc: score for doc, score in scores.items() if doc in speakers}
+            else:
+                scores = {doc: scores[doc] for doc in speakers if doc in scores}
+
+        exact = None
+        if term and ' ' not in term:
+            exact = db.session.query(HelperProfile.id).filter(HelperProfile.helper_id == term).scalar()
+            if exact is not None and speakers is not None and data.current_doc(exact) not in speakers:
+                exact = None
+
+        doc_helper = data.doc_helper
+        helper_ids = [doc_helper[doc] for doc in self._best(data, scores, wanted)]
+        if exact is not None:
+            helper_ids = [exact] + [helper_pk for helper_pk in helper_ids if helper_pk != exact]
+        return helper_ids[offset:offset + limit], len(helper_ids) > offset + limit
+
+    def _best(self, data, scores, wanted):
+        """The wanted best live documents in scores: highest score, then verified, then newest."""
+        # Scores take few distinct values, so counting them gives the lowest score that can
+        # still reach the page, and only documents at or above it are ranked
+        counts = Counter(scores.values())
+        needed = wanted + data.dead
+        threshold = 0
+        for score in sorted(counts, reverse=True):
+            threshold = score
+            needed -= counts[score]
+            if needed <= 0:
+                break
+        flags = data.doc_flags
+        candidates = [(score, flags[doc] & VERIFIED, doc) for doc, score in scores.items()
+                      if score >= threshold and flags[doc] & LIVE]
+        return [doc for score, verified, doc in heapq.nlargest(wanted, candidates)]
+
+    def find(self, term, language_id=None, limit=PAGE_SIZE, offset=0):
+        """
+        Return (HelperProfile objects, has_more) for one page of search results, from the
+        index, or from the ILIKE query while the index is being built.
+        """
+        result = self.search(term, language_id, limit, offset)
+        if result is None:
+            self.fallbacks += 1
+            return sql_search(term, language_id, limit, offset)
+        helper_ids, has_more = result
+        if not helper_ids:
+            return [], has_more
+        helpers = {helper.id: helper for helper in HelperProfile.query.filter(HelperProfile.id.in_(helper_ids))}
+        return [helpers[helper_pk] for helper_pk in helper_ids if helper_pk in helpers], has_more
+
+    def changed(self, helper_ids):
+        """Re-read these helpers on the next search. Called when a transaction that changed them commits."""
+        with self._lock:
+            self._pending.update(helper_ids)
+            if self._changed_during_build is not None:
+                self._changed_during_build.update(helper_ids)
+
+    def stats(self):
+        data = self._data
+        return {
+            'ready': data is not None,
+            'documents': len(data.doc_helper) - data.dead if data else 0,
+            'dead_documents': data.dead if data else 0,
+            'keys': len(data.postings) if data else 0,
+            'build_seconds': self.build_seconds,
+            'searches': self.searches,
+            'fallbacks': self.fallbacks,
+        }
+
+
+def sql_search(term, language_id=None, limit=PAGE_SIZE, offset=0):
+    """The ILIKE search: helper_id exact or name containing term, by name. Returns (helpers, has_more)."""
+    term = (term or '').strip()
+    # Language filter uses the helper_languages index
+    query = HelperProfile.speaking(int(language_id)) if language_id else HelperProfile.query
+    if term:
+        query = query.filter((HelperProfile.helper_id == term) | (HelperProfile.name.ilike(f'%{term}%')))
+    helpers = query.order_by(HelperProfile.name, HelperProfile.id).offset(offset).limit(limit + 1).all()
+    return helpers[:limit], len(helpers) > limit
+
+
+helper_search = HelperSearchIndex()
+
+
+def _helper_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault('helper_search_changed', set()).add(target.id)
+
+
+def _after_commit(session):
+    changed = session.info.pop('helper_search_changed', None)
+    if changed:
+        helper_search.changed(changed)
+
+
+def _after_rollback(session):
+    session.info.pop('helper_search_changed', None)
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(HelperProfile, _event, _helper_changed)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_rollback', _after_rollback)
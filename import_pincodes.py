@@ -0,0 +1,148 @@
+"""
+Streaming bulk import of pincode mappings from a CSV file.
+
+Used by the bulk upload form on /admin/pincodes and from the command line:
+
+    python import_pincodes.py path/to/pincodes.csv [chunk_size]
+
+The CSV is read incrementally (header row first, then pincode, state, city, society). Rows are
+deduplicated within the file with a set, and against the table with one IN lookup per chunk;
+each chunk is then written with a single multi-row INSERT that ignores duplicates.
+"""
+import csv
+import io
+import sys
+from extensions import db
+from models import PincodeMapping
+
+CHUNK_SIZE = 5000
+
+# Lengths of the pincode_mapping columns, to reject rows the database would refuse
+MAX_LENGTHS = {'pincode': 10, 'state': 50, 'city': 50, 'society': 100}
+
+
+class ImportStats:
+    """Running counters for an import, passed to the progress callback after every chunk."""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.added_rows = 0
+        self.skipped_rows = 0
+        self.error_rows = 0
+        self.chunks = 0
+
+    def __str__(self):
+        return (f"{self.total_rows} rows read: {self.added_rows} added, "
+                f"{self.skipped_rows} skipped, {self.error_rows} errors")
+
+
+def _insert_ignore_statement():
+    """Multi-row INSERT that skips rows clashing with a unique index, on each supported database."""
+    return PincodeMapping.__table__.insert()\
+        .prefix_with('OR IGNORE', dialect='sqlite')\
+        .prefix_with('IGNORE', dialect='mysql')
+
+
+def _write_chunk(rows, stats):
+    """Drop rows whose pincode is already in the table, then insert the rest in one statement."""
+    pincodes = [row['pincode'] for row in rows]
+    existing = {
+        pincode for (pincode,) in
+        db.session.query(PincodeMapping.pincode).filter(PincodeMapping.pincode.in_(pincodes))
+    }
+    new_rows = [row for row in rows if row['pincode'] not in existing]
+    stats.skipped_rows += len(rows) - len(new_rows)
+
+    if new_rows:
+        try:
+            db.session.execute(_insert_ignore_statement(), new_rows)
+            db.session.commit()
+            stats.added_rows += len(new_rows)
+        except Exception:
+            db.session.rollback()
+            stats.error_rows += len(new_rows)
+            raise
+
+
+def import_pincode_csv(stream, chunk_size=CHUNK_SIZE, progress=None, logger=None):
+    """
+    Import pincode mappings from a CSV stream (binary or text) and return an ImportStats.
+
+    Must run inside an application context. Every chunk is committed on its own, so a failing
+    chunk is counted as errors without losing the chunks before it. progress, if given, is
+    called with the ImportStats after each chunk.
+    """
+    if isinstance(stream, io.TextIOBase):
+        text_stream = stream
+    else:
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text_stream)
+
+    # Skip header row if exists
+    next(reader, None)
+
+    stats = ImportStats()
+    seen = set()
+    chunk = []
+
+    def flush():
+        try:
+            _write_chunk(chunk, stats)
+        except Exception as e:
+            if logger:
+                logger.error(f"Error importing pincode chunk {stats.chunks + 1}: {str(e)}")
+        stats.chunks += 1
+        chunk.clear()
+        if progress:
+            progress(stats)
+
+    for row in reader:
+        stats.total_rows += 1
+
+        # Skip empty rows
+        if not row or len(row) < 4:
+            stats.skipped_rows += 1
+            continue
+
+        pincode, state, city, society = (value.strip() for value in row[:4])
+
+        # Skip if any required field is empty, or if the pincode appeared earlier in the file
+        if not pincode or not state or not city or not society or pincode in seen:
+            stats.skipped_rows += 1
+            continue
+
+        values = {'pincode': pincode, 'state': state, 'city': city, 'society': society}
+        if any(len(values[column]) > length for column, length in MAX_LENGTHS.items()):
+            stats.error_rows += 1
+            continue
+
+        seen.add(pincode)
+        chunk.append(values)
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python import_pincodes.py path/to/pincodes.csv [chunk_size]")
+        sys.exit(1)
+
+    from app import script_app as app
+
+    csv_path = sys.argv[1]
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else CHUNK_SIZE
+
+    with app.app_context():
+        with open(csv_path, 'rb') as csv_file:
+            result = import_pincode_csv(
+                csv_file,
+                chunk_size=chunk_size,
+                progress=lambda stats: print(f"Chunk {stats.chunks}: {stats}"),
+                logger=app.logger
+            )
+        print(f"Import complete. {result}")
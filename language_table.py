@@ -0,0 +1,55 @@
+"""
+In-process copy of the languages table.
+
+The create-helper and helper-search forms list every language, and the table has a handful
+of rows that almost never change, so each worker keeps it in memory instead of querying on
+every render. Writers in this process call invalidate(); other workers' changes are
+noticed at most LANGUAGE_TABLE_CHECK_INTERVAL seconds later (see table_snapshot.py).
+"""
+from extensions import db
+from models import Language
+from table_snapshot import TableSnapshot
+
+DEFAULT_LANGUAGES = ["English", "Hindi", "Bengali", "Tamil", "Telugu", "Marathi"]
+
+
+class LanguageTable(TableSnapshot):
+
+    model = Language
+    check_interval_setting = 'LANGUAGE_TABLE_CHECK_INTERVAL'
+
+    def __init__(self):
+        super().__init__()
+        self._languages = []  # (id, name), ordered by name
+        self._names = {}
+
+    def _rebuild(self):
+        languages = db.session.query(Language.id, Language.name).order_by(Language.name).all()
+        self._languages = [(language.id, language.name) for language in languages]
+        self._names = dict(self._languages)
+
+    def ensure_defaults(self):
+        """Seed DEFAULT_LANGUAGES if the table is empty."""
+        self._ensure_fresh()
+        if self._languages:
+            return
+        for name in DEFAULT_LANGUAGES:
+            db.session.add(Language(name=name))
+        db.session.commit()
+        self.invalidate()
+
+    def choices(self):
+        """(id, name) pairs for a select field, ids as strings, ordered by name."""
+        self._ensure_fresh()
+        return [(str(language_id), name) for language_id, name in self._languages]
+
+    def name(self, language_id):
+        """Name of a language by id (int or string), or None."""
+        self._ensure_fresh()
+        try:
+            return self._names.get(int(language_id))
+        except (TypeError, ValueError):
+            return None
+
+
+language_table = LanguageTable()
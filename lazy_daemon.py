@@ -0,0 +1,44 @@
+"""
+Background threads that start on first use.
+
+Gunicorn's --preload imports the app in a master process and then forks the workers, and
+threads do not survive a fork. Module instances therefore never start their threads at
+import or in init_app; they hold a LazyDaemon and call ensure() from before_request or
+whenever work is queued, which starts the thread (again, if it has died) in the process
+that needs it.
+"""
+import threading
+
+
+class LazyDaemon:
+    """A thread or pool made by start() on the first ensure(), and again whenever is_alive() turns false."""
+
+    def __init__(self, start, is_alive=lambda daemon: daemon.is_alive()):
+        self._start = start
+        self._is_alive = is_alive
+        self.current = None
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        """Start the thread or pool if it is not running. Returns None, so it can be a before_request hook."""
+        current = self.current
+        if current is not None and self._is_alive(current):
+            return
+        with self._lock:
+            if self.current is None or not self._is_alive(self.current):
+                self.current = self._start()
+
+    def join(self, timeout=None):
+        if self.current is not None:
+            self.current.join(timeout=timeout)
+
+
+def daemon_thread(target, name, before_start=None):
+    """LazyDaemon for a daemon thread running target; before_start() runs before each start."""
+    def start():
+        if before_start is not None:
+            before_start()
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+    return LazyDaemon(start)
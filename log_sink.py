@@ -0,0 +1,128 @@
+"""
+Background writer for Aadhaar API logs.
+
+log_api_interaction() used to add and commit an AadhaarAPILog row on the request thread,
+adding a database round trip to every OTP step and committing whatever else was pending in
+the request's session. Requests now only enqueue a row; a worker thread drains the bounded
+queue and writes rows in multi-row INSERTs on its own connection.
+"""
+import atexit
+import datetime
+import logging
+import queue
+import threading
+from flask import current_app
+from extensions import db
+from lazy_daemon import daemon_thread
+
+logger = logging.getLogger(__name__)
+
+
+class APILogSink:
+    """Bounded in-memory queue of AadhaarAPILog rows flushed in batches by a daemon thread."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.queue = None
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._worker = daemon_thread(self._run, 'api-log-sink', before_start=self._stopping.clear)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.queue = queue.Queue(maxsize=app.config.get('API_LOG_QUEUE_SIZE', 10000))
+        self.batch_size = app.config.get('API_LOG_BATCH_SIZE', 100)
+        self.flush_interval = app.config.get('API_LOG_FLUSH_INTERVAL', 1.0)
+        app.extensions['api_log_sink'] = self
+        atexit.register(self.shutdown)
+
+    def enqueue(self, **row):
+        """Queue one AadhaarAPILog row (column=value). Never blocks; drops the row if the queue is full."""
+        if self.app is None:
+            self.init_app(current_app._get_current_object())
+        row.setdefault('created_at', datetime.datetime.utcnow())
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            logger.warning(f"API log queue full, dropped {row.get('request_type')} log (total dropped: {dropped})")
+            return False
+        with self._lock:
+            self.enqueued += 1
+        self._worker.ensure()
+        return True
+
+    def _next_batch(self):
+        """Wait up to flush_interval for a first row, then take whatever else is queued."""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        from models import AadhaarAPILog
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(AadhaarAPILog.__table__.insert(), batch)
+            with self._lock:
+                self.written += len(batch)
+        except Exception:
+            with self._lock:
+                self.failed += len(batch)
+            logger.exception(f"Failed to write {len(batch)} API log rows")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def flush(self, timeout=None):
+        """Block until every queued row has been written (or failed). Returns False on timeout."""
+        if self.queue is None:
+            return True
+        if self.queue.unfinished_tasks:
+            self._worker.ensure()
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(lambda: not self.queue.unfinished_tasks, timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Flush pending rows and stop the worker. Registered with atexit."""
+        flushed = self.flush(timeout)
+        self._stopping.set()
+        self._worker.join(timeout=self.flush_interval + 1)
+        if not flushed:
+            logger.warning(f"API log sink stopped with {self.queue.qsize()} rows unwritten")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'queued': self.queue.qsize() if self.queue is not None else 0,
+            }
+
+
+api_log_sink = APILogSink()
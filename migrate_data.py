@@ -11,7 +11,7 @@ import logging
 import psycopg2
 import mysql.connector
 from config import config
-from app import app
+from app import script_app as app
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
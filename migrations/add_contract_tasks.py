@@ -0,0 +1,80 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extensions import db
+from app import script_app as app
+from models import HelperProfile, ReviewTaskRating, contract_tasks
+from sqlalchemy import text, inspect
+
+BATCH_SIZE = 500
+
+def parse_task_ids(tasks):
+    """Task IDs from a legacy comma-separated string, ignoring blanks and junk."""
+    return {int(part) for part in (tasks or '').split(',') if part.strip().isdigit()}
+
+def backfill(batch_size=BATCH_SIZE):
+    """Copy Contract.tasks strings into contract_tasks, batch by batch. Returns rows inserted."""
+    with db.engine.connect() as conn:
+        known_tasks = {task_id for (task_id,) in conn.execute(text("SELECT id FROM task_list"))}
+
+    # Rows already present (from a previous run or a new contract) are skipped, not duplicated
+    insert = contract_tasks.insert()\
+        .prefix_with('OR IGNORE', dialect='sqlite')\
+        .prefix_with('IGNORE', dialect='mysql')
+
+    inserted = unknown = 0
+    last_id = 0
+    while True:
+        with db.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT id, tasks FROM contracts WHERE id > :last_id ORDER BY id LIMIT :batch_size
+            """), {'last_id': last_id, 'batch_size': batch_size}).all()
+        if not rows:
+            return inserted, unknown
+
+        links = []
+        for row in rows:
+            task_ids = parse_task_ids(row.tasks)
+            unknown += len(task_ids - known_tasks)
+            links.extend({'contract_id': row.id, 'task_id': task_id} for task_id in sorted(task_ids & known_tasks))
+        if links:
+            with db.engine.begin() as conn:
+                inserted += conn.execute(insert, links).rowcount
+
+        last_id = rows[-1].id
+        print(f"contracts: backfilled up to id {last_id} ({inserted} task links)")
+
+def create_index(index, table):
+    """Create an index declared on a model if the table does not have it yet."""
+    existing = {existing_index['name'] for existing_index in inspect(db.engine).get_indexes(table)}
+    if index.name not in existing:
+        index.create(db.engine)
+        print(f"Created index {index.name} on {table}")
+    else:
+        print(f"Index {index.name} already exists on {table}")
+
+def upgrade():
+    """
+    Create the contract_tasks join table, backfill it from Contract.tasks and add the
+    indexes used by per-task analytics
+    """
+    with app.app_context():
+        contract_tasks.create(db.engine, checkfirst=True)
+        print("contract_tasks table ready")
+
+        inserted, unknown = backfill()
+        print(f"Inserted {inserted} contract task links")
+        if unknown:
+            print(f"Skipped {unknown} references to tasks that no longer exist")
+
+        for index in ReviewTaskRating.__table__.indexes:
+            create_index(index, 'review_task_ratings')
+        for index in HelperProfile.__table__.indexes:
+            if index.columns.keys() == ['city']:
+                create_index(index, 'helper_profiles')
+
+if __name__ == "__main__":
+    upgrade()
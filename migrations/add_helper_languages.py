@@ -0,0 +1,72 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extensions import db
+from app import script_app as app
+from models import helper_languages
+from sqlalchemy import text
+
+BATCH_SIZE = 500
+
+def parse_language_names(languages):
+    """Lowercased names from a display string like "English, Hindi"."""
+    return {name.strip().lower() for name in (languages or '').split(',') if name.strip()}
+
+def backfill(batch_size=BATCH_SIZE):
+    """
+    Link helpers to languages named in HelperProfile.languages, batch by batch.
+    Returns (rows inserted, {unmatched name: helper count}).
+    """
+    with db.engine.connect() as conn:
+        language_ids = {name.lower(): language_id
+                        for language_id, name in conn.execute(text("SELECT id, name FROM languages"))}
+
+    # Rows already present (from a previous run or a new helper) are skipped, not duplicated
+    insert = helper_languages.insert()\
+        .prefix_with('OR IGNORE', dialect='sqlite')\
+        .prefix_with('IGNORE', dialect='mysql')
+
+    inserted = 0
+    unmatched = {}
+    last_id = 0
+    while True:
+        with db.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT id, languages FROM helper_profiles WHERE id > :last_id ORDER BY id LIMIT :batch_size
+            """), {'last_id': last_id, 'batch_size': batch_size}).all()
+        if not rows:
+            return inserted, unmatched
+
+        links = []
+        for row in rows:
+            for name in parse_language_names(row.languages):
+                if name in language_ids:
+                    links.append({'helper_profile_id': row.id, 'language_id': language_ids[name]})
+                else:
+                    unmatched[name] = unmatched.get(name, 0) + 1
+        if links:
+            with db.engine.begin() as conn:
+                inserted += conn.execute(insert, links).rowcount
+
+        last_id = rows[-1].id
+        print(f"helper_profiles: backfilled up to id {last_id} ({inserted} language links)")
+
+def upgrade():
+    """
+    Create the helper_languages join table and backfill it from HelperProfile.languages
+    """
+    with app.app_context():
+        helper_languages.create(db.engine, checkfirst=True)
+        print("helper_languages table ready")
+
+        inserted, unmatched = backfill()
+        print(f"Inserted {inserted} helper language links")
+        # Placeholders such as "Not specified" end up here, along with names not in languages
+        for name, count in sorted(unmatched.items()):
+            print(f"Skipped unknown language '{name}' on {count} helpers")
+
+if __name__ == "__main__":
+    upgrade()
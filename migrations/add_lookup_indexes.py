@@ -0,0 +1,44 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extensions import db
+from app import script_app as app
+import models  # noqa: F401 - registers every table on db.metadata
+from sqlalchemy import inspect
+
+def missing_indexes(inspector):
+    """(table, index) pairs declared on the models but absent from the database."""
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                missing.append((table, index))
+    return missing
+
+def upgrade():
+    """
+    Create every index declared on the models that the database does not have yet
+    (owner profile, review, contract, association, pincode and Aadhaar log lookups).
+    On MySQL, CREATE INDEX runs as online DDL, so writes continue while it builds.
+    """
+    with app.app_context():
+        missing = missing_indexes(inspect(db.engine))
+        if not missing:
+            print("All declared indexes already exist")
+            return
+
+        for table, index in missing:
+            columns = ', '.join(column.name for column in index.columns)
+            print(f"Creating index {index.name} on {table.name} ({columns})...")
+            index.create(db.engine)
+        print(f"Created {len(missing)} indexes")
+
+if __name__ == "__main__":
+    upgrade()
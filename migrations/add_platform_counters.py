@@ -0,0 +1,28 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extensions import db
+from app import script_app as app
+from models import PlatformCounter
+from platform_counters import platform_counters
+
+def upgrade():
+    """
+    Create the platform_counters table and fill it with the current row counts, so the
+    admin dashboard stops running COUNT(*) on every load. Safe to run again: existing
+    counters are checked and corrected.
+    """
+    with app.app_context():
+        print("Creating platform_counters table...")
+        PlatformCounter.__table__.create(db.engine, checkfirst=True)
+        
+        print("Counting rows...")
+        for name, value in sorted(platform_counters.reconcile().items()):
+            print(f"  {name}: {value}")
+        print("Dashboard counters are up to date")
+
+if __name__ == "__main__":
+    upgrade()
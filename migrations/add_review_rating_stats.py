@@ -0,0 +1,47 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extensions import db
+from app import script_app as app
+from models import HelperRatingStats
+from sqlalchemy import text, inspect
+
+def upgrade():
+    """
+    Store Review.overall_rating and create the helper_rating_stats totals table
+    """
+    with app.app_context():
+        inspector = inspect(db.engine)
+        columns = [column['name'] for column in inspector.get_columns('reviews')]
+
+        with db.engine.begin() as conn:
+            # 1. Add the overall_rating column to reviews
+            if 'overall_rating' not in columns:
+                conn.execute(text("ALTER TABLE reviews ADD COLUMN overall_rating FLOAT"))
+                print("Added overall_rating column to reviews table")
+            else:
+                print("overall_rating column already exists in reviews table")
+
+            # 2. Backfill overall_rating for existing reviews, using the same formula as
+            #    Review.calculate_overall_rating(): (total points / (parameters x 5)) x 5
+            result = conn.execute(text("""
+                UPDATE reviews SET overall_rating = (
+                    (punctuality + attitude + hygiene + reliability + communication
+                     + COALESCE((SELECT SUM(rating) FROM review_task_ratings WHERE review_id = reviews.id), 0))
+                    / ((5 + (SELECT COUNT(*) FROM review_task_ratings WHERE review_id = reviews.id)) * 5.0)
+                ) * 5
+                WHERE overall_rating IS NULL
+            """))
+            print(f"Backfilled overall_rating for {result.rowcount} reviews")
+
+        # 3. Create the helper_rating_stats table and fill it from existing reviews
+        HelperRatingStats.__table__.create(db.engine, checkfirst=True)
+        helper_count = HelperRatingStats.rebuild()
+        db.session.commit()
+        print(f"Rebuilt rating totals for {helper_count} helpers")
+
+if __name__ == "__main__":
+    upgrade()
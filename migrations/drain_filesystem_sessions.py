@@ -0,0 +1,62 @@
+import os
+import sys
+import shutil
+import struct
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+
+def drain(remove_all=False):
+    """
+    Drain the old Flask-Session filesystem directory after switching to session_store.py.
+
+    Live sessions are moved to the new backend when their owner next makes a request; file
+    names are hashes of the session id, so they cannot be moved ahead of time. This deletes
+    every expired file (or every file with --all) and removes the directory once it is
+    empty, which also turns off the per-request fallback lookup on the next restart.
+    """
+    session_dir = app.config.get('SESSION_LEGACY_FILE_DIR')
+    if not session_dir or not os.path.isdir(session_dir):
+        print("No filesystem session directory to drain")
+        return
+
+    now = time.time()
+    removed = kept = freed = 0
+    for name in os.listdir(session_dir):
+        path = os.path.join(session_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                # cachelib stores the expiry timestamp in the first four bytes
+                expires = struct.unpack("I", f.read(4))[0]
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            continue
+        except (OSError, struct.error):
+            expires, size = 0, 0
+
+        # Sessions are always written with an expiry; 0 marks cachelib's own count file.
+        # Names ending in .__wz_cache are writes that never completed.
+        if remove_all or expires < now or name.endswith('.__wz_cache'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+        else:
+            kept += 1
+
+    print(f"Removed {removed} session files ({freed / 1024:.1f} KB), {kept} still live")
+
+    if not kept:
+        shutil.rmtree(session_dir, ignore_errors=True)
+        print(f"Removed {session_dir}")
+    else:
+        lifetime = app.permanent_session_lifetime
+        print(f"Run again after {lifetime} has passed, or with --all to log the remaining users out")
+
+if __name__ == "__main__":
+    drain(remove_all='--all' in sys.argv[1:])
@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extensions import db
+from app import script_app as app
+from photo_store import store_photo, move_legacy_photos
+from sqlalchemy import text, inspect
+
+BATCH_SIZE = 200
+
+def move_photos(table, batch_size=BATCH_SIZE):
+    """Move base64 photos from one table into the photo store, batch by batch. Returns rows moved."""
+    moved = 0
+    last_id = 0
+    while True:
+        # Keyset over id, reading only this batch's photos into memory
+        with db.engine.connect() as conn:
+            rows = conn.execute(text(f"""
+                SELECT id, aadhaar_photo FROM {table}
+                WHERE id > :last_id AND aadhaar_photo IS NOT NULL AND aadhaar_photo != ''
+                ORDER BY id LIMIT :batch_size
+            """), {'last_id': last_id, 'batch_size': batch_size}).all()
+        if not rows:
+            return moved
+
+        updates = [{'id': row.id, 'photo_hash': store_photo(row.aadhaar_photo)} for row in rows]
+        # Rows with undecodable photos are cleared too; they could never be displayed
+        with db.engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE {table} SET aadhaar_photo_hash = :photo_hash, aadhaar_photo = NULL WHERE id = :id
+            """), updates)
+
+        moved += len(rows)
+        last_id = rows[-1].id
+        print(f"{table}: moved {moved} photos (up to id {last_id})")
+
+def upgrade():
+    """
+    Add aadhaar_photo_hash columns and move base64 Aadhaar photos into the photo store
+    """
+    with app.app_context():
+        # Photos stored under static/uploads by earlier versions were publicly reachable
+        moved = move_legacy_photos()
+        print(f"Moved {moved} photo files out of the upload folder")
+
+        inspector = inspect(db.engine)
+
+        for table in ('owner_profiles', 'helper_profiles'):
+            columns = [column['name'] for column in inspector.get_columns(table)]
+            if 'aadhaar_photo_hash' not in columns:
+                with db.engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN aadhaar_photo_hash VARCHAR(64)"))
+                print(f"Added aadhaar_photo_hash column to {table} table")
+            else:
+                print(f"aadhaar_photo_hash column already exists in {table} table")
+
+            moved = move_photos(table)
+            print(f"Moved {moved} photos out of {table}")
+
+if __name__ == "__main__":
+    upgrade()
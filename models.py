@@ -1,5 +1,8 @@
 import datetime
+from flask import url_for
 from flask_login import UserMixin
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from extensions import db, login_manager
 
 # Define the user loader function
@@ -44,7 +47,8 @@ class OwnerProfile(db.Model):
     aadhaar_gender = db.Column(db.String(10), nullable=True)  # Gender as per Aadhaar
     aadhaar_dob = db.Column(db.String(20), nullable=True)  # DOB as per Aadhaar
     aadhaar_address = db.Column(db.Text, nullable=True)  # Complete address as per Aadhaar
-    aadhaar_photo = db.Column(db.Text, nullable=True)  # Base64 encoded photo from Aadhaar
+    aadhaar_photo = db.deferred(db.Column(db.Text, nullable=True))  # Legacy base64 photo, emptied by migrations/move_aadhaar_photos.py
+    aadhaar_photo_hash = db.Column(db.String(64), nullable=True)  # Photo in the photo_store.py blob store
     
     # Detailed address components from Aadhaar
     address_house = db.Column(db.String(100), nullable=True)  # House number/name
@@ -67,9 +71,23 @@ class OwnerProfile(db.Model):
     apartment_number = db.Column(db.String(20), nullable=False)
     verification_status = db.Column(db.String(20), default='Pending')  # Pending, Verified, Rejected
     
+    __table_args__ = (
+        db.Index('ix_owner_profiles_owner_id', 'owner_id'),
+        db.Index('ix_owner_profiles_aadhaar_id', 'aadhaar_id'),
+        # Admin verification queue: pending profiles in id order
+        db.Index('ix_owner_profiles_status_id', 'verification_status', 'id'),
+    )
+    
     # Relationships
     documents = db.relationship('OwnerDocument', backref='owner_profile', lazy=True)
     
+    @property
+    def aadhaar_photo_url(self):
+        """URL of the Aadhaar photo served from the photo store, or None."""
+        if not self.aadhaar_photo_hash:
+            return None
+        return url_for('aadhaar_photo', photo_hash=self.aadhaar_photo_hash)
+    
     def __repr__(self):
         return f'<OwnerProfile {self.owner_id}>'
 
@@ -84,6 +102,25 @@ class OwnerDocument(db.Model):
     def __repr__(self):
         return f'<OwnerDocument {self.type}>'
 
+# Languages each helper speaks. HelperProfile.languages keeps the display string; language
+# filters go through the (language_id, helper_profile_id) index instead of LIKE scans.
+helper_languages = db.Table(
+    'helper_languages',
+    db.Column('helper_profile_id', db.Integer, db.ForeignKey('helper_profiles.id'), primary_key=True),
+    db.Column('language_id', db.Integer, db.ForeignKey('languages.id'), primary_key=True),
+    db.Index('ix_helper_languages_language_id', 'language_id', 'helper_profile_id'),
+)
+
+def join_within_length(values, max_length, separator=','):
+    """Join values with separator, stopping at the last whole value that fits in max_length."""
+    joined = ''
+    for value in values:
+        candidate = f"{joined}{separator}{value}" if joined else str(value)
+        if len(candidate) > max_length:
+            break
+        joined = candidate
+    return joined
+
 class HelperProfile(db.Model):
     __tablename__ = 'helper_profiles'
     
@@ -92,11 +129,11 @@ class HelperProfile(db.Model):
     helper_type = db.Column(db.String(20), nullable=False)  # 'maid' or 'driver'
     name = db.Column(db.String(100), nullable=False)
     phone_number = db.Column(db.String(15), nullable=False)
-    languages = db.Column(db.String(200))  # Comma-separated list of languages
+    languages = db.Column(db.String(200))  # Display list of languages; helper_languages is authoritative
     photo_url = db.Column(db.String(200))
     gender = db.Column(db.String(10))  # Add gender column
     state = db.Column(db.String(50))
-    city = db.Column(db.String(50))
+    city = db.Column(db.String(50), index=True)  # Indexed for per-city analytics
     society = db.Column(db.String(100))
     street = db.Column(db.String(100))
     apartment_number = db.Column(db.String(50))
@@ -109,7 +146,8 @@ class HelperProfile(db.Model):
     aadhaar_verified_at = db.Column(db.DateTime)
     aadhaar_dob = db.Column(db.String(20))
     aadhaar_address = db.Column(db.Text)
-    aadhaar_photo = db.Column(db.Text)  # Base64 encoded photo
+    aadhaar_photo = db.deferred(db.Column(db.Text))  # Legacy base64 photo, emptied by migrations/move_aadhaar_photos.py
+    aadhaar_photo_hash = db.Column(db.String(64))  # Photo in the photo_store.py blob store
     care_of = db.Column(db.String(100))  # Added care_of field
     
     # Detailed address components
@@ -135,6 +173,8 @@ class HelperProfile(db.Model):
     # New relationships for multi-owner support
     owner_associations = db.relationship('OwnerHelperAssociation', backref='helper_profile', lazy=True)
     verification_logs = db.relationship('HelperVerificationLog', backref='helper_profile', lazy=True)
+    spoken_languages = db.relationship('Language', secondary=helper_languages, order_by='Language.name', lazy=True,
+                                       backref=db.backref('helpers', lazy='dynamic'))
     
     # Get primary owner
     @property
@@ -167,6 +207,26 @@ class HelperProfile(db.Model):
         self.has_police_verification = has_police_verification
         self.verification_status = verification_status
     
+    def set_languages(self, language_ids):
+        """Set spoken languages from Language IDs (ints or strings) and refresh the display string."""
+        ids = {int(language_id) for language_id in language_ids if str(language_id).strip().isdigit()}
+        self.spoken_languages = Language.query.filter(Language.id.in_(ids)).order_by(Language.name).all() if ids else []
+        names = [language.name for language in self.spoken_languages]
+        self.languages = join_within_length(names, 200, separator=', ') if names else 'Not specified'
+    
+    @classmethod
+    def speaking(cls, language_id):
+        """Query of helpers who speak the given language, through the helper_languages index."""
+        return cls.query.join(helper_languages, helper_languages.c.helper_profile_id == cls.id)\
+            .filter(helper_languages.c.language_id == language_id)
+    
+    @property
+    def aadhaar_photo_url(self):
+        """URL of the Aadhaar photo served from the photo store, or None."""
+        if not self.aadhaar_photo_hash:
+            return None
+        return url_for('aadhaar_photo', photo_hash=self.aadhaar_photo_hash)
+    
     def __repr__(self):
         return f'<HelperProfile {self.helper_id}>'
 
@@ -199,6 +259,19 @@ class TaskList(db.Model):
     def __repr__(self):
         return f'<TaskList {self.name}>'
 
+# Tasks included in each contract. Replaces the comma-separated Contract.tasks string; the
+# (task_id, contract_id) index answers "which contracts include task X" without a scan.
+contract_tasks = db.Table(
+    'contract_tasks',
+    db.Column('contract_id', db.Integer, db.ForeignKey('contracts.id'), primary_key=True),
+    db.Column('task_id', db.Integer, db.ForeignKey('task_list.id'), primary_key=True),
+    db.Index('ix_contract_tasks_task_id', 'task_id', 'contract_id'),
+)
+
+def legacy_task_string(task_ids, max_length=255):
+    """Comma-separated task IDs for the old Contract.tasks column, cut at a whole ID to fit it."""
+    return join_within_length(task_ids, max_length)
+
 class Contract(db.Model):
     __tablename__ = 'contracts'
     
@@ -206,7 +279,7 @@ class Contract(db.Model):
     contract_id = db.Column(db.String(50), unique=True, nullable=False)
     helper_profile_id = db.Column(db.Integer, db.ForeignKey('helper_profiles.id'), nullable=False)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    tasks = db.Column(db.String(255), nullable=False)  # Comma-separated task IDs
+    tasks = db.Column(db.String(255), nullable=False)  # Legacy comma-separated task IDs; contract_tasks is authoritative
     is_full_time = db.Column(db.Boolean, default=False)
     working_hours_from = db.Column(db.String(10), nullable=True)
     working_hours_to = db.Column(db.String(10), nullable=True)
@@ -217,8 +290,35 @@ class Contract(db.Model):
     termination_reason = db.Column(db.Text, nullable=True)  # Reason for contract termination
     is_terminated = db.Column(db.Boolean, default=False)  # Flag to track terminated contracts
     
+    __table_args__ = (
+        # Owner dashboard: an owner's contracts, newest first
+        db.Index('ix_contracts_owner_created', 'owner_id', 'created_at'),
+    )
+    
     # Relationship
     owner = db.relationship('User', backref='contracts')
+    # Loaded with one SELECT joining contract_tasks to task_list
+    task_items = db.relationship('TaskList', secondary=contract_tasks, order_by='TaskList.id', lazy=True,
+                                 backref=db.backref('contracts', lazy='dynamic'))
+    
+    def set_tasks(self, task_ids):
+        """Set the contract's tasks from TaskList IDs (ints or strings); unknown IDs are ignored."""
+        ids = sorted({int(task_id) for task_id in task_ids if str(task_id).strip().isdigit()})
+        self.task_items = TaskList.query.filter(TaskList.id.in_(ids)).order_by(TaskList.id).all() if ids else []
+        self.tasks = legacy_task_string(task.id for task in self.task_items)
+
+    def task_ids(self):
+        """IDs of the contract's tasks, read from contract_tasks alone (see task_catalog.py for the tasks)."""
+        if 'task_items' in self.__dict__:
+            return [task.id for task in self.task_items]
+        return [task_id for task_id, in db.session.query(contract_tasks.c.task_id)
+                .filter(contract_tasks.c.contract_id == self.id).order_by(contract_tasks.c.task_id)]
+
+    @classmethod
+    def including_task(cls, task_id):
+        """Query of contracts that include the given task, through the contract_tasks index."""
+        return cls.query.join(contract_tasks, contract_tasks.c.contract_id == cls.id)\
+            .filter(contract_tasks.c.task_id == task_id)
     
     def __repr__(self):
         return f'<Contract {self.contract_id}>'
@@ -237,16 +337,24 @@ class Review(db.Model):
     reliability = db.Column(db.Float, nullable=False)  # Changed to Float to match DB
     communication = db.Column(db.Float, nullable=False, default=3.0)  # Updated to not nullable with default
     tasks_average = db.Column(db.Float, nullable=False, default=3.0)
+    overall_rating = db.Column(db.Float, nullable=True)  # Stored on submission, see calculate_overall_rating()
     additional_feedback = db.Column(db.Text, nullable=True)
     comments = db.Column(db.Text, nullable=True)  # Added to match DB
     review_date = db.Column(db.Date, nullable=False, default=datetime.date.today)
     timestamp = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
+    __table_args__ = (
+        # Helper pages: a helper's reviews, newest first
+        db.Index('ix_reviews_helper_timestamp', 'helper_profile_id', 'timestamp'),
+        # submit_review limits: 4 per contract per month, one per helper per day
+        db.Index('ix_reviews_owner_contract_date', 'owner_id', 'contract_id', 'review_date'),
+        db.Index('ix_reviews_owner_helper_date', 'owner_id', 'helper_profile_id', 'review_date'),
+    )
+    
     # Relationships
     task_ratings = db.relationship('ReviewTaskRating', backref='review', lazy=True, cascade="all, delete-orphan")
     
-    @property
-    def overall_rating(self):
+    def calculate_overall_rating(self):
         """Calculate the overall rating across all rated areas"""
         # Count the total number of parameters
         parameter_count = 5  # Core values (punctuality, attitude, hygiene, reliability, communication)
@@ -282,9 +390,91 @@ class ReviewTaskRating(db.Model):
     # Relationship to task
     task = db.relationship('TaskList')
     
+    __table_args__ = (
+        # Per-task aggregates read ratings by task, then join to the review
+        db.Index('ix_review_task_ratings_task_review', 'task_id', 'review_id'),
+    )
+    
     def __repr__(self):
         return f'<ReviewTaskRating review_id={self.review_id}, task_id={self.task_id}, rating={self.rating}>'
 
+class HelperRatingStats(db.Model):
+    """
+    Running rating totals per helper, updated in the same transaction as each new review.
+    Lets pages read a helper's averages without scanning all of their reviews.
+    """
+    __tablename__ = 'helper_rating_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    helper_profile_id = db.Column(db.Integer, db.ForeignKey('helper_profiles.id'), unique=True, nullable=False)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    punctuality_sum = db.Column(db.Float, nullable=False, default=0.0)
+    attitude_sum = db.Column(db.Float, nullable=False, default=0.0)
+    hygiene_sum = db.Column(db.Float, nullable=False, default=0.0)
+    reliability_sum = db.Column(db.Float, nullable=False, default=0.0)
+    communication_sum = db.Column(db.Float, nullable=False, default=0.0)
+    overall_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    helper_profile = db.relationship('HelperProfile', backref=db.backref('rating_stats', uselist=False))
+    
+    CORE_VALUES = ('punctuality', 'attitude', 'hygiene', 'reliability', 'communication')
+    
+    @classmethod
+    def record_review(cls, review):
+        """
+        Add a review to its helper's totals. Does not commit; call inside the review's transaction.
+        One INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT on SQLite/PostgreSQL) creates the row or
+        adds to it, so concurrent reviews for one helper, even their first two, neither fail on the
+        unique helper_profile_id nor lose updates.
+        """
+        now = datetime.datetime.utcnow()
+        increments = {'review_count': 1, 'overall_sum': review.overall_rating or 0.0}
+        increments.update({f'{value}_sum': getattr(review, value) for value in cls.CORE_VALUES})
+        values = dict(increments, helper_profile_id=review.helper_profile_id, updated_at=now)
+        
+        dialect = db.session.get_bind(mapper=cls).dialect.name
+        if dialect == 'mysql':
+            statement = mysql.insert(cls.__table__).values(**values)
+            statement = statement.on_duplicate_key_update(
+                updated_at=now, **{name: cls.__table__.c[name] + statement.inserted[name] for name in increments})
+        else:
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = insert(cls.__table__).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=['helper_profile_id'],
+                set_=dict(updated_at=now, **{name: cls.__table__.c[name] + statement.excluded[name] for name in increments}))
+        db.session.execute(statement)
+    
+    @classmethod
+    def rebuild(cls):
+        """Recompute every helper's totals from the reviews table. Does not commit."""
+        cls.query.delete()
+        totals = db.session.query(
+            Review.helper_profile_id,
+            func.count(Review.id),
+            *[func.sum(getattr(Review, value)) for value in cls.CORE_VALUES],
+            func.sum(func.coalesce(Review.overall_rating, 0))
+        ).group_by(Review.helper_profile_id)
+        columns = ['helper_profile_id', 'review_count'] + [f'{value}_sum' for value in cls.CORE_VALUES] + ['overall_sum']
+        rows = [dict(zip(columns, row)) for row in totals]
+        if rows:
+            db.session.execute(cls.__table__.insert(), rows)
+        return len(rows)
+    
+    def average(self, value):
+        """Average of a core value ('punctuality', ...) or 'overall' across the helper's reviews."""
+        if not self.review_count:
+            return 0
+        return getattr(self, f'{value}_sum') / self.review_count
+    
+    @property
+    def avg_overall(self):
+        return self.average('overall')
+    
+    def __repr__(self):
+        return f'<HelperRatingStats helper_profile_id={self.helper_profile_id} reviews={self.review_count}>'
+
 class CoreValue(db.Model):
     """Core values for reviewing helpers"""
     __tablename__ = 'core_competencies'
@@ -351,6 +541,11 @@ class PincodeMapping(db.Model):
     state = db.Column(db.String(50), nullable=False)
     society = db.Column(db.String(100), nullable=False)
     
+    __table_args__ = (
+        # Not unique: a pincode can cover several societies
+        db.Index('ix_pincode_mapping_pincode', 'pincode'),
+    )
+    
     def __repr__(self):
         return f'<PincodeMapping {self.pincode}>'
 
@@ -365,7 +560,10 @@ class OwnerHelperAssociation(db.Model):
     added_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
     __table_args__ = (
+        # Also serves lookups by owner_id alone
         db.UniqueConstraint('owner_id', 'helper_profile_id', name='uq_owner_helper'),
+        # Owners of a helper, primary owner first
+        db.Index('ix_owner_helper_associations_helper', 'helper_profile_id', 'is_primary_owner'),
     )
     
     def __repr__(self):
@@ -382,6 +580,10 @@ class HelperVerificationLog(db.Model):
     transaction_id = db.Column(db.String(100))
     verification_data = db.Column(db.JSON)
     
+    __table_args__ = (
+        db.Index('ix_helper_verification_logs_helper_time', 'helper_profile_id', 'verification_timestamp'),
+    )
+    
     # Relationship to the user who performed verification
     verifier = db.relationship('User', backref='verification_logs')
     
@@ -404,5 +606,37 @@ class AadhaarAPILog(db.Model):
     user_id = db.Column(db.Integer, nullable=True)  # Can be null for anonymous requests
     session_id = db.Column(db.String(100), nullable=True)  # To track related requests
     
+    __table_args__ = (
+        # Admin log list (newest first), per-type counts and related requests of one session;
+        # (request_type, success) covers the log screen's GROUP BY without reading the payloads
+        db.Index('ix_aadhaar_api_logs_created_at', 'created_at'),
+        db.Index('ix_aadhaar_api_logs_type_created', 'request_type', 'created_at'),
+        db.Index('ix_aadhaar_api_logs_type_success', 'request_type', 'success'),
+        db.Index('ix_aadhaar_api_logs_session_created', 'session_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<AadhaarAPILog {self.id} {self.request_type} success={self.success}>'
+
+class ServerSession(db.Model):
+    """Server-side Flask session, serialized with msgpack (see session_store.py)."""
+    __tablename__ = 'sessions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(255), unique=True, nullable=False)  # Key prefix + session id from the cookie
+    data = db.Column(db.LargeBinary(length=(2 ** 24) - 1), nullable=False)  # MEDIUMBLOB on MySQL
+    expiry = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<ServerSession {self.id} expires={self.expiry}>'
+
+class PlatformCounter(db.Model):
+    """Running row count for the admin dashboard, kept current by platform_counters.py."""
+    __tablename__ = 'platform_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PlatformCounter {self.name}={self.value}>'
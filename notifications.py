@@ -0,0 +1,106 @@
+"""
+Background sender for user notifications.
+
+Admin actions such as bulk verification can notify hundreds of owners at once. Rather than
+calling send_notification() inline for each of them, routes enqueue the notification and a
+daemon thread delivers it inside an application context, so a slow mail provider never
+holds up the request.
+"""
+import atexit
+import logging
+import queue
+import threading
+from flask import current_app
+from lazy_daemon import daemon_thread
+from utils import send_notification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQueue:
+    """Bounded in-memory queue of send_notification() calls drained by a daemon thread."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.queue = None
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._worker = daemon_thread(self._run, 'notification-queue', before_start=self._stopping.clear)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.queue = queue.Queue(maxsize=app.config.get('NOTIFICATION_QUEUE_SIZE', 10000))
+        app.extensions['notification_queue'] = self
+        atexit.register(self.shutdown)
+
+    def enqueue(self, to_email, subject, message):
+        """Queue one notification. Never blocks; drops it (and logs) if the queue is full."""
+        if self.app is None:
+            self.init_app(current_app._get_current_object())
+        try:
+            self.queue.put_nowait({'to_email': to_email, 'subject': subject, 'message': message})
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Notification queue full, dropped '{subject}' to {to_email}")
+            return False
+        self._worker.ensure()
+        return True
+
+    def _send(self, notification):
+        try:
+            with self.app.app_context():
+                sent = send_notification(**notification)
+            with self._lock:
+                if sent:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            logger.exception(f"Failed to send '{notification['subject']}' to {notification['to_email']}")
+        finally:
+            self.queue.task_done()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self.queue.empty()):
+            try:
+                notification = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            self._send(notification)
+
+    def flush(self, timeout=None):
+        """Block until every queued notification has been handled. Returns False on timeout."""
+        if self.queue is None:
+            return True
+        if self.queue.unfinished_tasks:
+            self._worker.ensure()
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(lambda: not self.queue.unfinished_tasks, timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Deliver pending notifications and stop the worker. Registered with atexit."""
+        flushed = self.flush(timeout)
+        self._stopping.set()
+        self._worker.join(timeout=2.0)
+        if not flushed:
+            logger.warning(f"Notification queue stopped with {self.queue.qsize()} notifications unsent")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'queued': self.queue.qsize() if self.queue is not None else 0,
+            }
+
+
+notification_queue = NotificationQueue()
@@ -0,0 +1,138 @@
+"""
+Per-owner cache of the rendered helper cards on the owner dashboard.
+
+Building the cards costs two queries (the page of helpers joined through
+owner_helper_associations, and the owner's helper count) plus rendering one card per
+helper, which adds up for agency owners with hundreds of helpers. The rendered HTML is
+kept per (owner, page) in an LRU bounded by OWNER_DASHBOARD_CACHE_MAX_ENTRIES, for
+OWNER_DASHBOARD_CACHE_TTL seconds.
+
+Mapper events note which owners' associations, contracts and reviews changed during a
+transaction, and their cached cards are dropped when it commits. Any change to a helper
+profile (name, photo, verification status) drops every cached card, since a helper can
+belong to many owners. Other workers see changes when their entries expire.
+
+Invalidating an owner bumps that owner's generation, which is part of the cache key. The
+generations are kept for at most as many owners as the cache has entries; when the least
+recently invalidated owner is dropped, every owner without a tracked generation moves up
+to its generation, so no key is ever reused and the dropped owner's old entries stay
+unreachable.
+"""
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from models import HelperProfile, Contract, Review, OwnerHelperAssociation
+from session_store import LRUSessionStore
+
+# Models whose rows carry the owner_id of the dashboard they affect
+OWNED_MODELS = (OwnerHelperAssociation, Contract, Review)
+
+
+class OwnerDashboardCache:
+
+    def __init__(self, app=None):
+        self.ttl = 60
+        self.store = LRUSessionStore(5000)
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._owner_generations = OrderedDict()  # Recently invalidated owners, oldest first
+        self._owner_generation_floor = 0  # Generation of every owner not in _owner_generations
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['owner_dashboard_cache'] = self
+        self.ttl = app.config.get('OWNER_DASHBOARD_CACHE_TTL', 60)
+        self.store = LRUSessionStore(app.config.get('OWNER_DASHBOARD_CACHE_MAX_ENTRIES', 5000))
+
+    def _owner_generation(self, owner_id):
+        # Never below the floor, so an owner's generation only goes up. Call with _lock held.
+        return max(self._owner_generations.get(owner_id, 0), self._owner_generation_floor)
+
+    def _key(self, owner_id, page):
+        # Invalidation bumps a generation instead of finding every page of an owner; the
+        # entries under the old key are never read again and age out of the LRU
+        with self._lock:
+            return (self._generation, owner_id, self._owner_generation(owner_id), page)
+
+    def cards(self, owner_id, page, render):
+        """
+        The cards for one page of an owner's helpers: cached, or from render() and then cached.
+        The key is taken before rendering, so cards rendered while the owner's data changed
+        are stored under the old generation and never served.
+        """
+        if not self.ttl:
+            return render()
+        key = self._key(owner_id, page)
+        cards = self.store.get(key)
+        with self._lock:
+            if cards is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if cards is None:
+            cards = render()
+            self.store.set(key, cards, self.ttl)
+        return cards
+
+    def invalidate(self, owner_ids):
+        """Drop the cached cards of the given owners."""
+        with self._lock:
+            for owner_id in owner_ids:
+                generation = self._owner_generation(owner_id) + 1
+                self._owner_generations.pop(owner_id, None)
+                self._owner_generations[owner_id] = generation
+            while len(self._owner_generations) > self.store.max_entries:
+                _, generation = self._owner_generations.popitem(last=False)
+                self._owner_generation_floor = max(self._owner_generation_floor, generation)
+
+    def clear(self):
+        """Drop every owner's cached cards."""
+        with self._lock:
+            self._generation += 1
+            self._owner_generations.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self.store), 'hits': self.hits, 'misses': self.misses,
+                    'evicted': self.store.evicted, 'tracked_owners': len(self._owner_generations)}
+
+
+owner_dashboard_cache = OwnerDashboardCache()
+
+
+def _owner_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.owner_id is not None:
+        session.info.setdefault('owner_dashboard_owners', set()).add(target.owner_id)
+
+
+def _helper_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['owner_dashboard_clear'] = True
+
+
+def _after_commit(session):
+    owners = session.info.pop('owner_dashboard_owners', None)
+    if session.info.pop('owner_dashboard_clear', False):
+        owner_dashboard_cache.clear()
+    elif owners:
+        owner_dashboard_cache.invalidate(owners)
+
+
+def _after_rollback(session):
+    session.info.pop('owner_dashboard_owners', None)
+    session.info.pop('owner_dashboard_clear', None)
+
+
+for _model in OWNED_MODELS:
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _owner_changed)
+event.listen(HelperProfile, 'after_update', _helper_changed)
+event.listen(HelperProfile, 'after_delete', _helper_changed)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_rollback', _after_rollback)
@@ -0,0 +1,131 @@
+"""
+Content-addressed store for Aadhaar photos.
+
+The Sandbox API returns the holder's photo as a base64 string, which used to be copied into
+OwnerProfile/HelperProfile TEXT columns, the Flask session and the API log. Photos are now
+decoded once and written under <photo root>/<aa>/<bb>/<sha256>; rows, the session and logs
+keep only the 64-character hash. Identical photos share one file, and a file never changes
+once written, so it can be served with immutable caching headers.
+
+The photo root is AADHAAR_PHOTO_FOLDER, by default <instance folder>/aadhaar_photos. It must
+stay outside static/, which Flask serves to anyone: photos are only served by the
+aadhaar_photo route, and only to admins, the owner whose profile holds the photo, owners
+associated with the helper who holds it and the registrant who has just verified it. Photos
+stored by earlier versions under UPLOAD_FOLDER/aadhaar_photos are moved by move_legacy_photos().
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from flask import current_app
+
+PHOTO_SUBFOLDER = 'aadhaar_photos'
+
+HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Leading bytes of the image formats the Aadhaar API returns
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+)
+
+
+def photo_root(app=None):
+    app = app or current_app
+    return app.config.get('AADHAAR_PHOTO_FOLDER') or os.path.join(app.instance_path, PHOTO_SUBFOLDER)
+
+
+def legacy_photo_root(app=None):
+    """Where photos were stored before: under UPLOAD_FOLDER, and so under static/."""
+    app = app or current_app
+    return os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], PHOTO_SUBFOLDER)
+
+
+def photo_path(photo_hash, app=None):
+    """Absolute path of a stored photo. The hash must already be validated."""
+    return os.path.join(photo_root(app), photo_hash[:2], photo_hash[2:4], photo_hash)
+
+
+def is_photo_hash(value):
+    return bool(value) and bool(HASH_PATTERN.match(value))
+
+
+def decode_photo(photo_b64):
+    """Decode a base64 photo (optionally a data: URI) to bytes, or None if it is empty or invalid."""
+    if not photo_b64:
+        return None
+    if photo_b64.startswith('data:'):
+        photo_b64 = photo_b64.partition(',')[2]
+    try:
+        return base64.b64decode(photo_b64, validate=False) or None
+    except (binascii.Error, ValueError):
+        return None
+
+
+def store_photo_bytes(data, app=None):
+    """Write photo bytes to the store if not already present and return their hash."""
+    photo_hash = hashlib.sha256(data).hexdigest()
+    path = photo_path(photo_hash, app)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename, so readers never see a partial photo
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return photo_hash
+
+
+def store_photo(photo_b64, app=None):
+    """Store a base64 photo and return its hash, or None if there is no usable photo."""
+    data = decode_photo(photo_b64)
+    if data is None:
+        return None
+    return store_photo_bytes(data, app)
+
+
+def extract_photo(aadhaar_data):
+    """
+    Replace the base64 'photo' in Aadhaar details from the API with 'photo_hash', in place.
+    Returns the same dict so it can be logged or kept in the session without the image.
+    """
+    if isinstance(aadhaar_data, dict) and 'photo' in aadhaar_data:
+        aadhaar_data['photo_hash'] = store_photo(aadhaar_data.pop('photo'))
+    return aadhaar_data
+
+
+def move_legacy_photos(app=None):
+    """Move photos from the old folder under UPLOAD_FOLDER into the photo root. Returns files moved."""
+    source, target = legacy_photo_root(app), photo_root(app)
+    if not os.path.isdir(source) or os.path.abspath(source) == os.path.abspath(target):
+        return 0
+    moved = 0
+    for directory, _, names in os.walk(source):
+        for name in names:
+            if not is_photo_hash(name):
+                continue  # Partial .tmp- files from interrupted writes
+            path = photo_path(name, app)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                shutil.move(os.path.join(directory, name), path)
+                moved += 1
+    shutil.rmtree(source)
+    return moved
+
+
+def photo_mimetype(path):
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    return 'application/octet-stream'
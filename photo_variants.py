@@ -0,0 +1,205 @@
+"""
+Resized variants of helper photos.
+
+Helper photos are stored at camera resolution, but pages show them as 40-150px avatars.
+uploaded_file serves a smaller copy when asked for one with ?size=:
+
+    /uploads/helper_photos/9e/9e50...f4.jpg?size=thumb
+
+Each size in VARIANT_SIZES is produced once per photo and format, WebP for browsers that
+accept it and JPEG for the rest, and kept under UPLOAD_FOLDER/variants/<size>/. A variant
+older than its photo is made again. Resizing runs on a pool of PHOTO_VARIANT_WORKERS
+threads: create_helper queues every variant of a new photo, and a request for a variant
+that does not exist yet queues it and waits up to PHOTO_VARIANT_WAIT seconds, after which
+the original is served instead. Several requests for the same missing variant share one
+job.
+
+Pillow is needed to resize; without it the originals are always served.
+"""
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app, url_for
+from werkzeug.security import safe_join
+from lazy_daemon import LazyDaemon
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is a regular dependency
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Size name -> (width, height, crop). Cropped sizes fill the box; the others fit inside it.
+VARIANT_SIZES = {
+    'thumb': (160, 160, True),
+    'medium': (640, 640, False),
+}
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+VARIANT_FOLDERS = ('helper_photos',)  # Subfolders of UPLOAD_FOLDER whose images have variants
+VARIANTS_SUBFOLDER = 'variants'
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def has_variants(filename):
+    """Whether an upload path (relative to UPLOAD_FOLDER) is an image that can have variants."""
+    return filename.split('/', 1)[0] in VARIANT_FOLDERS and filename.lower().endswith(SOURCE_EXTENSIONS)
+
+
+def resize(source_path, target_path, size, fmt):
+    """Write the size variant of an image to target_path, through a temporary file."""
+    width, height, crop = VARIANT_SIZES[size]
+    pil_format, mimetype, options = FORMATS[fmt]
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)  # Phone photos are often stored sideways
+        image = image.convert('RGB')
+        if crop:
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            image.thumbnail((width, height), Image.LANCZOS)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, pil_format, **options)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class PhotoVariants:
+
+    def __init__(self, app=None):
+        self.app = None
+        self.workers = 2
+        self.wait = 5
+        self.generated = 0
+        self.failed = 0
+        self.timed_out = 0
+        self._executor = LazyDaemon(
+            lambda: ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='photo-variants'),
+            is_alive=lambda executor: True)
+        self._jobs = {}  # Target path -> Future of the job writing it
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['photo_variants'] = self
+        self.app = app
+        self.workers = app.config.get('PHOTO_VARIANT_WORKERS', 2)
+        self.wait = app.config.get('PHOTO_VARIANT_WAIT', 5)
+        app.jinja_env.filters['photo_variant'] = photo_variant_url
+
+    @property
+    def enabled(self):
+        return Image is not None and bool(self.workers)
+
+    def _upload_root(self):
+        return os.path.join(self.app.root_path, self.app.config['UPLOAD_FOLDER'])
+
+    def variant_path(self, filename, size, fmt):
+        """Where the variant of an upload path is kept, or None if the path is not safe."""
+        return safe_join(self._upload_root(), VARIANTS_SUBFOLDER, size, f"{filename}.{fmt}")
+
+    def _submit(self, source_path, target_path, size, fmt):
+        with self._lock:
+            job = self._jobs.get(target_path)
+            if job is not None:
+                return job
+            self._executor.ensure()
+            job = self._jobs[target_path] = self._executor.current.submit(self._run, source_path, target_path, size, fmt)
+            return job
+
+    def _run(self, source_path, target_path, size, fmt):
+        try:
+            resize(source_path, target_path, size, fmt)
+            with self._lock:
+                self.generated += 1
+            return target_path
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            logger.exception(f"Could not make the {size} {fmt} variant of {source_path}")
+            return None
+        finally:
+            with self._lock:
+                self._jobs.pop(target_path, None)
+
+    def _fresh(self, source_path, target_path):
+        try:
+            return os.stat(target_path).st_mtime >= os.stat(source_path).st_mtime
+        except FileNotFoundError:
+            return False
+
+    def get(self, filename, size, fmt):
+        """
+        Absolute path of an up-to-date variant of an upload, made on the worker pool if
+        needed. None means serve the original: no such photo or size, Pillow is missing,
+        resizing failed, or it took longer than PHOTO_VARIANT_WAIT seconds.
+        """
+        if size not in VARIANT_SIZES or fmt not in FORMATS or not self.enabled or not has_variants(filename):
+            return None
+        source_path = safe_join(self._upload_root(), filename)
+        target_path = self.variant_path(filename, size, fmt)
+        if not source_path or not target_path or not os.path.isfile(source_path):
+            return None
+        if self._fresh(source_path, target_path):
+            return target_path
+        try:
+            return self._submit(source_path, target_path, size, fmt).result(timeout=self.wait)
+        except TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            return None
+
+    def generate(self, photo_url):
+        """Queue every variant of a newly uploaded photo, given its /uploads/ URL. Does not wait."""
+        filename = upload_filename(photo_url)
+        if not filename or not self.enabled or not has_variants(filename):
+            return
+        source_path = safe_join(self._upload_root(), filename)
+        if not source_path or not os.path.isfile(source_path):
+            return
+        for size in VARIANT_SIZES:
+            for fmt in FORMATS:
+                target_path = self.variant_path(filename, size, fmt)
+                if not self._fresh(source_path, target_path):
+                    self._submit(source_path, target_path, size, fmt)
+
+    def stats(self):
+        with self._lock:
+            return {'enabled': self.enabled, 'generated': self.generated, 'failed': self.failed,
+                    'timed_out': self.timed_out, 'pending': len(self._jobs)}
+
+
+photo_variants = PhotoVariants()
+
+
+def upload_filename(photo_url):
+    """The path under UPLOAD_FOLDER of a photo URL (/uploads/... or /static/uploads/...), or None."""
+    if not photo_url:
+        return None
+    upload_folder = current_app.config['UPLOAD_FOLDER'].strip('/')
+    for prefix in ('/uploads/', f"/{upload_folder}/"):
+        if photo_url.startswith(prefix):
+            return photo_url[len(prefix):]
+    return None
+
+
+def photo_variant_url(photo_url, size):
+    """Jinja filter: the URL of a size variant of an uploaded photo, or the URL unchanged."""
+    filename = upload_filename(photo_url)
+    if not filename or not has_variants(filename):
+        return photo_url
+    return url_for('uploaded_file', filename=filename, size=size)
@@ -0,0 +1,138 @@
+"""
+In-process pincode index.
+
+pincode_mapping is small, read-mostly and only changes through the admin pincode screens,
+so each worker keeps the whole table in memory: a dict for exact lookups and a sorted list
+of pincodes for prefix lookups. The admin routes call invalidate() after writing. Other
+workers' changes are noticed at most PINCODE_INDEX_CHECK_INTERVAL seconds later (see
+table_snapshot.py).
+
+search() backs the admin pincode search. Every row is reachable through sorted
+(key, position) arrays: one keyed by pincode, one keyed by the lowercased city and society
+names and each of their words. A prefix query is a bisect into each array followed by a
+walk over the matching range, so it only touches offset + limit entries.
+"""
+import bisect
+import itertools
+import re
+from extensions import db
+from models import PincodeMapping
+from table_snapshot import TableSnapshot
+
+NAME_SEPARATORS = re.compile(r'[\s,/()-]+')
+
+
+class PincodeIndex(TableSnapshot):
+
+    model = PincodeMapping
+    check_interval_setting = 'PINCODE_INDEX_CHECK_INTERVAL'
+    default_check_interval = 30
+
+    def __init__(self):
+        super().__init__()
+        self._rows = []
+        self._by_pincode = {}
+        self._sorted_pincodes = []
+        self._pincode_keys = []
+        self._name_keys = []
+
+    def _rebuild(self):
+        rows = db.session.query(
+            PincodeMapping.id, PincodeMapping.pincode, PincodeMapping.city,
+            PincodeMapping.state, PincodeMapping.society
+        ).order_by(PincodeMapping.id).all()
+
+        mappings = []
+        by_pincode = {}
+        pincode_keys = []
+        name_keys = []
+        keys_for_name = {}  # City names repeat across thousands of rows
+        for position, row in enumerate(rows):
+            mapping = {
+                'id': row.id,
+                'pincode': row.pincode,
+                'state': row.state,
+                'city': row.city,
+                'society': row.society,
+            }
+            mappings.append(mapping)
+            # Keep the first mapping per pincode, as the old .first() lookup did
+            by_pincode.setdefault(row.pincode, mapping)
+            pincode_keys.append((row.pincode, position))
+            for name in (row.city, row.society):
+                if name not in keys_for_name:
+                    keys_for_name[name] = _name_keys(name)
+            for key in set(keys_for_name[row.city]).union(keys_for_name[row.society]):
+                name_keys.append((key, position))
+
+        pincode_keys.sort()
+        name_keys.sort()
+        self._rows = mappings
+        self._by_pincode = by_pincode
+        self._sorted_pincodes = sorted(by_pincode)
+        self._pincode_keys = pincode_keys
+        self._name_keys = name_keys
+
+    def get(self, pincode):
+        """Return the mapping dict for an exact pincode, or None."""
+        self._ensure_fresh()
+        return self._by_pincode.get(pincode)
+
+    def with_prefix(self, prefix, limit=10, offset=0):
+        """Return mapping dicts whose pincode starts with prefix, in pincode order."""
+        self._ensure_fresh()
+        pincodes = self._sorted_pincodes
+        start = bisect.bisect_left(pincodes, prefix) + offset
+        results = []
+        for pincode in pincodes[start:start + limit]:
+            if not pincode.startswith(prefix):
+                break
+            results.append(self._by_pincode[pincode])
+        return results
+
+    def _prefix_positions(self, keys, prefix):
+        """Yield row positions whose key starts with prefix, in key order."""
+        for i in range(bisect.bisect_left(keys, (prefix,)), len(keys)):
+            key, position = keys[i]
+            if not key.startswith(prefix):
+                return
+            yield position
+
+    def search(self, term, limit=20, offset=0):
+        """
+        Return (mappings, has_more) for rows whose pincode starts with term, followed by rows
+        whose city or society (or a word in them) starts with it, case-insensitively.
+        """
+        self._ensure_fresh()
+        term = ' '.join(term.lower().split())
+        if not term:
+            return [], False
+
+        seen = set()
+        positions = []
+        candidates = itertools.chain(
+            self._prefix_positions(self._pincode_keys, term),
+            self._prefix_positions(self._name_keys, term)
+        )
+        # One extra match tells the caller whether there is another page
+        for position in candidates:
+            if position in seen:
+                continue
+            seen.add(position)
+            positions.append(position)
+            if len(positions) > offset + limit:
+                break
+
+        page = positions[offset:offset + limit]
+        return [self._rows[position] for position in page], len(positions) > offset + limit
+
+
+def _name_keys(name):
+    """Search keys for a city or society name: the whole normalised name plus each word."""
+    name = ' '.join((name or '').lower().split())
+    if not name:
+        return []
+    return [name] + [word for word in NAME_SEPARATORS.split(name) if word]
+
+
+pincode_index = PincodeIndex()
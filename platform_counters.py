@@ -0,0 +1,405 @@
+"""
+Row counts and recent-activity lists for the admin dashboard.
+
+COUNT(*) on InnoDB scans an index, so the dashboard instead reads running totals from
+the platform_counters table, all in one query:
+
+- Mapper events on the counted models add up inserts and deletes (and owner verification
+  status changes) in the session, and once the transaction commits the changed counters
+  are updated in a short transaction of their own. The shared counter rows are therefore
+  never locked for the length of a writer's transaction, and a rolled back insert never
+  counts. init_app() registers the events, so scripts that only use create_script_app()
+  leave the counters to reconcile().
+- Raw SQL and bulk query.update()/query.delete() calls bypass mapper events; routes that
+  change counted rows that way call adjust() themselves, and reconcile() catches the rest.
+- reconcile() recomputes every counter with COUNT(*), logs any drift and upserts the
+  rows. It runs on a background thread every PLATFORM_COUNTERS_RECONCILE_INTERVAL
+  seconds, from `flask reconcile-counters`, and on the next values() after a counter row
+  was missing or a counter update failed.
+
+The "recent" lists come from a small ring buffer per kind in each worker. Rows committed
+in this worker are pushed to the front at commit time. A buffer is reloaded from the
+database on first use and every PLATFORM_RECENT_REFRESH_INTERVAL seconds, which picks up
+rows added by other workers.
+"""
+import datetime
+import logging
+import threading
+import time
+from collections import Counter, deque
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import NO_VALUE, object_session
+from sqlalchemy.orm.util import identity_key
+from extensions import db
+from lazy_daemon import daemon_thread
+from models import User, OwnerProfile, HelperProfile, Contract, Review, IncidentReport, PlatformCounter
+
+logger = logging.getLogger(__name__)
+
+# Counter name -> model whose rows it counts
+COUNTED_MODELS = {
+    'users': User,
+    'owners': OwnerProfile,
+    'helpers': HelperProfile,
+    'contracts': Contract,
+    'reviews': Review,
+    'incidents': IncidentReport,
+}
+
+OWNER_STATUS_COUNTERS = ('pending_verifications', 'aadhaar_verified_owners', 'manually_verified_owners')
+
+COUNTER_NAMES = tuple(COUNTED_MODELS) + OWNER_STATUS_COUNTERS
+
+RECENT_SIZE = 5
+
+
+def owner_status_counters(verification_status, aadhaar_verified):
+    """Names of the verification counters an owner profile with these values belongs to."""
+    names = []
+    if verification_status == 'Pending':
+        names.append('pending_verifications')
+    if aadhaar_verified:
+        names.append('aadhaar_verified_owners')
+    elif verification_status == 'Verified':
+        names.append('manually_verified_owners')
+    return names
+
+
+def counter_queries():
+    """Counter name -> SELECT COUNT(*) statement that recomputes it."""
+    queries = {name: select(func.count()).select_from(model) for name, model in COUNTED_MODELS.items()}
+    not_aadhaar_verified = or_(OwnerProfile.aadhaar_verified == False, OwnerProfile.aadhaar_verified == None)  # noqa: E711,E712
+    queries['pending_verifications'] = select(func.count(OwnerProfile.id))\
+        .where(OwnerProfile.verification_status == 'Pending')
+    queries['aadhaar_verified_owners'] = select(func.count(OwnerProfile.id))\
+        .where(OwnerProfile.aadhaar_verified == True)  # noqa: E712
+    queries['manually_verified_owners'] = select(func.count(OwnerProfile.id))\
+        .where(OwnerProfile.verification_status == 'Verified', not_aadhaar_verified)
+    return queries
+
+
+def _helper_summary(helper):
+    return {'id': helper.id, 'helper_id': helper.helper_id, 'name': helper.name,
+            'phone_number': helper.phone_number, 'created_at': helper.created_at}
+
+
+def _review_summary(review, helper_id):
+    return {'id': review.id, 'review_id': review.review_id, 'timestamp': review.timestamp, 'helper_id': helper_id}
+
+
+def _incident_summary(incident, helper_id):
+    return {'id': incident.id, 'report_id': incident.report_id, 'timestamp': incident.timestamp, 'helper_id': helper_id}
+
+
+def _load_recent(kind, limit):
+    """The newest rows of one kind, as summaries, read from the database."""
+    if kind == 'helpers':
+        helpers = db.session.query(HelperProfile.id, HelperProfile.helper_id, HelperProfile.name,
+                                   HelperProfile.phone_number, HelperProfile.created_at)\
+            .order_by(HelperProfile.id.desc()).limit(limit).all()
+        return [_helper_summary(helper) for helper in helpers]
+    model, summary = (Review, _review_summary) if kind == 'reviews' else (IncidentReport, _incident_summary)
+    rows = db.session.query(model, HelperProfile.helper_id)\
+        .join(HelperProfile, HelperProfile.id == model.helper_profile_id)\
+        .order_by(model.id.desc()).limit(limit).all()
+    return [summary(row, helper_id) for row, helper_id in rows]
+
+
+class RecentBuffer:
+    """Newest-first ring buffer of row summaries for one kind of row."""
+
+    def __init__(self, size):
+        self.rows = deque(maxlen=size)
+        self.loaded_at = None
+
+    def push(self, summary):
+        self.remove(summary['id'])
+        self.rows.appendleft(summary)
+
+    def remove(self, row_id):
+        kept = [row for row in self.rows if row['id'] != row_id]
+        self.rows.clear()
+        self.rows.extend(kept)
+
+
+class PlatformCounters:
+
+    def __init__(self, app=None):
+        self.recent_size = RECENT_SIZE
+        self.refresh_interval = 300
+        self._buffers = {kind: RecentBuffer(self.recent_size) for kind in ('helpers', 'reviews', 'incidents')}
+        self._lock = threading.Lock()
+        self._reconciler = daemon_thread(self._reconcile_loop, 'counter-reconciler')
+        self.reconciled = 0
+        self.corrections = 0
+        self._reconcile_needed = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['platform_counters'] = self
+        self.recent_size = app.config.get('PLATFORM_RECENT_SIZE', RECENT_SIZE)
+        self.refresh_interval = app.config.get('PLATFORM_RECENT_REFRESH_INTERVAL', 300)
+        self._buffers = {kind: RecentBuffer(self.recent_size) for kind in self._buffers}
+        self.app = app
+        self._reconcile_interval = app.config.get('PLATFORM_COUNTERS_RECONCILE_INTERVAL', 3600)
+        if self._reconcile_interval:
+            app.before_request(self._reconciler.ensure)
+        app.cli.add_command(reconcile_counters_command)
+        _listen()
+
+    def values(self):
+        """Counter name -> value, in one query; missing or possibly stale counters are rebuilt first."""
+        values = dict(db.session.query(PlatformCounter.name, PlatformCounter.value).all())
+        if self._reconcile_needed or any(name not in values for name in COUNTER_NAMES):
+            values = self.reconcile()
+        return values
+
+    def recent(self, kind):
+        """Newest-first summaries of the latest rows of a kind ('helpers', 'reviews' or 'incidents')."""
+        buffer = self._buffers[kind]
+        now = time.monotonic()
+        if buffer.loaded_at is None or now - buffer.loaded_at >= self.refresh_interval:
+            rows = _load_recent(kind, buffer.rows.maxlen)
+            with self._lock:
+                buffer.rows.clear()
+                buffer.rows.extend(rows)
+                buffer.loaded_at = now
+        with self._lock:
+            return list(buffer.rows)
+
+    def adjust(self, deltas):
+        """
+        Add deltas ({counter name: change}) to the counters when the current transaction
+        commits. For bulk updates and deletes that mapper events don't see. Does not commit.
+        """
+        _pending(db.session(), 'platform_counter_deltas', Counter).update(deltas)
+
+    def reconcile(self):
+        """Recompute every counter with COUNT(*), fix and log any drift, and commit. Returns the values."""
+        queries = counter_queries()
+        counted = db.session.execute(
+            select(*[query.scalar_subquery().label(name) for name, query in queries.items()])
+        ).one()._asdict()
+        stored = dict(db.session.query(PlatformCounter.name, PlatformCounter.value).all())
+
+        corrections = 0
+        changed = {}
+        for name, value in counted.items():
+            if name not in stored:
+                changed[name] = value
+            elif stored[name] != value:
+                logger.warning(f"Counter {name} drifted: stored {stored[name]}, counted {value}")
+                changed[name] = value
+                corrections += 1
+        if changed:
+            # An upsert, so workers reconciling at the same time don't collide on a missing row
+            db.session.execute(_set_counters(db.session.get_bind().dialect.name, changed))
+        db.session.commit()
+        with self._lock:
+            self.reconciled += 1
+            self.corrections += corrections
+            self._reconcile_needed = False
+        return counted
+
+    def _committed(self, pushed, removed, stale=()):
+        with self._lock:
+            for kind, summary in pushed:
+                if self._buffers[kind].loaded_at is not None:
+                    self._buffers[kind].push(summary)
+            for kind, row_id in removed:
+                self._buffers[kind].remove(row_id)
+            for kind in stale:
+                self._buffers[kind].loaded_at = None
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self._reconcile_interval)
+            try:
+                with self.app.app_context():
+                    self.reconcile()
+            except Exception:
+                logger.exception("Counter reconcile failed")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'reconciled': self.reconciled,
+                'corrections': self.corrections,
+                'recent': {kind: len(buffer.rows) for kind, buffer in self._buffers.items()},
+            }
+
+
+platform_counters = PlatformCounters()
+
+
+@click.command('reconcile-counters')
+@with_appcontext
+def reconcile_counters_command():
+    """Recompute the admin dashboard counters from the tables."""
+    for name, value in sorted(platform_counters.reconcile().items()):
+        click.echo(f"{name}: {value}")
+
+
+# Commit-time bookkeeping. Counter deltas and recent-row changes collected by the mapper
+# events wait in session.info until the transaction commits, and are dropped on rollback.
+
+def _apply_deltas(connection, deltas):
+    """Add deltas to their counter rows. Returns the names of counters that have no row."""
+    missing = []
+    for name, delta in sorted(deltas.items()):
+        if delta:
+            updated = connection.execute(
+                PlatformCounter.__table__.update()
+                .where(PlatformCounter.name == name)
+                .values(value=PlatformCounter.value + delta)
+            ).rowcount
+            if not updated:
+                missing.append(name)
+    return missing
+
+
+def _set_counters(dialect, values):
+    """Upsert statement setting counters ({name: value}), whether or not their rows exist."""
+    now = datetime.datetime.utcnow()
+    rows = [{'name': name, 'value': value, 'updated_at': now} for name, value in sorted(values.items())]
+    table = PlatformCounter.__table__
+    if dialect == 'mysql':
+        statement = mysql.insert(table).values(rows)
+        return statement.on_duplicate_key_update(value=statement.inserted.value, updated_at=statement.inserted.updated_at)
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=['name'], set_={'value': statement.excluded.value, 'updated_at': statement.excluded.updated_at})
+
+
+def _pending(session, key, factory):
+    return session.info.setdefault(key, factory())
+
+
+def _count(target, names, delta):
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = _pending(session, 'platform_counter_deltas', Counter)
+    for name in names:
+        deltas[name] += delta
+
+
+def _remember(target, kind, summary=None):
+    session = object_session(target)
+    if session is None:
+        return
+    if summary is None:
+        _pending(session, 'platform_recent_removed', list).append((kind, target.id))
+    else:
+        _pending(session, 'platform_recent_pushed', list).append((kind, summary))
+
+
+def _helper_id(target):
+    """
+    helper_id of a review's or incident's helper, from the loaded relationship or the
+    session's identity map. None if neither has it loaded; no query is sent.
+    """
+    helper = inspect(target).attrs.helper_profile.loaded_value
+    if helper is NO_VALUE or helper is None:
+        helper = object_session(target).identity_map.get(identity_key(HelperProfile, target.helper_profile_id))
+    if helper is None:
+        return None
+    return inspect(helper).dict.get('helper_id')
+
+
+def _remember_with_helper(target, kind, summary):
+    helper_id = _helper_id(target)
+    if helper_id is None:
+        # Reload the buffer from the database on its next read instead of querying here
+        _pending(object_session(target), 'platform_recent_stale', set).add(kind)
+    else:
+        _remember(target, kind, summary(target, helper_id))
+
+
+def _counter_name(mapper):
+    return next(name for name, model in COUNTED_MODELS.items() if mapper.class_ is model)
+
+
+def _after_insert(mapper, connection, target):
+    _count(target, [_counter_name(mapper)], 1)
+    if isinstance(target, OwnerProfile):
+        _count(target, owner_status_counters(target.verification_status, target.aadhaar_verified), 1)
+    elif isinstance(target, HelperProfile):
+        _remember(target, 'helpers', _helper_summary(target))
+    elif isinstance(target, Review):
+        _remember_with_helper(target, 'reviews', _review_summary)
+    elif isinstance(target, IncidentReport):
+        _remember_with_helper(target, 'incidents', _incident_summary)
+
+
+def _after_delete(mapper, connection, target):
+    _count(target, [_counter_name(mapper)], -1)
+    if isinstance(target, OwnerProfile):
+        _count(target, owner_status_counters(target.verification_status, target.aadhaar_verified), -1)
+    elif isinstance(target, HelperProfile):
+        _remember(target, 'helpers')
+    elif isinstance(target, Review):
+        _remember(target, 'reviews')
+    elif isinstance(target, IncidentReport):
+        _remember(target, 'incidents')
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    # Registered with active_history, so an expired attribute is loaded before it is replaced
+    # and _owner_after_update can see which counters the profile leaves
+    pass
+
+
+def _owner_after_update(mapper, connection, target):
+    state = inspect(target)
+    status, aadhaar = state.attrs.verification_status.history, state.attrs.aadhaar_verified.history
+    if not (status.has_changes() or aadhaar.has_changes()):
+        return
+    old_status = status.deleted[0] if status.deleted else target.verification_status
+    old_aadhaar = aadhaar.deleted[0] if aadhaar.deleted else target.aadhaar_verified
+    _count(target, owner_status_counters(old_status, old_aadhaar), -1)
+    _count(target, owner_status_counters(target.verification_status, target.aadhaar_verified), 1)
+
+
+def _after_commit(session):
+    deltas = session.info.pop('platform_counter_deltas', None)
+    if deltas:
+        try:
+            with db.engine.begin() as connection:
+                if _apply_deltas(connection, deltas):
+                    platform_counters._reconcile_needed = True
+        except Exception:
+            # The rows are committed already; don't fail the request over its counters
+            logger.exception("Counter update failed")
+            platform_counters._reconcile_needed = True
+    pushed = session.info.pop('platform_recent_pushed', [])
+    removed = session.info.pop('platform_recent_removed', [])
+    stale = session.info.pop('platform_recent_stale', set())
+    if pushed or removed or stale:
+        platform_counters._committed(pushed, removed, stale)
+
+
+def _after_rollback(session):
+    for key in ('platform_counter_deltas', 'platform_recent_pushed', 'platform_recent_removed',
+                'platform_recent_stale'):
+        session.info.pop(key, None)
+
+
+def _listen():
+    """Register the mapper and session events, once per process."""
+    listeners = [(model, 'after_insert', _after_insert) for model in COUNTED_MODELS.values()]
+    listeners += [(model, 'after_delete', _after_delete) for model in COUNTED_MODELS.values()]
+    listeners += [(OwnerProfile, 'after_update', _owner_after_update),
+                  (db.session, 'after_commit', _after_commit),
+                  (db.session, 'after_rollback', _after_rollback)]
+    for target, identifier, fn in listeners:
+        if not event.contains(target, identifier, fn):
+            event.listen(target, identifier, fn)
+    for attribute in (OwnerProfile.verification_status, OwnerProfile.aadhaar_verified):
+        if not event.contains(attribute, 'set', _load_old_value):
+            event.listen(attribute, 'set', _load_old_value, active_history=True)
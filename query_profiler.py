@@ -0,0 +1,196 @@
+"""
+Opt-in per-request SQL profiling.
+
+When QUERY_PROFILER_ENABLED is set, SQLAlchemy engine events time every statement a request
+sends, and an after_request hook records the totals:
+
+- per request: query count, total database time, the slowest statements, and statements
+  sent QUERY_PROFILER_REPEAT_THRESHOLD or more times with the same SQL text (different
+  parameters), the usual sign of an N+1 loop. Slow statements and repeats are logged.
+- per endpoint: a rolling window of the last QUERY_PROFILER_WINDOW requests, summarised by
+  stats() and served as JSON at /admin/query-stats.
+- per response, when QUERY_PROFILER_HEADERS is on (default: in debug mode): X-Query-Count
+  and a Server-Timing entry that browser dev tools show next to the request.
+
+Statements sent outside a request (background writers, scripts) are not recorded.
+"""
+import contextvars
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, deque
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('query_profiler_request', default=None)
+_listeners_installed = False
+_install_lock = threading.Lock()
+
+
+class RequestQueries:
+    """Statements sent while handling one request."""
+
+    def __init__(self, keep_slowest):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+        self.slowest = []  # Min-heap of (seconds, sql), at most keep_slowest entries
+        self.keep_slowest = keep_slowest
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.total_time += seconds
+        self.statements[statement] += 1
+        entry = (seconds, statement)
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def repeated(self, threshold):
+        """(sql, times) for statements sent at least threshold times, most repeated first."""
+        return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_profiler_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = _current.get()
+    started = conn.info.get('query_profiler_started')
+    if record is not None and started:
+        record.add(' '.join(statement.split()), time.perf_counter() - started.pop())
+
+
+def _install_listeners():
+    # Listening on the Engine class covers every engine Flask-SQLAlchemy creates, now or later
+    global _listeners_installed
+    with _install_lock:
+        if not _listeners_installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _listeners_installed = True
+
+
+class EndpointStats:
+    """Rolling window of recent requests to one endpoint."""
+
+    def __init__(self, window):
+        self.requests = 0
+        self.recent = deque(maxlen=window)  # (query count, db seconds)
+        self.repeated = Counter()           # sql -> requests in which it repeated
+        self.slowest = []                   # Min-heap of (seconds, sql)
+
+
+class QueryProfiler:
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.headers = False
+        self.slow_seconds = 0.1
+        self.repeat_threshold = 3
+        self.window = 200
+        self.keep_slowest = 5
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['query_profiler'] = self
+        self.enabled = app.config.get('QUERY_PROFILER_ENABLED', False)
+        if not self.enabled:
+            return
+        headers = app.config.get('QUERY_PROFILER_HEADERS')
+        self.headers = app.debug if headers is None else headers
+        self.slow_seconds = app.config.get('QUERY_PROFILER_SLOW_MS', 100) / 1000.0
+        self.repeat_threshold = app.config.get('QUERY_PROFILER_REPEAT_THRESHOLD', 3)
+        self.window = app.config.get('QUERY_PROFILER_WINDOW', 200)
+        self.keep_slowest = app.config.get('QUERY_PROFILER_SLOWEST', 5)
+
+        _install_listeners()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._clear_request)
+
+    def _start_request(self):
+        _current.set(RequestQueries(self.keep_slowest))
+
+    def _clear_request(self, exc=None):
+        _current.set(None)
+
+    def _finish_request(self, response):
+        record = _current.get()
+        if record is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        repeated = record.repeated(self.repeat_threshold)
+
+        for seconds, statement in record.slowest:
+            if seconds >= self.slow_seconds:
+                logger.warning(f"Slow query in {endpoint} ({seconds * 1000:.1f} ms): {statement}")
+        for statement, times in repeated:
+            logger.warning(f"Possible N+1 in {endpoint}: sent {times} times: {statement}")
+
+        self._record(endpoint, record, repeated)
+
+        if self.headers:
+            response.headers['X-Query-Count'] = str(record.count)
+            response.headers.add('Server-Timing',
+                                 f'db;dur={record.total_time * 1000:.1f};desc="{record.count} queries"')
+        return response
+
+    def _record(self, endpoint, record, repeated):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats(self.window)
+            stats.requests += 1
+            stats.recent.append((record.count, record.total_time))
+            for statement, _ in repeated:
+                stats.repeated[statement] += 1
+            for entry in record.slowest:
+                if len(stats.slowest) < self.keep_slowest:
+                    heapq.heappush(stats.slowest, entry)
+                elif entry > stats.slowest[0]:
+                    heapq.heapreplace(stats.slowest, entry)
+
+    def current(self):
+        """RequestQueries for the request being handled, or None."""
+        return _current.get()
+
+    def stats(self):
+        """Per-endpoint summary of the recent window, busiest endpoints first."""
+        with self._lock:
+            summary = {}
+            for endpoint, stats in self._endpoints.items():
+                counts = sorted(count for count, _ in stats.recent)
+                times = sorted(seconds for _, seconds in stats.recent)
+                p95 = max(0, int(len(counts) * 0.95 + 0.5) - 1)
+                summary[endpoint] = {
+                    'requests': stats.requests,
+                    'window': len(counts),
+                    'avg_queries': round(sum(counts) / len(counts), 2),
+                    'p95_queries': counts[p95],
+                    'max_queries': counts[-1],
+                    'avg_db_ms': round(sum(times) / len(times) * 1000, 2),
+                    'p95_db_ms': round(times[p95] * 1000, 2),
+                    'slowest': [{'ms': round(seconds * 1000, 2), 'sql': statement}
+                                for seconds, statement in sorted(stats.slowest, reverse=True)],
+                    'repeated': [{'requests': hits, 'sql': statement}
+                                 for statement, hits in stats.repeated.most_common(self.keep_slowest)],
+                }
+            return dict(sorted(summary.items(), key=lambda item: -item[1]['requests']))
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+query_profiler = QueryProfiler()
@@ -3,18 +3,36 @@ import uuid
 import datetime
 import time
 from functools import wraps
-from flask import render_template, url_for, flash, redirect, request, jsonify, session, send_from_directory, current_app
+from flask import render_template, url_for, flash, redirect, request, jsonify, session, send_from_directory, send_file, abort, current_app
 from flask_login import login_user, current_user, logout_user, login_required
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+from markupsafe import Markup
 from extensions import db, bcrypt
-from models import User, OwnerProfile, OwnerDocument, HelperProfile, HelperDocument, TaskList, Contract, Review, IncidentReport, OwnerToOwnerConnect, PincodeMapping, Language, OwnerHelperAssociation, HelperVerificationLog, AadhaarAPILog, ReviewTaskRating
+from models import User, OwnerProfile, OwnerDocument, HelperProfile, HelperDocument, TaskList, Contract, Review, IncidentReport, OwnerToOwnerConnect, PincodeMapping, Language, OwnerHelperAssociation, HelperVerificationLog, AadhaarAPILog, ReviewTaskRating, HelperRatingStats
 from forms import (RegistrationForm, LoginForm, OwnerProfileForm, HelperProfileForm, ContractForm, ReviewForm, 
                    IncidentReportForm, OwnerToOwnerConnectForm, SearchForm, TaskListForm,
                    AadhaarVerificationForm, AadhaarOTPVerificationForm, AadhaarOTPForm, AadhaarRegistrationForm,
                    HelperAadhaarVerificationForm, CreateHelperForm, SearchHelperForm)
-from utils import save_file, get_unique_id, send_notification
+from utils import save_file, get_unique_id
 from aadhaar_api import generate_aadhaar_otp, verify_aadhaar_otp
+from pincode_index import pincode_index
+from language_table import language_table
+from photo_store import is_photo_hash, photo_path, photo_root, photo_mimetype
+from notifications import notification_queue
+from log_sink import api_log_sink
+from query_profiler import query_profiler
+from analytics_cache import analytics_cache
+from platform_counters import platform_counters, owner_status_counters
+from aadhaar_logs import log_page, log_stats
+from owner_dashboard_cache import owner_dashboard_cache
+from helper_search import helper_search
+from task_catalog import task_catalog, CATEGORY_SEPARATOR
+from uploads import streamed_upload, UploadTooLarge, UnsupportedUpload
+from photo_variants import photo_variants, FORMATS as VARIANT_FORMATS
+from upload_serving import serve_upload, upload_root, is_immutable_name, is_private_upload
 from sqlalchemy import desc, func
+from sqlalchemy.orm import selectinload, contains_eager
 
 def admin_required(f):
     """Decorator to require admin role."""
@@ -26,11 +44,70 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def can_view_aadhaar_photo(user, photo_hash):
+    """Admins, the owner whose profile holds the photo, and owners associated with the helper who does."""
+    if user.role == 'admin':
+        return True
+    if db.session.query(OwnerProfile.id).filter_by(owner_id=user.id, aadhaar_photo_hash=photo_hash).first():
+        return True
+    return db.session.query(HelperProfile.id).join(
+        OwnerHelperAssociation, OwnerHelperAssociation.helper_profile_id == HelperProfile.id
+    ).filter(
+        OwnerHelperAssociation.owner_id == user.id,
+        HelperProfile.aadhaar_photo_hash == photo_hash
+    ).first() is not None
+
 def register_routes(app):
     # Add route to serve uploaded files
     @app.route('/uploads/<path:filename>')
     def uploaded_file(filename):
-        return send_from_directory(os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER']), filename)
+        # Identity documents are not public files, whoever knows the URL
+        if is_private_upload(filename):
+            abort(404)
+        # ?size=thumb|medium serves a resized copy of a helper photo (see photo_variants.py)
+        size = request.args.get('size')
+        if size:
+            fmt = 'webp' if any(mimetype == 'image/webp' for mimetype, quality in request.accept_mimetypes) else 'jpeg'
+            path = photo_variants.get(filename, size, fmt)
+            response = None
+            if path:
+                response = serve_upload(os.path.relpath(path, upload_root()), mimetype=VARIANT_FORMATS[fmt][1],
+                                        immutable=is_immutable_name(filename))
+            elif os.path.isfile(safe_join(upload_root(), filename) or ''):
+                # The original stands in until the variant is ready, so it must not be kept for long
+                response = serve_upload(filename, immutable=False, max_age=60)
+            if response is not None:
+                response.vary.add('Accept')
+                return response
+        # Strong ETags, long-lived caching for fixed names, 304s and Range (see upload_serving.py)
+        return serve_upload(filename)
+    
+    # Uploads rejected while the body was still arriving (see uploads.py)
+    @app.errorhandler(UploadTooLarge)
+    @app.errorhandler(UnsupportedUpload)
+    def upload_rejected(error):
+        flash(error.description, 'danger')
+        return redirect(request.url)
+    
+    # Serve Aadhaar photos from the content-addressed photo store
+    @app.route('/aadhaar-photos/<photo_hash>')
+    def aadhaar_photo(photo_hash):
+        if not is_photo_hash(photo_hash):
+            abort(404)
+        # A registrant viewing the photo from their own verification, or a user allowed to see it
+        in_registration = (session.get('aadhaar_data') or {}).get('photo_hash') == photo_hash
+        if not in_registration and not (current_user.is_authenticated
+                                        and can_view_aadhaar_photo(current_user, photo_hash)):
+            abort(404)
+        path = photo_path(photo_hash)
+        if not os.path.isfile(path):
+            abort(404)
+        
+        # The URL names the content, so browsers may keep it for good; private keeps it off shared caches
+        root = photo_root()
+        return serve_upload(os.path.relpath(path, root), mimetype=photo_mimetype(path), private=True,
+                            max_age=app.config.get('AADHAAR_PHOTO_MAX_AGE', 31536000), root=root,
+                            accel_prefix=app.config.get('AADHAAR_PHOTO_ACCEL_REDIRECT_PREFIX'))
     
     # Home route
     @app.route('/')
@@ -248,7 +325,7 @@ def register_routes(app):
                     aadhaar_gender=aadhaar_data.get("gender", ""),
                     aadhaar_dob=aadhaar_data.get("date_of_birth", ""),
                     aadhaar_address=full_address,
-                    aadhaar_photo=aadhaar_data.get("photo", ""),
+                    aadhaar_photo_hash=aadhaar_data.get("photo_hash"),
                     # Detailed address components
                     address_house=address_dict.get("house", ""),
                     address_landmark=address_dict.get("landmark", ""),
@@ -411,7 +488,7 @@ def register_routes(app):
                         aadhaar_gender=user_details.get("gender", ""),
                         aadhaar_dob=user_details.get("date_of_birth", ""),
                         aadhaar_address=full_address,
-                        aadhaar_photo=user_details.get("photo", ""),
+                        aadhaar_photo_hash=user_details.get("photo_hash"),
                         # Detailed address components
                         address_house=address_dict.get("house", ""),
                         address_landmark=address_dict.get("landmark", ""),
@@ -442,7 +519,8 @@ def register_routes(app):
                     owner_profile.aadhaar_gender = user_details.get("gender", "")
                     owner_profile.aadhaar_dob = user_details.get("date_of_birth", "")
                     owner_profile.aadhaar_address = full_address
-                    owner_profile.aadhaar_photo = user_details.get("photo", "")
+                    owner_profile.aadhaar_photo_hash = user_details.get("photo_hash")
+                    owner_profile.aadhaar_photo = None
                     
                     # Update detailed address components
                     owner_profile.address_house = address_dict.get("house", "")
@@ -536,23 +614,16 @@ def register_routes(app):
     
     # Helper Management Routes
     @app.route('/create-helper', methods=['GET', 'POST'])
+    @streamed_upload('helper_photos')
     @login_required
     def create_helper():
         """Create a new helper profile or associate an existing one"""
         form = CreateHelperForm()
         
         try:
-            # Fill the form with available languages
-            languages = Language.query.all()
-            if not languages:
-                # Add default languages if none exist
-                default_languages = ["English", "Hindi", "Bengali", "Tamil", "Telugu", "Marathi"]
-                for lang_name in default_languages:
-                    db.session.add(Language(name=lang_name))
-                db.session.commit()
-                languages = Language.query.all()
-            
-            form.languages.choices = [(str(lang.id), lang.name) for lang in languages]
+            # Fill the form with available languages, adding the defaults if none exist
+            language_table.ensure_defaults()
+            form.languages.choices = language_table.choices()
         except Exception as e:
             print(f"Error loading languages: {str(e)}")
             app.logger.error(f"Error loading languages: {str(e)}")
@@ -603,32 +674,10 @@ def register_routes(app):
                 return redirect(url_for('helper_detail', helper_id=helper_id))
             
             # Process photo upload
-            photo_url = None
-            if form.photo.data:
-                try:
-                    filename = secure_filename(f"{helper_id}_{int(time.time())}.jpg")
-                    filepath = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'helper_photos', filename)
-                    form.photo.data.save(filepath)
-                    photo_url = url_for('static', filename=f"uploads/helper_photos/{filename}")
-                except Exception as e:
-                    flash(f'Error uploading photo: {str(e)}', 'danger')
-            
-            # Process languages
-            language_str = ""
-            try:
-                language_names = []
-                language_ids = request.form.getlist('languages')
-                if language_ids:
-                    for lang_id in language_ids:
-                        language_obj = Language.query.get(int(lang_id))
-                        if language_obj:
-                            language_names.append(language_obj.name)
-                    language_str = ", ".join(language_names)
-                else:
-                    language_str = "Not specified"
-            except Exception as e:
-                app.logger.error(f"Error processing languages: {str(e)}")
-                language_str = "Error processing languages"
+            # Already streamed to disk while the form was parsed (see uploads.py); this moves it into place
+            photo_url = save_file(form.photo.data, 'helper_photos')
+            if form.photo.data and not photo_url:
+                flash('Error uploading photo.', 'danger')
             
             # Create helper profile with minimal information
             try:
@@ -638,11 +687,13 @@ def register_routes(app):
                     helper_type=form.helper_type.data,
                     phone_number=form.phone_number.data,
                     photo_url=photo_url,
-                    languages=language_str,
+                    languages=None,
                     created_by=current_user.id,
                     gender=form.gender.data,
                     verification_status='Unverified'
                 )
+                # Links the selected languages (one query) and fills the display string
+                helper.set_languages(request.form.getlist('languages'))
                 
                 db.session.add(helper)
                 db.session.commit()
@@ -655,6 +706,7 @@ def register_routes(app):
                 )
                 db.session.add(association)
                 db.session.commit()
+                photo_variants.generate(photo_url)
                 
                 flash('Helper profile created successfully! You can now verify their Aadhaar details.', 'success')
                 # Redirect to a helper verification page in the future
@@ -703,11 +755,9 @@ def register_routes(app):
         # Explicitly query for reviews to avoid relationship loading issues
         reviews = Review.query.filter_by(helper_profile_id=helper.id).order_by(Review.timestamp.desc()).all()
         
-        # Calculate average rating
-        avg_rating = 0
-        if reviews:
-            total_rating = sum(review.overall_rating for review in reviews)
-            avg_rating = total_rating / len(reviews)
+        # Average rating comes from the running totals, not from the review list
+        stats = HelperRatingStats.query.filter_by(helper_profile_id=helper.id).first()
+        avg_rating = stats.avg_overall if stats else 0
         
         # Prepare recent reviews (take up to 3)
         recent_reviews = reviews[:3] if reviews else []
@@ -746,31 +796,9 @@ def register_routes(app):
         # Set default start date to today
         form.start_date.data = datetime.date.today()
         
-        # Load tasks from database for the select field based on helper type
-        tasks = TaskList.query.filter_by(helper_type=helper.helper_type).all()
-        
-        # Define separator used to distinguish categories in task labels
-        category_separator = " - "
-        
-        # Organize tasks by category
-        categorized_tasks = {}
-        for task in tasks:
-            if task.category not in categorized_tasks:
-                categorized_tasks[task.category] = []
-            
-            # Only include sub-tasks as selectable options
-            # Main tasks should only serve as category headers and not be selectable
-            if not task.is_main_task:
-                # Add category prefix for proper categorization in UI
-                choice_label = f"{task.category}{category_separator}{task.name}"
-                categorized_tasks[task.category].append((str(task.id), choice_label))
-        
-        # Flatten the choices list
-        all_choices = []
-        for category, choices in categorized_tasks.items():
-            all_choices.extend(choices)
-            
-        form.tasks.choices = all_choices
+        # Selectable subtasks of this helper type, grouped by category, from the in-memory catalog
+        category_separator = CATEGORY_SEPARATOR
+        form.tasks.choices = task_catalog.choices(helper.helper_type)
         
         # Debug information for form validation
         app.logger.info(f"Form submitted: {request.form}")
@@ -784,9 +812,8 @@ def register_routes(app):
                 # Create a unique contract ID
                 contract_id = f"CT{int(time.time())}{current_user.id}{helper.id}"
                 
-                # Get selected tasks as comma-separated list
+                # Get selected task IDs
                 selected_tasks = request.form.getlist('tasks')
-                tasks_str = ','.join(selected_tasks)
                 
                 # Get start_date value from request
                 start_date_str = request.form.get('start_date', '')
@@ -816,7 +843,6 @@ def register_routes(app):
                     contract_id=contract_id,
                     helper_profile_id=helper.id,
                     owner_id=current_user.id,
-                    tasks=tasks_str,
                     is_full_time=form.is_full_time.data,
                     working_hours_from=None if form.is_full_time.data else form.working_hours_from.data,
                     working_hours_to=None if form.is_full_time.data else form.working_hours_to.data,
@@ -824,6 +850,7 @@ def register_routes(app):
                     end_date=end_date,  # Use directly parsed value
                     monthly_salary=form.monthly_salary.data
                 )
+                contract.set_tasks(selected_tasks)
                 
                 db.session.add(contract)
                 db.session.commit()
@@ -868,48 +895,78 @@ def register_routes(app):
     @app.route('/search-helper', methods=['GET', 'POST'])
     @login_required
     def search_helper():
-        """Search for a helper by Aadhaar ID or name to associate with"""
+        """Search for a helper by Aadhaar ID or name, optionally by language, to associate with"""
         form = SearchHelperForm()
+        form.language.choices = [('', 'Any language')] + language_table.choices()
         
         if form.validate_on_submit():
-            search_term = form.search_term.data
-            
-            # Search by Aadhaar ID (exact match) or name (partial match)
-            helpers = HelperProfile.query.filter(
-                (HelperProfile.helper_id == search_term) |
-                (HelperProfile.name.ilike(f'%{search_term}%'))
-            ).all()
-            
-            return render_template('search_helper_results.html', helpers=helpers, search_term=search_term)
-            
-        return render_template('search_helper.html', form=form)
+            search_term = (form.search_term.data or '').strip()
+            language_id = form.language.data
+            page = 1
+        elif request.method == 'GET' and (request.args.get('q') or request.args.get('language')):
+            # Result pages link back here with the search in the query string
+            search_term = request.args.get('q', '').strip()
+            language_id = request.args.get('language', '') if request.args.get('language', '').isdigit() else ''
+            page = request.args.get('page', 1, type=int) or 1
+        else:
+            return render_template('search_helper.html', form=form)
+        
+        # Ranked search over this worker's in-memory index (see helper_search.py)
+        per_page = app.config.get('HELPER_SEARCH_PER_PAGE', 20)
+        helpers, has_more = helper_search.find(search_term, language_id, limit=per_page,
+                                               offset=(max(page, 1) - 1) * per_page)
+        
+        return render_template('search_helper_results.html', helpers=helpers, search_term=search_term,
+                               language_id=language_id, language_name=language_table.name(language_id),
+                               page=page, has_more=has_more)
     
     # Admin routes
     @app.route('/admin/dashboard')
     @login_required
     @admin_required
     def admin_dashboard():
-        # Get statistics for the admin dashboard
-        total_users = User.query.count()
-        total_helpers = HelperProfile.query.count()
-        total_contracts = Contract.query.count()
-        total_reviews = Review.query.count()
-        
-        # Get recent activities
-        recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
-        recent_helpers = HelperProfile.query.order_by(HelperProfile.created_at.desc()).limit(5).all()
-        recent_contracts = Contract.query.order_by(Contract.created_at.desc()).limit(5).all()
-        recent_reviews = Review.query.order_by(Review.timestamp.desc()).limit(5).all()
+        # Running totals in one query, recent rows from this worker's ring buffers (see platform_counters.py)
+        counts = platform_counters.values()
         
         return render_template('admin/dashboard.html',
-                              total_users=total_users,
-                              total_helpers=total_helpers,
-                              total_contracts=total_contracts,
-                              total_reviews=total_reviews,
-                              recent_users=recent_users,
-                              recent_helpers=recent_helpers,
-                              recent_contracts=recent_contracts,
-                              recent_reviews=recent_reviews)
+                              total_users=counts['users'],
+                              total_owners=counts['owners'],
+                              total_helpers=counts['helpers'],
+                              total_contracts=counts['contracts'],
+                              total_reviews=counts['reviews'],
+                              pending_verifications=counts['pending_verifications'],
+                              aadhaar_verified_users=counts['aadhaar_verified_owners'],
+                              manual_verified_users=counts['manually_verified_owners'],
+                              recent_helpers=platform_counters.recent('helpers'),
+                              recent_reviews=platform_counters.recent('reviews'),
+                              recent_incidents=platform_counters.recent('incidents'))
+    
+    @app.route('/admin/query-stats')
+    @login_required
+    @admin_required
+    def admin_query_stats():
+        """Per-endpoint SQL profile of this worker, with its background queue and session counters"""
+        session_interface = app.extensions.get('session_store')
+        return jsonify({
+            'profiler_enabled': query_profiler.enabled,
+            'endpoints': query_profiler.stats(),
+            'api_log_sink': api_log_sink.stats(),
+            'notifications': notification_queue.stats(),
+            'sessions': session_interface.stats() if session_interface else None,
+            'analytics_cache': analytics_cache.stats(),
+            'platform_counters': platform_counters.stats(),
+            'owner_dashboard_cache': owner_dashboard_cache.stats(),
+            'helper_search': helper_search.stats(),
+            'task_catalog': task_catalog.stats(),
+        })
+    
+    @app.route('/admin/query-stats/reset', methods=['POST'])
+    @login_required
+    @admin_required
+    def reset_query_stats():
+        """Clear this worker's per-endpoint SQL profile"""
+        query_profiler.reset()
+        return jsonify({'success': True, 'message': 'Query statistics cleared'})
     
     @app.route('/admin/analytics')
     @login_required
@@ -925,57 +982,13 @@ def register_routes(app):
         city_img = 'analytics/helper_city_distribution.png'
         ratings_img = 'analytics/ratings_by_helper_type.png'
         
-        # Get top helpers by overall rating
-        top_helpers = db.session.query(
-            HelperProfile,
-            func.avg(Review.overall_rating).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).join(Review, HelperProfile.id == Review.helper_profile_id)\
-         .group_by(HelperProfile.id)\
-         .having(func.count(Review.id) > 0)\
-         .order_by(desc('avg_rating'))\
-         .limit(10).all()
-        
-        # Get top helpers by city
-        top_helpers_by_city = {}
-        cities = db.session.query(HelperProfile.city).filter(HelperProfile.city != None).distinct().all()
-        
-        for city_result in cities:
-            city = city_result[0]
-            if not city:
-                continue
-                
-            city_top = db.session.query(
-                HelperProfile,
-                func.avg(Review.overall_rating).label('avg_rating'),
-                func.count(Review.id).label('review_count')
-            ).join(Review, HelperProfile.id == Review.helper_profile_id)\
-             .filter(HelperProfile.city == city)\
-             .group_by(HelperProfile.id)\
-             .having(func.count(Review.id) > 0)\
-             .order_by(desc('avg_rating'))\
-             .limit(3).all()
-             
-            if city_top:
-                top_helpers_by_city[city] = city_top
-        
-        # Get top cleaning helpers
-        top_cleaning = db.session.query(
-            HelperProfile,
-            func.avg(Review.hygiene).label('avg_hygiene'),
-            func.avg(Review.overall_rating).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).join(Review, HelperProfile.id == Review.helper_profile_id)\
-         .filter(HelperProfile.helper_type == 'maid')\
-         .group_by(HelperProfile.id)\
-         .having(func.count(Review.id) > 0)\
-         .order_by(desc('avg_hygiene'))\
-         .limit(5).all()
+        # Top helpers overall, per city and for cleaning, from a short-lived cache (see analytics_cache.py)
+        analytics = analytics_cache.payload()
         
         return render_template('admin/analytics.html',
-                              top_helpers=top_helpers,
-                              top_helpers_by_city=top_helpers_by_city,
-                              top_cleaning=top_cleaning,
+                              top_helpers=analytics['top_helpers'],
+                              top_helpers_by_city=analytics['top_helpers_by_city'],
+                              top_cleaning=analytics['top_cleaning'],
                               distribution_img=distribution_img,
                               city_img=city_img,
                               ratings_img=ratings_img)
@@ -1012,6 +1025,7 @@ def register_routes(app):
                 task = TaskList(name=form.name.data)
                 db.session.add(task)
                 db.session.commit()
+                task_catalog.invalidate()
                 
                 flash('Task added successfully!', 'success')
             
@@ -1030,6 +1044,7 @@ def register_routes(app):
         
         db.session.delete(task)
         db.session.commit()
+        task_catalog.invalidate()
         
         flash('Task deleted successfully!', 'success')
         return redirect(url_for('manage_tasks'))
@@ -1039,28 +1054,20 @@ def register_routes(app):
     @admin_required
     def search_pincodes():
         """Search for pincodes. Admin-only route."""
-        search_term = request.args.get('term', '')
+        search_term = request.args.get('term', '').strip()
         if not search_term:
             return jsonify({'success': False, 'message': 'No search term provided'})
         
-        # Search for matching pincodes
-        pincodes = PincodeMapping.query.filter(PincodeMapping.pincode.contains(search_term)).all()
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
         
-        if not pincodes:
-            return jsonify({'success': False, 'message': 'No matching pincodes found'})
+        # Pincode prefix matches first, then city/society matches, from the in-memory index
+        results, has_more = pincode_index.search(search_term, limit=limit, offset=offset)
         
-        # Format results
-        results = []
-        for pincode in pincodes:
-            results.append({
-                'id': pincode.id,
-                'pincode': pincode.pincode,
-                'state': pincode.state,
-                'city': pincode.city,
-                'society': pincode.society
-            })
+        if not results:
+            return jsonify({'success': False, 'message': 'No matching pincodes found'})
         
-        return jsonify({'success': True, 'results': results})
+        return jsonify({'success': True, 'results': results, 'limit': limit, 'offset': offset, 'has_more': has_more})
         
     @app.route('/pincodes/lookup', methods=['GET'])
     def lookup_pincode():
@@ -1069,21 +1076,28 @@ def register_routes(app):
         if not pincode:
             return jsonify({'success': False, 'message': 'No pincode provided'})
         
-        # Search for exact pincode match
-        pincode_data = PincodeMapping.query.filter(PincodeMapping.pincode == pincode).first()
+        # Search for exact pincode match in the in-memory index
+        pincode_data = pincode_index.get(pincode)
         
         if not pincode_data:
-            return jsonify({'success': False, 'message': 'Pincode not found'})
-        
-        # Return pincode data
-        result = {
-            'pincode': pincode_data.pincode,
-            'state': pincode_data.state,
-            'city': pincode_data.city,
-            'society': pincode_data.society
-        }
-        
-        return jsonify({'success': True, 'result': result})
+            response = jsonify({'success': False, 'message': 'Pincode not found'})
+            # Misses may be added by an admin soon, so cache them only briefly
+            response.cache_control.max_age = app.config.get('PINCODE_LOOKUP_MISS_MAX_AGE', 60)
+        else:
+            # Return pincode data
+            result = {
+                'pincode': pincode_data['pincode'],
+                'state': pincode_data['state'],
+                'city': pincode_data['city'],
+                'society': pincode_data['society']
+            }
+            response = jsonify({'success': True, 'result': result})
+            response.cache_control.max_age = app.config.get('PINCODE_LOOKUP_MAX_AGE', 3600)
+        
+        # Let browsers and the CDN cache lookups and revalidate them with If-None-Match
+        response.cache_control.public = True
+        response.add_etag()
+        return response.make_conditional(request)
     
     @app.route('/admin/pincodes', methods=['GET', 'POST'])
     @login_required
@@ -1094,8 +1108,6 @@ def register_routes(app):
         from flask_wtf.file import FileField, FileAllowed
         from wtforms import StringField, SubmitField
         from wtforms.validators import DataRequired, Length
-        import csv
-        import io
         
         # Form for adding new pincode mappings
         class PincodeForm(FlaskForm):
@@ -1135,6 +1147,7 @@ def register_routes(app):
                         )
                         db.session.add(pincode_mapping)
                         db.session.commit()
+                        pincode_index.invalidate()
                         flash('Pincode mapping added successfully!', 'success')
                     except Exception as e:
                         db.session.rollback()
@@ -1147,62 +1160,21 @@ def register_routes(app):
         if bulk_form.validate_on_submit() and 'csv_file' in request.files:
             csv_file = request.files['csv_file']
             if csv_file:
-                # Read CSV file
-                csv_file_stream = io.StringIO(csv_file.stream.read().decode("UTF-8"), newline=None)
-                csv_reader = csv.reader(csv_file_stream)
-                
-                # Skip header row if exists
-                header = next(csv_reader, None)
-                expected_headers = ['pincode', 'state', 'city', 'society']
-                
-                # Prepare counters for reporting
-                total_rows = 0
-                added_rows = 0
-                skipped_rows = 0
-                error_rows = 0
+                from import_pincodes import import_pincode_csv
                 
+                # Stream the upload in chunks instead of reading it into memory
                 try:
-                    # Process each row and add to database
-                    for row in csv_reader:
-                        total_rows += 1
-                        
-                        # Skip empty rows
-                        if not row or len(row) < 4:
-                            skipped_rows += 1
-                            continue
-                        
-                        pincode, state, city, society = row[0], row[1], row[2], row[3]
-                        
-                        # Skip if any required field is empty
-                        if not pincode or not state or not city or not society:
-                            skipped_rows += 1
-                            continue
-                        
-                        # Check if pincode already exists
-                        existing_pincode = PincodeMapping.query.filter_by(pincode=pincode).first()
-                        if existing_pincode:
-                            skipped_rows += 1
-                            continue
-                        
-                        try:
-                            # Add new pincode mapping
-                            pincode_mapping = PincodeMapping(
-                                pincode=pincode,
-                                city=city,
-                                state=state,
-                                society=society
-                            )
-                            db.session.add(pincode_mapping)
-                            added_rows += 1
-                        except Exception as e:
-                            error_rows += 1
-                            app.logger.error(f"Error adding pincode {pincode}: {str(e)}")
-                    
-                    # Commit all changes
-                    db.session.commit()
-                    flash(f'Bulk upload complete! Added {added_rows} pincodes, skipped {skipped_rows}, errors {error_rows}.', 'success')
+                    stats = import_pincode_csv(
+                        csv_file.stream,
+                        progress=lambda stats: app.logger.info(f"Pincode import chunk {stats.chunks}: {stats}"),
+                        logger=app.logger
+                    )
+                    pincode_index.invalidate()
+                    flash(f'Bulk upload complete! Added {stats.added_rows} pincodes, skipped {stats.skipped_rows}, errors {stats.error_rows}.', 'success')
                 except Exception as e:
                     db.session.rollback()
+                    # Chunks committed before the failure are already in the table
+                    pincode_index.invalidate()
                     flash(f'Error processing CSV file: {str(e)}', 'danger')
                 
                 return redirect(url_for('manage_pincodes'))
@@ -1225,6 +1197,7 @@ def register_routes(app):
         
         db.session.delete(pincode)
         db.session.commit()
+        pincode_index.invalidate()
         
         flash('Pincode mapping deleted successfully!', 'success')
         return redirect(url_for('manage_pincodes'))
@@ -1234,20 +1207,69 @@ def register_routes(app):
     @admin_required
     def verify_users():
         # Only get profiles that need manual verification (not already verified via Aadhaar)
-        pending_profiles = OwnerProfile.query.filter_by(verification_status='Pending').all()
-        
-        profiles_with_users = []
-        for profile in pending_profiles:
-            user = User.query.get(profile.owner_id)
-            documents = OwnerDocument.query.filter_by(owner_profile_id=profile.id).all()
-            
-            profiles_with_users.append({
-                'profile': profile,
-                'user': user,
-                'documents': documents
-            })
+        page_size = app.config.get('VERIFY_USERS_PAGE_SIZE', 50)
+        after_id = request.args.get('after', 0, type=int)
+        
+        pending = OwnerProfile.verification_status == 'Pending'
+        total_pending = db.session.query(func.count(OwnerProfile.id)).filter(pending).scalar()
+        
+        # Keyset pagination on id: users joined in and documents loaded for the whole page at once
+        rows = db.session.query(OwnerProfile, User)\
+            .join(User, User.id == OwnerProfile.owner_id)\
+            .options(selectinload(OwnerProfile.documents))\
+            .filter(pending, OwnerProfile.id > after_id)\
+            .order_by(OwnerProfile.id)\
+            .limit(page_size + 1)\
+            .all()
+        
+        next_after = rows[page_size - 1][0].id if len(rows) > page_size else None
+        
+        profiles_with_users = [{
+            'profile': profile,
+            'user': user,
+            'documents': profile.documents
+        } for profile, user in rows[:page_size]]
+        
+        return render_template('admin/verify_users.html',
+                               profiles=profiles_with_users,
+                               total_pending=total_pending,
+                               after_id=after_id,
+                               next_after=next_after)
+    
+    def set_verification_status(profile_ids, status):
+        """
+        Set status on the given pending profiles with one UPDATE and queue a notification to
+        each owner. Returns the number of profiles updated.
+        """
+        recipients = db.session.query(OwnerProfile.id, User.email, OwnerProfile.aadhaar_verified)\
+            .join(User, User.id == OwnerProfile.owner_id)\
+            .filter(OwnerProfile.id.in_(profile_ids), OwnerProfile.verification_status == 'Pending')\
+            .all()
+        if not recipients:
+            return 0
+        
+        OwnerProfile.query\
+            .filter(OwnerProfile.id.in_([profile_id for profile_id, _, _ in recipients]),
+                    OwnerProfile.verification_status == 'Pending')\
+            .update({'verification_status': status}, synchronize_session=False)
+        
+        # The bulk UPDATE bypasses the mapper events that keep the dashboard counters current
+        deltas = {}
+        for _, _, aadhaar_verified in recipients:
+            for name in owner_status_counters('Pending', aadhaar_verified):
+                deltas[name] = deltas.get(name, 0) - 1
+            for name in owner_status_counters(status, aadhaar_verified):
+                deltas[name] = deltas.get(name, 0) + 1
+        platform_counters.adjust(deltas)
+        db.session.commit()
         
-        return render_template('admin/verify_users.html', profiles=profiles_with_users)
+        for _, email, _ in recipients:
+            notification_queue.enqueue(
+                to_email=email,
+                subject=f'HouseHelpNetwork: Profile {status}',
+                message=f'Your profile has been {status.lower()}.'
+            )
+        return len(recipients)
     
     @app.route('/admin/verify/<int:profile_id>/<status>', methods=['POST'])
     @login_required
@@ -1262,38 +1284,104 @@ def register_routes(app):
         profile.verification_status = status
         db.session.commit()
         
-        # Get the owner and send notification
+        # Get the owner and queue the notification
         owner = User.query.get(profile.owner_id)
-        send_notification(
-            to=owner.email,
+        notification_queue.enqueue(
+            to_email=owner.email,
             subject=f'HouseHelpNetwork: Profile {status}',
             message=f'Your profile has been {status.lower()}.'
         )
         
         flash(f'Profile {status.lower()} successfully!', 'success')
-        return redirect(url_for('verify_users'))
+        return redirect(url_for('verify_users', after=request.args.get('after', 0, type=int) or None))
+    
+    @app.route('/admin/verify/bulk', methods=['POST'])
+    @login_required
+    @admin_required
+    def bulk_update_verification():
+        status = request.form.get('status')
+        profile_ids = request.form.getlist('profile_ids', type=int)
+        
+        if status not in ['Verified', 'Rejected']:
+            flash('Invalid verification status!', 'danger')
+            return redirect(url_for('verify_users'))
+        if not profile_ids:
+            flash('Select at least one profile.', 'warning')
+            return redirect(url_for('verify_users'))
+        
+        try:
+            updated = set_verification_status(profile_ids, status)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error in bulk verification: {str(e)}")
+            flash(f'Error updating profiles: {str(e)}', 'danger')
+            return redirect(url_for('verify_users'))
+        
+        flash(f'{updated} profile(s) {status.lower()} successfully!', 'success')
+        return redirect(url_for('verify_users', after=request.form.get('after', 0, type=int) or None))
 
     # Owner Dashboard route
     @app.route('/dashboard')
     @login_required
     def owner_dashboard():
         """Dashboard for owners showing their helpers and contracts"""
-        # Get helpers associated with this user (including those created by others)
-        associations = OwnerHelperAssociation.query.filter_by(owner_id=current_user.id).all()
-        helper_ids = [assoc.helper_profile_id for assoc in associations]
-        helpers = HelperProfile.query.filter(HelperProfile.id.in_(helper_ids)).all() if helper_ids else []
-        helpers_count = len(helpers)
-        
-        # Get contracts for this user
-        contracts = Contract.query.filter_by(owner_id=current_user.id).all()
-        
-        # Sort contracts: active contracts first, then terminated contracts
-        sorted_contracts = sorted(contracts, key=lambda c: (c.is_terminated, -c.created_at.timestamp()))
+        contracts_page = max(request.args.get('contracts_page', 1, type=int), 1)
+        helpers_page = max(request.args.get('helpers_page', 1, type=int), 1)
+        contracts_per_page = app.config.get('OWNER_DASHBOARD_CONTRACTS_PER_PAGE', 20)
+        helpers_per_page = app.config.get('OWNER_DASHBOARD_HELPERS_PER_PAGE', 24)
+        
+        # Contracts with their helpers in one joined query: active first, then newest first
+        contracts = Contract.query\
+            .join(Contract.helper_profile)\
+            .options(contains_eager(Contract.helper_profile))\
+            .filter(Contract.owner_id == current_user.id)\
+            .order_by(Contract.is_terminated, Contract.created_at.desc(), Contract.id.desc())\
+            .offset((contracts_page - 1) * contracts_per_page)\
+            .limit(contracts_per_page + 1)\
+            .all()
+        has_more_contracts = len(contracts) > contracts_per_page
+        
+        def render_helper_cards():
+            # Helpers associated with this user (including those created by others), joined through the associations
+            helpers = HelperProfile.query\
+                .join(OwnerHelperAssociation, OwnerHelperAssociation.helper_profile_id == HelperProfile.id)\
+                .filter(OwnerHelperAssociation.owner_id == current_user.id)\
+                .order_by(HelperProfile.name, HelperProfile.id)\
+                .offset((helpers_page - 1) * helpers_per_page)\
+                .limit(helpers_per_page + 1)\
+                .all()
+            has_more_helpers = len(helpers) > helpers_per_page
+            helpers = helpers[:helpers_per_page]
+            if has_more_helpers or helpers_page > 1:
+                helpers_count = db.session.query(func.count(OwnerHelperAssociation.id))\
+                    .filter(OwnerHelperAssociation.owner_id == current_user.id).scalar()
+            else:
+                helpers_count = len(helpers)
+            return {
+                'count': helpers_count,
+                'cards': Markup(render_template('partials/owner_helper_cards.html', helpers=helpers,
+                                                helpers_page=helpers_page, has_more_helpers=has_more_helpers)),
+            }
+        
+        # Rendered cards are cached per owner and page (see owner_dashboard_cache.py)
+        helper_cards = owner_dashboard_cache.cards(current_user.id, helpers_page, render_helper_cards)
+        
+        # The "select helper for contract" modal lists every helper of the owner, not just this page
+        contract_helpers = db.session.query(HelperProfile.helper_id, HelperProfile.name, HelperProfile.helper_type,
+                                            HelperProfile.photo_url)\
+            .join(OwnerHelperAssociation, OwnerHelperAssociation.helper_profile_id == HelperProfile.id)\
+            .filter(OwnerHelperAssociation.owner_id == current_user.id)\
+            .order_by(HelperProfile.name, HelperProfile.id)\
+            .all()
         
         return render_template('owner_dashboard.html', 
-                              helpers=helpers,
-                              helpers_count=helpers_count,
-                              contracts=sorted_contracts)
+                              helper_cards=helper_cards,
+                              contract_helpers=contract_helpers,
+                              helpers_count=helper_cards['count'],
+                              contracts=contracts[:contracts_per_page],
+                              contracts_page=contracts_page,
+                              has_more_contracts=has_more_contracts,
+                              helpers_page=helpers_page)
 
     @app.route('/helpers/<helper_id>/verify', methods=['GET', 'POST'])
     @login_required
@@ -1400,7 +1488,8 @@ def register_routes(app):
                 helper.gender = user_details.get("gender", helper.gender)
                 helper.aadhaar_dob = user_details.get("date_of_birth", "")
                 helper.aadhaar_address = full_address
-                helper.aadhaar_photo = user_details.get("photo", "")
+                helper.aadhaar_photo_hash = user_details.get("photo_hash")
+                helper.aadhaar_photo = None
                 
                 # Update detailed address components
                 helper.address_house = address_dict.get("house", "")
@@ -1488,9 +1577,8 @@ def register_routes(app):
         # Get helper details
         helper = HelperProfile.query.get(contract.helper_profile_id)
         
-        # Get task details
-        task_ids = contract.tasks.split(',') if contract.tasks else []
-        tasks = TaskList.query.filter(TaskList.id.in_(task_ids)).all() if task_ids else []
+        # Get task details from the in-memory catalog
+        tasks = task_catalog.tasks(contract.task_ids())
         
         # Organize tasks by category
         tasks_by_category = {}
@@ -1543,7 +1631,6 @@ def register_routes(app):
     @admin_required
     def admin_aadhaar_logs():
         """Admin view to see all Aadhaar API interactions for debugging and audit purposes"""
-        from sqlalchemy import desc
         from flask import request
         
         # Get query parameters for filtering
@@ -1554,8 +1641,9 @@ def register_routes(app):
         from_date = request.args.get('from_date')
         to_date = request.args.get('to_date')
         
-        # Pagination
-        page = request.args.get('page', 1, type=int)
+        # Keyset pagination on (created_at, id), see aadhaar_logs.py
+        before = request.args.get('before')
+        after = request.args.get('after')
         per_page = request.args.get('per_page', 50, type=int)
         
         # Build query
@@ -1590,34 +1678,24 @@ def register_routes(app):
             except ValueError:
                 pass
         
-        # Order by most recent first
-        query = query.order_by(desc(AadhaarAPILog.created_at))
+        logs_page = log_page(query, before=before, after=after, per_page=per_page)
         
-        # Paginate results
-        logs_pagination = query.paginate(page=page, per_page=per_page)
-        
-        # Get statistics
-        total_logs = AadhaarAPILog.query.count()
-        success_logs = AadhaarAPILog.query.filter_by(success=True).count()
-        failure_logs = total_logs - success_logs
-        success_rate = (success_logs / total_logs * 100) if total_logs > 0 else 0
-        
-        # Count by request type
-        generate_otp_count = AadhaarAPILog.query.filter_by(request_type='generate_otp').count()
-        verify_otp_count = AadhaarAPILog.query.filter_by(request_type='verify_otp').count()
-        token_count = AadhaarAPILog.query.filter_by(request_type='token').count()
+        # All the counters come from one GROUP BY request_type, success
+        stats = log_stats()
         
         return render_template(
             'admin/aadhaar_logs.html',
-            logs=logs_pagination.items,
-            pagination=logs_pagination,
-            total_logs=total_logs,
-            success_logs=success_logs,
-            failure_logs=failure_logs,
-            success_rate=success_rate,
-            generate_otp_count=generate_otp_count,
-            verify_otp_count=verify_otp_count,
-            token_count=token_count,
+            logs=logs_page.logs,
+            older_cursor=logs_page.older_cursor,
+            newer_cursor=logs_page.newer_cursor,
+            per_page=per_page,
+            total_logs=stats['total'],
+            success_logs=stats['success'],
+            failure_logs=stats['failure'],
+            success_rate=stats['success_rate'],
+            generate_otp_count=stats['by_type']['generate_otp'],
+            verify_otp_count=stats['by_type']['verify_otp'],
+            token_count=stats['by_type']['token'],
             request_type=request_type,
             status=status,
             aadhaar_id=aadhaar_id,
@@ -1700,9 +1778,8 @@ def register_routes(app):
             flash('You have already provided feedback for this helper today. Please submit your next review tomorrow to share updated feedback.', 'info')
             return redirect(url_for('contract_detail', contract_id=contract_id))
         
-        # Get tasks for this contract
-        task_ids = contract.tasks.split(',') if contract.tasks else []
-        tasks = TaskList.query.filter(TaskList.id.in_(task_ids)).all() if task_ids else []
+        # Get tasks for this contract from the in-memory catalog
+        tasks = task_catalog.tasks(contract.task_ids())
         
         # Create form
         form = ReviewForm()
@@ -1752,14 +1829,19 @@ def register_routes(app):
                             task_id=task.id,
                             rating=rating
                         )
-                        db.session.add(task_rating)
+                        review.task_ratings.append(task_rating)
                         task_ratings.append(task_rating)
                 
                 # Update tasks_average if we have task ratings
                 if task_ratings:
                     review.tasks_average = task_rating_sum / len(task_ratings)
                 
+                # Store the overall rating and add it to the helper's running totals
+                review.overall_rating = review.calculate_overall_rating()
+                HelperRatingStats.record_review(review)
+                
                 db.session.commit()
+                analytics_cache.invalidate()
                 flash('Review submitted successfully!', 'success')
                 return redirect(url_for('contract_detail', contract_id=contract_id))
                 
@@ -1803,13 +1885,10 @@ def register_routes(app):
             'overall': 0
         }
         
-        if reviews:
-            avg_ratings['punctuality'] = sum(r.punctuality for r in reviews) / len(reviews)
-            avg_ratings['attitude'] = sum(r.attitude for r in reviews) / len(reviews)
-            avg_ratings['hygiene'] = sum(r.hygiene for r in reviews) / len(reviews)
-            avg_ratings['reliability'] = sum(r.reliability for r in reviews) / len(reviews)
-            avg_ratings['communication'] = sum(r.communication for r in reviews) / len(reviews)
-            avg_ratings['overall'] = sum(r.overall_rating for r in reviews) / len(reviews)
+        stats = HelperRatingStats.query.filter_by(helper_profile_id=helper.id).first()
+        if stats:
+            for key in avg_ratings:
+                avg_ratings[key] = stats.average(key)
         
         return render_template('helper_reviews.html', 
                               helper=helper, 
@@ -1,6 +1,12 @@
+import bisect
 import logging
+import os
+import threading
+import time
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -9,10 +15,149 @@ API_KEY = "key_live_5FG3zMrDHspKWq5ifOBYBi5J3rcadaGK"
 API_SECRET = "secret_live_qRHK9amHpJhX3Txja8Aw1pIqMBPA2pTy"
 API_VERSION = "2.0"
 
+# HTTP client settings
+BASE_URL = os.getenv("SANDBOX_API_BASE_URL", "https://api.sandbox.co.in")
+CONNECT_TIMEOUT = 3.05  # Seconds to establish the TCP+TLS connection
+READ_TIMEOUTS = {  # Seconds to wait for the response, per endpoint
+    "authenticate": 10,
+    "generate_otp": 15,
+    "verify_otp": 20,
+}
+POOL_SIZE = 10  # Keep-alive connections kept per host
+MAX_RETRIES = 2  # Retries on top of the first attempt
+BACKOFF_FACTOR = 0.3  # Sleeps 0.3s, 0.6s, ... between retries
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram for one endpoint."""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, elapsed_ms, error=False):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            if error:
+                self.errors += 1
+    
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class SandboxHTTPClient:
+    """
+    Shared keep-alive client for the Sandbox API.
+    
+    One requests.Session with a connection pool, so OTP calls reuse TCP+TLS connections.
+    Every call has a connect and read timeout. Connection failures (request never sent) are
+    retried for all endpoints; timeouts and 429/5xx responses are retried only for calls
+    marked idempotent, since resending an OTP request or verification is not safe.
+    """
+    
+    def __init__(self, base_url=None, pool_size=POOL_SIZE, max_retries=MAX_RETRIES,
+                 backoff_factor=BACKOFF_FACTOR):
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.histograms = {}
+        self._histograms_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        # Connect errors are retried by urllib3; everything else is handled in post()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=max_retries, connect=max_retries, read=0, status=0, other=0,
+                              backoff_factor=backoff_factor, raise_on_status=False)
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def _histogram(self, endpoint):
+        with self._histograms_lock:
+            if endpoint not in self.histograms:
+                self.histograms[endpoint] = LatencyHistogram()
+            return self.histograms[endpoint]
+    
+    def post(self, endpoint, path, idempotent=False, **kwargs):
+        """POST to the API and return the response; raises requests exceptions like requests.post."""
+        url = f"{self.base_url}{path}"
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUTS.get(endpoint, 15))
+        histogram = self._histogram(endpoint)
+        attempt = 0
+        
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.post(url, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                histogram.observe((time.perf_counter() - start) * 1000, error=True)
+                # Connect timeouts were already retried by the adapter
+                retryable = isinstance(e, requests.exceptions.ReadTimeout)
+                if idempotent and retryable and attempt < self.max_retries:
+                    attempt += 1
+                    logger.warning(f"Sandbox {endpoint} attempt {attempt} failed ({e}), retrying")
+                    time.sleep(self.backoff_factor * (2 ** (attempt - 1)))
+                    continue
+                raise
+            
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            histogram.observe(elapsed_ms, error=response.status_code >= 500)
+            logger.debug(f"Sandbox {endpoint} responded {response.status_code} in {elapsed_ms:.0f}ms")
+            
+            if idempotent and response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                attempt += 1
+                logger.warning(f"Sandbox {endpoint} returned {response.status_code}, retry {attempt}")
+                response.close()
+                time.sleep(self.backoff_factor * (2 ** (attempt - 1)))
+                continue
+            return response
+    
+    def latency_histograms(self):
+        with self._histograms_lock:
+            endpoints = list(self.histograms.items())
+        return {endpoint: histogram.snapshot() for endpoint, histogram in endpoints}
+    
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """Return the process-wide Sandbox HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SandboxHTTPClient()
+    return _client
+
+def get_latency_histograms():
+    """Per-endpoint latency histograms of the shared client, e.g. for logging or an admin view."""
+    return get_http_client().latency_histograms()
+
 def get_access_token():
     """Generate an access token from Sandbox API."""
-    url = "https://api.sandbox.co.in/authenticate"
-    
     headers = {
         "accept": "application/json",
         "x-api-key": API_KEY,
@@ -21,7 +166,8 @@ def get_access_token():
     }
     
     try:
-        response = requests.post(url, headers=headers)
+        # Authentication has no side effects, so timeouts and 5xx responses are retried
+        response = get_http_client().post("authenticate", "/authenticate", idempotent=True, headers=headers)
         if response.status_code == 200:
             data = response.json()
             # Extract the access token
@@ -36,7 +182,8 @@ def get_access_token():
             logger.error(f"Failed to get access token: {response.status_code} - {response.text}")
             return {
                 "success": False,
-                "message": f"Failed to authenticate: {response.text}"
+                "message": f"Failed to authenticate: {response.text}",
+                "status_code": response.status_code
             }
     except Exception as e:
         logger.error(f"Exception when getting access token: {str(e)}")
@@ -47,8 +194,6 @@ def get_access_token():
 
 def request_aadhaar_otp(access_token, aadhaar_number):
     """Request OTP for Aadhaar verification."""
-    url = "https://api.sandbox.co.in/kyc/aadhaar/okyc/otp"
-    
     payload = {
         "@entity": "in.co.sandbox.kyc.aadhaar.okyc.otp.request",
         "aadhaar_number": aadhaar_number,
@@ -65,7 +210,7 @@ def request_aadhaar_otp(access_token, aadhaar_number):
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_http_client().post("generate_otp", "/kyc/aadhaar/okyc/otp", json=payload, headers=headers)
         if response.status_code == 200:
             data = response.json()
             # Extract the reference ID
@@ -86,7 +231,8 @@ def request_aadhaar_otp(access_token, aadhaar_number):
             logger.error(f"Failed to request OTP: {response.status_code} - {response.text}")
             return {
                 "success": False,
-                "message": f"Failed to request OTP: {response.text}"
+                "message": f"Failed to request OTP: {response.text}",
+                "status_code": response.status_code
             }
     except Exception as e:
         logger.error(f"Exception when requesting OTP: {str(e)}")
@@ -97,8 +243,6 @@ def request_aadhaar_otp(access_token, aadhaar_number):
 
 def verify_aadhaar_otp(access_token, reference_id, otp):
     """Verify OTP for Aadhaar verification."""
-    url = "https://api.sandbox.co.in/kyc/aadhaar/okyc/otp/verify"
-    
     payload = {
         "@entity": "in.co.sandbox.kyc.aadhaar.okyc.request",
         "reference_id": str(reference_id),
@@ -114,7 +258,7 @@ def verify_aadhaar_otp(access_token, reference_id, otp):
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_http_client().post("verify_otp", "/kyc/aadhaar/okyc/otp/verify", json=payload, headers=headers)
         if response.status_code == 200:
             data = response.json()
             # Extract Aadhaar data
@@ -133,7 +277,8 @@ def verify_aadhaar_otp(access_token, reference_id, otp):
             logger.error(f"Failed to verify OTP: {response.status_code} - {response.text}")
             return {
                 "success": False,
-                "message": f"Failed to verify OTP: {response.text}"
+                "message": f"Failed to verify OTP: {response.text}",
+                "status_code": response.status_code
             }
     except Exception as e:
         logger.error(f"Exception when verifying OTP: {str(e)}")
@@ -1,7 +1,7 @@
 """
 Seed script to populate the languages table with major Indian languages.
 """
-from app import app, db
+from app import script_app as app, db
 from models import Language
 
 def seed_languages():
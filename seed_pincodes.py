@@ -3,7 +3,7 @@ Seed script to populate the pincode_mapping table with data for major metro citi
 """
 import os
 import sys
-from app import app, db
+from app import script_app as app, db
 from models import PincodeMapping
 from flask import Flask
 
@@ -0,0 +1,292 @@
+"""
+Server-side session storage.
+
+Sessions used to live in Flask-Session's filesystem backend: one pickle file per visitor in
+flask_session/, read and written on every request, never swept and local to one server.
+init_session() installs one of two backends instead, chosen with SESSION_BACKEND:
+
+- 'sqlalchemy' (default): the sessions table (models.ServerSession) in the application
+  database, so any app server can serve any request. Reads and writes use short engine
+  connections, never the request's db.session, and each write is a single upsert.
+- 'memory': a bounded LRU dict of serialized sessions, for single-node or development use.
+
+Both sweep expired sessions from a background timer and record serialized session sizes.
+If SESSION_LEGACY_FILE_DIR still exists, sessions missing from the new store are looked up
+there once, copied over and deleted, so users are not logged out by the switch. The leftover
+files are drained by migrations/drain_filesystem_sessions.py.
+"""
+import abc
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+from flask_session.defaults import Defaults
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from extensions import db
+from lazy_daemon import daemon_thread
+from models import ServerSession
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (bytes) of the session size histogram buckets; larger sessions go in the last one
+SESSION_SIZE_BUCKETS = (1024, 4096, 16384, 65536)
+
+
+class SessionSizeMetric:
+    """Histogram of serialized session sizes, recorded on every session write."""
+
+    def __init__(self, buckets=SESSION_SIZE_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.writes = 0
+            self.total_bytes = 0
+            self.max_bytes = 0
+
+    def record(self, size):
+        with self._lock:
+            index = next((i for i, bound in enumerate(self.buckets) if size <= bound), len(self.buckets))
+            self.counts[index] += 1
+            self.writes += 1
+            self.total_bytes += size
+            self.max_bytes = max(self.max_bytes, size)
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+            return {
+                'writes': self.writes,
+                'avg_bytes': round(self.total_bytes / self.writes) if self.writes else 0,
+                'max_bytes': self.max_bytes,
+                'buckets': dict(zip(labels, self.counts)),
+            }
+
+
+session_size_metric = SessionSizeMetric()
+
+
+class LRUSessionStore:
+    """Thread-safe LRU mapping of store id -> (expires_at, serialized session), bounded by entry count."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.evicted = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def sweep(self):
+        """Drop expired entries and return how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _SessionStoreMixin(abc.ABC):
+    """Size metric, legacy filesystem fallback, background sweeping and stats shared by both backends."""
+
+    backend_name = None
+    legacy_cache = None
+    size_warning = None
+
+    def _record_size(self, store_id, size):
+        session_size_metric.record(size)
+        if self.size_warning and size > self.size_warning:
+            logger.warning(f"Session {store_id[:16]}... is {size} bytes")
+
+    @abc.abstractmethod
+    def _retrieve_stored(self, store_id):
+        """Load a session from this backend, or None."""
+
+    def _retrieve_session_data(self, store_id):
+        data = self._retrieve_stored(store_id)
+        if data is None and self.legacy_cache is not None:
+            data = self.legacy_cache.get(store_id)
+            if data is not None:
+                # Move the session out of the old directory on first use
+                sid = store_id[len(self.key_prefix):]
+                self._upsert_session(self.app.permanent_session_lifetime,
+                                     self.session_class(data, sid=sid), store_id)
+                self.legacy_cache.delete(store_id)
+        return data
+
+    @abc.abstractmethod
+    def sweep_expired(self):
+        """Delete expired sessions. Returns the number removed."""
+
+    def start_sweeper(self, interval):
+        """Run sweep_expired() every interval seconds on a daemon thread, from the first request on."""
+        self._sweep_interval = interval
+        self._sweeper = daemon_thread(self._sweep_loop, 'session-sweeper')
+        self.swept = 0
+        self.app.before_request(self._sweeper.ensure)
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self._sweep_interval)
+            try:
+                with self.app.app_context():
+                    removed = self.sweep_expired()
+                self.swept += removed
+                if removed:
+                    logger.info(f"Swept {removed} expired sessions")
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def stats(self):
+        return {'backend': self.backend_name, 'swept': getattr(self, 'swept', 0), 'sizes': session_size_metric.snapshot()}
+
+
+class MemorySession(ServerSideSession):
+    pass
+
+
+class MemorySessionInterface(_SessionStoreMixin, ServerSideSessionInterface):
+    """Keeps serialized sessions in an in-process LRUSessionStore. Sessions are lost on restart."""
+
+    session_class = MemorySession
+    backend_name = 'memory'
+    ttl = True
+
+    def __init__(self, app, max_entries=10000, **kwargs):
+        self.store = LRUSessionStore(max_entries)
+        super().__init__(app, **kwargs)
+
+    def _retrieve_stored(self, store_id):
+        data = self.store.get(store_id)
+        return self.serializer.decode(data) if data is not None else None
+
+    def _delete_session(self, store_id):
+        self.store.delete(store_id)
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        data = self.serializer.encode(session)
+        self._record_size(store_id, len(data))
+        self.store.set(store_id, data, session_lifetime.total_seconds())
+
+    def sweep_expired(self):
+        return self.store.sweep()
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(entries=len(self.store), evicted=self.store.evicted, max_entries=self.store.max_entries)
+        return stats
+
+
+class SQLSession(ServerSideSession):
+    pass
+
+
+class SQLSessionInterface(_SessionStoreMixin, ServerSideSessionInterface):
+    """Sessions in the ServerSession table, read and written through the engine rather than db.session."""
+
+    session_class = SQLSession
+    backend_name = 'sqlalchemy'
+    ttl = True  # Expiry is enforced on read and by the sweeper
+
+    def __init__(self, app, **kwargs):
+        # The sessions table is created with the others by `flask db-init`
+        self.table = ServerSession.__table__
+        super().__init__(app, **kwargs)
+
+    def _retrieve_stored(self, store_id):
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.data, self.table.c.expiry).where(self.table.c.session_id == store_id)
+            ).first()
+        if row is None or row.expiry <= datetime.datetime.utcnow():
+            return None  # Expired rows are left for the sweeper
+        return self.serializer.decode(row.data)
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        data = self.serializer.encode(session)
+        self._record_size(store_id, len(data))
+        expiry = datetime.datetime.utcnow() + session_lifetime
+        # One upsert, so two requests creating the same session cannot both try to INSERT it
+        if db.engine.dialect.name == 'mysql':
+            statement = mysql.insert(self.table).values(session_id=store_id, data=data, expiry=expiry)
+            statement = statement.on_duplicate_key_update(data=statement.inserted.data,
+                                                          expiry=statement.inserted.expiry)
+        else:
+            insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+            statement = insert(self.table).values(session_id=store_id, data=data, expiry=expiry)
+            statement = statement.on_conflict_do_update(
+                index_elements=['session_id'], set_={'data': statement.excluded.data, 'expiry': statement.excluded.expiry})
+        with db.engine.begin() as conn:
+            conn.execute(statement)
+
+    def _delete_session(self, store_id):
+        with db.engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.session_id == store_id))
+
+    def sweep_expired(self):
+        with db.engine.begin() as conn:
+            return conn.execute(self.table.delete().where(self.table.c.expiry <= datetime.datetime.utcnow())).rowcount
+
+
+def init_session(app):
+    """Install the configured session interface on app and return it."""
+    config = app.config
+    backend = config.get('SESSION_BACKEND', 'sqlalchemy').lower()
+    common_params = {
+        'key_prefix': config.get('SESSION_KEY_PREFIX', Defaults.SESSION_KEY_PREFIX),
+        'permanent': config.get('SESSION_PERMANENT', Defaults.SESSION_PERMANENT),
+        'sid_length': config.get('SESSION_ID_LENGTH', Defaults.SESSION_ID_LENGTH),
+    }
+
+    if backend == 'sqlalchemy':
+        interface = SQLSessionInterface(app, **common_params)
+    elif backend == 'memory':
+        interface = MemorySessionInterface(app, max_entries=config.get('SESSION_MEMORY_MAX_ENTRIES', 10000),
+                                           **common_params)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+    interface.size_warning = config.get('SESSION_SIZE_WARNING_BYTES')
+
+    legacy_dir = config.get('SESSION_LEGACY_FILE_DIR')
+    if legacy_dir and os.path.isdir(legacy_dir):
+        from cachelib.file import FileSystemCache
+        interface.legacy_cache = FileSystemCache(legacy_dir)
+
+    interface.start_sweeper(config.get('SESSION_SWEEP_INTERVAL', 300))
+    app.session_interface = interface
+    app.extensions['session_store'] = interface
+    return interface
@@ -8,7 +8,7 @@ This script will:
 import os
 import sys
 import mysql.connector
-from app import app, db
+from app import script_app as app, db
 from models import Language, PincodeMapping, User, HelperProfile, HelperDocument
 import seed_languages
 import seed_pincodes
@@ -90,7 +90,7 @@ if __name__ == "__main__":
         # Now that the database exists, create all tables
         try:
             print("Creating database tables...")
-            from app import app, db
+            from app import script_app as app, db
             with app.app_context():
                 db.create_all()
                 print("Tables created successfully.")
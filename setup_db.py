@@ -53,7 +53,7 @@ if __name__ == "__main__":
         # Now that the database exists, create all tables
         try:
             print("Creating database tables...")
-            from app import app, db
+            from app import script_app as app, db
             with app.app_context():
                 db.create_all()
                 print("Tables created successfully.")
@@ -0,0 +1,58 @@
+"""
+Base class for small, read-mostly tables that each worker keeps in memory.
+
+The pincode index, language choices and task catalog are rebuilt from their table when
+this worker writes to it (invalidate()) and when another worker does. Other workers'
+changes are noticed through a cheap (COUNT, MAX(id)) signature query, run at most once
+every check interval; an unchanged signature keeps the current snapshot.
+"""
+import abc
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from extensions import db
+
+
+class TableSnapshot(abc.ABC):
+    """
+    Subclasses set model, check_interval_setting (a config key) and default_check_interval,
+    implement _rebuild(), and call _ensure_fresh() before each read.
+    """
+
+    model = None
+    check_interval_setting = None
+    default_check_interval = 300
+
+    def __init__(self):
+        self.version = 0
+        self._signature = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _rebuild(self):
+        """Reload the snapshot from the table. Runs under self._lock, after version is bumped."""
+
+    def _table_signature(self):
+        return tuple(db.session.query(func.count(self.model.id), func.max(self.model.id)).one())
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        interval = current_app.config.get(self.check_interval_setting, self.default_check_interval)
+        if not self._stale and now - self._checked_at < interval:
+            return
+        signature = self._table_signature()
+        with self._lock:
+            if self._stale or signature != self._signature:
+                self.version += 1
+                self._rebuild()
+                self._signature = signature
+                self._stale = False
+            self._checked_at = now
+
+    def invalidate(self):
+        """Rebuild on the next read. Call after writing to the table."""
+        with self._lock:
+            self._stale = True
@@ -0,0 +1,114 @@
+"""
+In-process, versioned snapshot of the task_list table.
+
+The contract form lists every task of a helper type by category, and contract pages and
+the review form show a contract's tasks by ID. Tasks only change through /admin/tasks, so
+each worker builds one immutable TaskCatalog and serves all of that from memory: the
+categories of each helper type, the main-task/subtask tree, the prebuilt select choices
+and ID lookups, with no query.
+
+The admin task routes call invalidate() after they commit, and the next read builds a new
+catalog with the next version number. A catalog is never changed once built, so a request
+holding one keeps a consistent view while another is built. Other workers notice admin
+changes at most TASK_CATALOG_CHECK_INTERVAL seconds later (see table_snapshot.py).
+"""
+from collections import namedtuple
+from types import MappingProxyType
+from extensions import db
+from models import TaskList
+from table_snapshot import TableSnapshot
+
+CATEGORY_SEPARATOR = " - "  # Between category and task name in choice labels
+
+Task = namedtuple('Task', 'id name category helper_type is_main_task parent_id')
+
+# Per helper type: category names in table order, (main task, subtasks) pairs, and the
+# (id, "Category - Name") select choices of the selectable subtasks.
+HelperTypeTasks = namedtuple('HelperTypeTasks', 'categories tree choices')
+
+NO_TASKS = HelperTypeTasks((), (), ())
+
+
+class TaskCatalog:
+    """One immutable build of the task table."""
+
+    def __init__(self, rows, version):
+        self.version = version
+        tasks = [Task(row.id, row.name, row.category, row.helper_type, bool(row.is_main_task), row.parent_id)
+                 for row in rows]
+        self.by_id = MappingProxyType({task.id: task for task in tasks})
+
+        subtasks = {}
+        for task in tasks:
+            if not task.is_main_task and task.parent_id is not None:
+                subtasks.setdefault(task.parent_id, []).append(task)
+
+        by_type = {}
+        for helper_type in dict.fromkeys(task.helper_type for task in tasks):
+            of_type = [task for task in tasks if task.helper_type == helper_type]
+            by_type[helper_type] = HelperTypeTasks(
+                categories=tuple(dict.fromkeys(task.category for task in of_type)),
+                tree=tuple((task, tuple(subtasks.get(task.id, ()))) for task in of_type if task.is_main_task),
+                # Main tasks only head their category in the UI and are not selectable
+                choices=tuple((str(task.id), f"{task.category}{CATEGORY_SEPARATOR}{task.name}")
+                              for task in self._by_category(of_type) if not task.is_main_task),
+            )
+        self.by_type = MappingProxyType(by_type)
+
+    @staticmethod
+    def _by_category(tasks):
+        """Tasks grouped by category, categories in order of first appearance."""
+        grouped = {}
+        for task in tasks:
+            grouped.setdefault(task.category, []).append(task)
+        return [task for group in grouped.values() for task in group]
+
+    def helper_type(self, helper_type):
+        return self.by_type.get(helper_type, NO_TASKS)
+
+    def tasks(self, task_ids):
+        """Tasks for the given IDs in ID order; unknown IDs are skipped."""
+        return [self.by_id[task_id] for task_id in sorted(set(task_ids)) if task_id in self.by_id]
+
+
+class TaskCatalogCache(TableSnapshot):
+
+    model = TaskList
+    check_interval_setting = 'TASK_CATALOG_CHECK_INTERVAL'
+
+    def __init__(self):
+        super().__init__()
+        self._catalog = None
+
+    def _rebuild(self):
+        rows = db.session.query(TaskList.id, TaskList.name, TaskList.category, TaskList.helper_type,
+                                TaskList.is_main_task, TaskList.parent_id).order_by(TaskList.id).all()
+        self._catalog = TaskCatalog(rows, self.version)
+
+    def catalog(self):
+        """The current TaskCatalog, rebuilt first if it was invalidated or the table changed."""
+        self._ensure_fresh()
+        return self._catalog
+
+    def choices(self, helper_type):
+        """Select choices of a helper type's subtasks, grouped by category."""
+        return list(self.catalog().helper_type(helper_type).choices)
+
+    def get(self, task_id):
+        """A task by ID (int or string), or None."""
+        try:
+            return self.catalog().by_id.get(int(task_id))
+        except (TypeError, ValueError):
+            return None
+
+    def tasks(self, task_ids):
+        """Tasks for the given IDs in ID order; unknown IDs are skipped."""
+        return self.catalog().tasks(task_ids)
+
+    def stats(self):
+        catalog = self._catalog
+        return {'version': catalog.version if catalog else None, 'builds': self.version,
+                'tasks': len(catalog.by_id) if catalog else 0, 'stale': self._stale}
+
+
+task_catalog = TaskCatalogCache()
@@ -0,0 +1,124 @@
+"""
+Tests for the Aadhaar log statistics, keyset pages and archiving.
+
+Run with: python -m unittest test_aadhaar_logs
+"""
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from models import AadhaarAPILog
+from aadhaar_logs import archive_logs, archive_path, log_page, log_stats
+
+NOW = datetime.datetime(2026, 6, 15, 12, 0, 0)
+
+
+class AadhaarLogsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'logs.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def add_logs(self, count, request_type='generate_otp', success=True, created_at=NOW, step=None):
+        logs = []
+        for number in range(count):
+            logs.append(AadhaarAPILog(request_type=request_type, success=success, aadhaar_id="123412341234",
+                                      request_payload={'n': number},
+                                      created_at=created_at + (step or datetime.timedelta()) * number))
+        db.session.add_all(logs)
+        db.session.commit()
+        return logs
+
+    def test_stats_come_from_one_grouped_query(self):
+        self.add_logs(3)
+        self.add_logs(1, success=False)
+        self.add_logs(2, request_type='verify_otp', success=False)
+        self.add_logs(1, request_type='token')
+
+        stats = log_stats()
+        self.assertEqual((stats['total'], stats['success'], stats['failure']), (7, 4, 3))
+        self.assertAlmostEqual(stats['success_rate'], 4 / 7 * 100)
+        self.assertEqual(stats['by_type'], {'token': 1, 'generate_otp': 4, 'verify_otp': 2})
+
+    def test_keyset_pages_walk_both_ways(self):
+        # Pairs of rows share a timestamp, so the id breaks ties
+        for minute in range(5):
+            self.add_logs(2, created_at=NOW + datetime.timedelta(minutes=minute))
+        newest_first = [log.id for log in AadhaarAPILog.query.order_by(AadhaarAPILog.created_at.desc(),
+                                                                        AadhaarAPILog.id.desc())]
+        query = AadhaarAPILog.query
+
+        pages, page = [], log_page(query, per_page=3)
+        self.assertIsNone(page.newer_cursor)
+        while True:
+            pages.append([log.id for log in page.logs])
+            if not page.older_cursor:
+                break
+            page = log_page(query, before=page.older_cursor, per_page=3)
+        self.assertEqual(sum(pages, []), newest_first)
+        self.assertEqual(len(pages[-1]), 1)
+
+        back = log_page(query, after=page.newer_cursor, per_page=3)
+        self.assertEqual([log.id for log in back.logs], pages[-2])
+        self.assertIsNotNone(back.newer_cursor)
+        self.assertEqual(log_page(query, before="not-a-cursor").logs[0].id, newest_first[0])
+
+    def test_logs_without_created_at_page_as_the_oldest(self):
+        self.add_logs(3, step=datetime.timedelta(minutes=1))
+        db.session.execute(AadhaarAPILog.__table__.insert(),
+                           [{'request_type': 'token', 'success': True, 'created_at': None} for _ in range(3)])
+        db.session.commit()
+        undated = [log.id for log in AadhaarAPILog.query.filter(AadhaarAPILog.created_at.is_(None))
+                   .order_by(AadhaarAPILog.id.desc())]
+        dated = [log.id for log in AadhaarAPILog.query.filter(AadhaarAPILog.created_at.isnot(None))
+                 .order_by(AadhaarAPILog.created_at.desc())]
+        query = AadhaarAPILog.query
+
+        pages, page = [], log_page(query, per_page=2)
+        while True:
+            pages.append([log.id for log in page.logs])
+            if not page.older_cursor:
+                break
+            page = log_page(query, before=page.older_cursor, per_page=2)
+        self.assertEqual(sum(pages, []), dated + undated)
+
+        # Back from the last page, whose rows have no created_at, across into the dated rows
+        back = log_page(query, after=page.newer_cursor, per_page=2)
+        self.assertEqual([log.id for log in back.logs], pages[-2])
+        back = log_page(query, after=back.newer_cursor, per_page=2)
+        self.assertEqual([log.id for log in back.logs], pages[-3])
+
+    def test_archive_moves_old_logs_to_daily_files(self):
+        self.add_logs(3, created_at=NOW - datetime.timedelta(days=100), step=datetime.timedelta(hours=10))
+        recent = self.add_logs(1, created_at=NOW - datetime.timedelta(days=5))
+        archive_dir = os.path.join(self.tmp_dir.name, 'archive')
+
+        self.assertEqual(archive_logs(archive_dir, retention_days=90, batch_size=2, now=NOW), 3)
+        self.assertEqual([log.id for log in AadhaarAPILog.query.all()], [recent[0].id])
+
+        first_day = (NOW - datetime.timedelta(days=100)).date()
+        with gzip.open(archive_path(archive_dir, first_day), 'rt') as archive:
+            records = [json.loads(line) for line in archive]
+        self.assertEqual([record['request_payload'] for record in records], [{'n': 0}, {'n': 1}])
+        self.assertEqual(len(os.listdir(archive_dir)), 2)
+        self.assertEqual(archive_logs(archive_dir, retention_days=90, now=NOW), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for the admin analytics queries and their cache.
+
+Run with: python -m unittest test_analytics_cache
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import event
+import analytics_cache
+from extensions import db
+from models import HelperProfile, HelperRatingStats
+
+
+class AnalyticsCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'analytics.db')}"
+        self.app.config['ADMIN_ANALYTICS_CACHE_TTL'] = 3600
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record_statement)
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def record_statement(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def add_city(self, city, ratings, helper_type="maid"):
+        """One rated helper per entry of ratings, each with a single review of that overall rating."""
+        for number, rating in enumerate(ratings):
+            helper = HelperProfile(name=f"{city} {number}", helper_id=f"{city}-{number}", helper_type=helper_type,
+                                   phone_number="9000000000", languages="Hindi", created_by=1)
+            helper.city = city
+            db.session.add(helper)
+            db.session.flush()
+            db.session.add(HelperRatingStats(helper_profile_id=helper.id, review_count=1, overall_sum=rating,
+                                             **{f'{value}_sum': rating for value in HelperRatingStats.CORE_VALUES}))
+        db.session.commit()
+
+    def test_top_three_per_city(self):
+        self.add_city("Chennai", [3.0, 4.5, 2.0, 5.0, 4.0])
+        self.add_city("Pune", [1.0])
+        by_city = analytics_cache.top_helpers_by_city()
+
+        self.assertEqual(list(by_city), ["Chennai", "Pune"])
+        self.assertEqual([(helper['helper_id'], rating) for helper, rating, _ in by_city["Chennai"]],
+                         [("Chennai-3", 5.0), ("Chennai-1", 4.5), ("Chennai-4", 4.0)])
+        self.assertEqual(by_city["Pune"][0][0]['name'], "Pune 0")
+
+        with mock.patch('analytics_cache.supports_window_functions', return_value=False):
+            self.assertEqual(analytics_cache.top_helpers_by_city(), by_city)
+
+    def test_query_count_does_not_grow_with_cities(self):
+        self.add_city("Chennai", [4.0, 3.0])
+        self.statements.clear()
+        analytics_cache.build_payload()
+        few_cities = len(self.statements)
+
+        for number in range(20):
+            self.add_city(f"City {number:02d}", [4.0, 3.0, 2.0, 1.0])
+        self.statements.clear()
+        payload = analytics_cache.build_payload()
+        self.assertEqual(len(self.statements), few_cities)
+        self.assertEqual(len(payload['top_helpers_by_city']), 21)
+
+    def test_payload_is_cached_until_invalidated(self):
+        self.add_city("Chennai", [4.0])
+        cache = analytics_cache.AnalyticsCache()
+        first = cache.payload()
+        self.statements.clear()
+        self.assertIs(cache.payload(), first)
+        self.assertEqual(self.statements, [])
+
+        self.add_city("Pune", [5.0])
+        cache.invalidate()
+        self.assertEqual(cache.payload()['top_helpers'][0][0]['city'], "Pune")
+        self.assertEqual((cache.stats()['hits'], cache.stats()['builds']), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
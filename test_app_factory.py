@@ -0,0 +1,45 @@
+"""
+Tests that building the app does not touch the database, and for `flask db-init`.
+
+Run with: python -m unittest test_app_factory
+"""
+import unittest
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from conftest import AppTestCase
+from extensions import db
+import app as app_module
+
+
+class AppFactoryTestCase(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.statements = []
+        event.listen(Engine, 'before_cursor_execute', self.record_statement)
+        self.addCleanup(event.remove, Engine, 'before_cursor_execute', self.record_statement)
+
+    def record_statement(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def test_building_apps_sends_no_queries(self):
+        web_app = self.create_app()
+        script_app = app_module.create_script_app(self.config_name)
+        self.assertEqual(self.statements, [])
+        self.assertIn('login', web_app.view_functions)
+        self.assertIn('check_aadhaar', web_app.view_functions)
+        self.assertNotIn('login', script_app.view_functions)
+
+    def test_db_init_creates_tables(self):
+        web_app = self.create_app()
+        result = web_app.test_cli_runner().invoke(args=['db-init'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with web_app.app_context():
+            tables = inspect(db.engine).get_table_names()
+        self.assertIn('users', tables)
+        self.assertIn('sessions', tables)
+
+
+if __name__ == "__main__":
+    unittest.main()
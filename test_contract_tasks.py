@@ -0,0 +1,88 @@
+"""
+Tests for the contract_tasks join table and per-task analytics.
+
+Run with: python -m unittest test_contract_tasks
+"""
+import datetime
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from generate_analytics import contract_counts_by_task, task_ratings_by_city
+from models import (Contract, HelperProfile, Review, ReviewTaskRating, TaskList, User,
+                    legacy_task_string)
+
+
+class ContractTasksTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'contracts.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = User(name="Owner", email="owner@example.com", phone_number="9000000000", password_hash="x")
+        self.ironing = TaskList(name="Ironing")
+        self.cooking = TaskList(name="Cooking")
+        db.session.add_all([self.owner, self.ironing, self.cooking])
+        db.session.flush()
+        self.helpers = []
+        for i, city in enumerate(["Bangalore", "Bangalore", "Mumbai"]):
+            helper = HelperProfile(name=f"Helper {i}", helper_id=f"H{i}", helper_type="maid",
+                                   phone_number="9000000001", languages="Hindi", created_by=self.owner.id)
+            helper.city = city
+            self.helpers.append(helper)
+        db.session.add_all(self.helpers)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def add_contract(self, helper, task_ids):
+        contract = Contract(contract_id=f"C{helper.id}", helper_profile_id=helper.id, owner_id=self.owner.id,
+                            start_date=datetime.date(2024, 1, 1), monthly_salary=10000)
+        contract.set_tasks(task_ids)
+        db.session.add(contract)
+        db.session.commit()
+        return contract
+
+    def test_set_tasks_fills_join_table_and_legacy_string(self):
+        contract = self.add_contract(self.helpers[0], [str(self.cooking.id), str(self.ironing.id), "999", ""])
+        db.session.expire_all()
+        self.assertEqual([task.name for task in contract.task_items], ["Ironing", "Cooking"])
+        self.assertEqual(contract.tasks, f"{self.ironing.id},{self.cooking.id}")
+
+        self.add_contract(self.helpers[1], [self.cooking.id])
+        self.assertEqual(Contract.including_task(self.cooking.id).count(), 2)
+        self.assertEqual(Contract.including_task(self.ironing.id).one().id, contract.id)
+
+    def test_legacy_string_is_cut_at_a_whole_id(self):
+        task_string = legacy_task_string(range(1000, 1100), max_length=20)
+        self.assertEqual(task_string, "1000,1001,1002,1003")
+
+    def test_task_aggregates_by_city(self):
+        for helper, rating in zip(self.helpers, [5, 3, 1]):
+            contract = self.add_contract(helper, [self.ironing.id])
+            review = Review(review_id=f"R{helper.id}", helper_profile_id=helper.id, owner_id=self.owner.id,
+                            contract_id=contract.id, punctuality=4, attitude=4, hygiene=4, reliability=4)
+            db.session.add(review)
+            db.session.flush()
+            db.session.add(ReviewTaskRating(review_id=review.id, task_id=self.ironing.id, rating=rating))
+        db.session.commit()
+
+        (row,) = task_ratings_by_city(task_name="Ironing", city="Bangalore")
+        self.assertEqual((row.city, row.avg_rating, row.ratings_count), ("Bangalore", 4.0, 2))
+        self.assertEqual([(row.city, row.contracts_count) for row in contract_counts_by_task()],
+                         [("Bangalore", 2), ("Mumbai", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Tests that the route queries listed in explain_queries.py are served by indexes.
+
+Run with: python -m unittest test_explain_queries
+"""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from explain_queries import audit, explain_query
+from models import HelperProfile
+
+
+class ExplainQueriesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'explain.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def test_route_queries_use_indexes(self):
+        plans = audit()
+        self.assertTrue(all(plan.statements for plan in plans))
+        self.assertEqual([plan.name for plan in plans if plan.full_scans], [])
+
+    def test_full_scans_are_flagged(self):
+        plan = explain_query('name search', lambda: HelperProfile.query.filter(HelperProfile.name.ilike('%asha%')).all())
+        self.assertEqual(plan.full_scans, ['helper_profiles'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests that the grouped analytics queries build the same frame as the old per-helper loop.
+
+Run with: python -m unittest test_generate_analytics
+"""
+import datetime
+import os
+import tempfile
+import unittest
+
+from benchmark_analytics import (build_helper_analytics_frame_per_helper, compare_frames, create_benchmark_app,
+                                 seed_synthetic_data)
+from extensions import db
+from generate_analytics import ANALYTICS_COLUMNS, build_helper_analytics_frame
+from models import HelperProfile, Review
+
+
+class HelperAnalyticsFrameTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = create_benchmark_app(os.path.join(self.tmp_dir.name, 'analytics.db'))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def test_no_reviews_gives_an_empty_frame(self):
+        db.create_all()
+        frame = build_helper_analytics_frame()
+        self.assertTrue(frame.empty)
+        self.assertEqual(list(frame.columns), ANALYTICS_COLUMNS)
+
+    def test_grouped_frame_matches_the_per_helper_loop(self):
+        seed_synthetic_data(num_helpers=60, reviews_per_helper=4, seed=7)
+        # A helper with an empty city and no state counts as "Unknown, Unknown" in both
+        helper = HelperProfile(name='Blank city', helper_id='BLANK', helper_type='maid', phone_number='9000000000',
+                               languages=None, created_by=1)
+        helper.city = ''
+        db.session.add(helper)
+        db.session.flush()
+        db.session.add(Review(review_id='REV-BLANK', helper_profile_id=helper.id, owner_id=1, contract_id=1,
+                              punctuality=4, attitude=3, hygiene=5, reliability=4, communication=2,
+                              overall_rating=3.6, review_date=datetime.date(2024, 1, 1)))
+        db.session.commit()
+
+        legacy = build_helper_analytics_frame_per_helper()
+        db.session.remove()
+        grouped = build_helper_analytics_frame()
+
+        self.assertEqual(list(grouped.columns), ANALYTICS_COLUMNS)
+        self.assertEqual(list(grouped['helper_id']), list(legacy['helper_id']))
+        self.assertGreater(len(grouped.index), 50)
+        self.assertEqual(compare_frames(legacy, grouped), 0)
+        blank = grouped[grouped['helper_id'] == 'BLANK'].iloc[0]
+        self.assertEqual(blank['location'], 'Unknown, Unknown')
+        self.assertEqual(blank['task_ratings'], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the helper_languages join table and the cached language table.
+
+Run with: python -m unittest test_helper_languages
+"""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from language_table import DEFAULT_LANGUAGES, LanguageTable
+from models import HelperProfile, Language
+
+
+class HelperLanguagesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'languages.db')}"
+        self.app.config['LANGUAGE_TABLE_CHECK_INTERVAL'] = 3600
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.table = LanguageTable()
+        self.table.ensure_defaults()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def language_id(self, name):
+        return next(language_id for language_id, language_name in self.table.choices() if language_name == name)
+
+    def add_helper(self, helper_id, language_ids):
+        helper = HelperProfile(name=helper_id, helper_id=helper_id, helper_type="maid", phone_number="9000000000",
+                               languages=None, created_by=1)
+        helper.set_languages(language_ids)
+        db.session.add(helper)
+        db.session.commit()
+        return helper
+
+    def test_choices_are_seeded_and_cached(self):
+        self.assertEqual([name for _, name in self.table.choices()], sorted(DEFAULT_LANGUAGES))
+        db.session.add(Language(name="Kannada"))
+        db.session.commit()
+        self.assertIsNone(self.table.name(Language.query.filter_by(name="Kannada").one().id))
+        self.table.invalidate()
+        self.assertIn("Kannada", [name for _, name in self.table.choices()])
+
+    def test_set_languages_and_speaking_filter(self):
+        tamil, hindi = self.language_id("Tamil"), self.language_id("Hindi")
+        helper = self.add_helper("H1", [str(tamil), str(hindi), "999", "x"])
+        self.add_helper("H2", [hindi])
+        none = self.add_helper("H3", [])
+
+        self.assertEqual(helper.languages, "Hindi, Tamil")
+        self.assertEqual(none.languages, "Not specified")
+        self.assertEqual([h.helper_id for h in HelperProfile.speaking(tamil)], ["H1"])
+        self.assertEqual(sorted(h.helper_id for h in HelperProfile.speaking(hindi)), ["H1", "H2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
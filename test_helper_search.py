@@ -0,0 +1,120 @@
+"""
+Tests for the in-process helper search index.
+
+Run with: python -m unittest test_helper_search
+"""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from models import User, HelperProfile, Language
+from helper_search import helper_search, phonetic_key, skeleton_key
+
+
+class HelperSearchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'search.db')}"
+        self.app.config['HELPER_SEARCH_CHECK_INTERVAL'] = 0
+        db.init_app(self.app)
+        helper_search.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = User(name="Owner", email="owner@example.com", phone_number="1", password_hash="x")
+        self.hindi, self.tamil = Language(name="Hindi"), Language(name="Tamil")
+        db.session.add_all([self.owner, self.hindi, self.tamil])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def add_helper(self, name, helper_id, city=None, languages=(), status='Unverified'):
+        helper = HelperProfile(name=name, helper_id=helper_id, helper_type="maid", phone_number="1",
+                               languages=", ".join(language.name for language in languages), created_by=self.owner.id)
+        helper.city = city
+        helper.verification_status = status
+        helper.spoken_languages = list(languages)
+        db.session.add(helper)
+        db.session.commit()
+        return helper
+
+    def search(self, term, language=None, limit=20, offset=0):
+        helpers, has_more = helper_search.find(term, language.id if language else None, limit, offset)
+        return [helper.helper_id for helper in helpers]
+
+    def test_keys_fold_transliterations(self):
+        self.assertEqual(phonetic_key("lakshmi"), phonetic_key("laxmi"))
+        self.assertEqual(phonetic_key("seeta"), phonetic_key("sita"))
+        self.assertEqual(skeleton_key("mohammed"), skeleton_key("muhammad"))
+
+    def test_spelling_variants_and_ranking(self):
+        self.add_helper("Laxmi Devi", "H1")
+        self.add_helper("Lakshmi Bai", "H2", city="Pune")
+        self.add_helper("Lakshmi Devi", "H3")
+        self.add_helper("Sunita Devi", "H4")
+        helper_search.build()
+
+        # Exact spelling beats the phonetic match; matching both words beats either
+        self.assertEqual(self.search("lakshmi"), ["H3", "H2", "H1"])
+        self.assertEqual(self.search("laxmi devi"), ["H1", "H3", "H4", "H2"])
+        self.assertEqual(self.search("lakshmi pune")[0], "H2")
+        self.assertEqual(self.search("laks"), ["H3", "H2"])
+        self.assertEqual(self.search("H4"), ["H4"])
+
+    def test_verified_first_and_pages(self):
+        for number in range(5):
+            self.add_helper("Meena", f"H{number}", status='Verified' if number == 1 else 'Unverified')
+        helper_search.build()
+
+        self.assertEqual(self.search("meena", limit=2), ["H1", "H4"])
+        helpers, has_more = helper_search.find("meena", limit=2, offset=4)
+        self.assertEqual(([helper.helper_id for helper in helpers], has_more), (["H0"], False))
+
+    def test_language_filter(self):
+        self.add_helper("Kavita", "H1", languages=[self.hindi])
+        self.add_helper("Kavita", "H2", languages=[self.tamil])
+        self.add_helper("Ravi", "H3", languages=[self.hindi, self.tamil])
+        helper_search.build()
+
+        self.assertEqual(self.search("kavita", self.tamil), ["H2"])
+        self.assertEqual(self.search("", self.hindi), ["H3", "H1"])
+        self.assertEqual(self.search("tamil"), ["H3", "H2"])
+        self.assertEqual(self.search("H1", self.tamil), [])
+
+    def test_commits_update_the_index(self):
+        helper = self.add_helper("Geeta", "H1")
+        helper_search.build()
+
+        self.add_helper("Gita Rani", "H2")
+        helper.name = "Radha"
+        db.session.commit()
+        self.assertEqual(self.search("gita"), ["H2"])
+        self.assertEqual(self.search("radha"), ["H1"])
+
+        uncommitted = HelperProfile(name="Gita", helper_id="H3", helper_type="maid", phone_number="1",
+                                    languages="", created_by=self.owner.id)
+        db.session.add(uncommitted)
+        db.session.flush()
+        db.session.rollback()
+        db.session.delete(HelperProfile.query.filter_by(helper_id="H2").one())
+        db.session.commit()
+        self.assertEqual(self.search("gita"), [])
+        self.assertEqual(helper_search.stats()['documents'], 1)
+
+    def test_falls_back_to_sql_before_the_index_is_built(self):
+        helper_search._data = None
+        self.add_helper("Anjali", "H1")
+        self.assertEqual(self.search("anj"), ["H1"])
+        self.assertGreaterEqual(helper_search.stats()['fallbacks'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for the streaming pincode CSV importer.
+
+Run with: python -m unittest test_import_pincodes
+"""
+import io
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from models import PincodeMapping
+from import_pincodes import import_pincode_csv
+
+
+def csv_bytes(rows):
+    lines = ["pincode,state,city,society"] + [",".join(row) for row in rows]
+    return io.BytesIO(("\n".join(lines) + "\n").encode())
+
+
+class ImportPincodesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'pincodes.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def test_imports_in_chunks_and_reports_progress(self):
+        rows = [(f"{400000 + i}", "Maharashtra", "Mumbai", f"Society {i}") for i in range(25)]
+        progress = []
+        stats = import_pincode_csv(csv_bytes(rows), chunk_size=10, progress=lambda s: progress.append(s.added_rows))
+
+        self.assertEqual(stats.added_rows, 25)
+        self.assertEqual(stats.chunks, 3)
+        self.assertEqual(progress, [10, 20, 25])
+        self.assertEqual(PincodeMapping.query.count(), 25)
+
+    def test_skips_duplicates_in_file_and_table(self):
+        db.session.add(PincodeMapping(pincode="560001", city="Bangalore", state="Karnataka", society="MG Road"))
+        db.session.commit()
+
+        rows = [
+            ("560001", "Karnataka", "Bangalore", "Already there"),
+            ("560034", "Karnataka", "Bangalore", "Koramangala"),
+            ("560034", "Karnataka", "Bangalore", "Repeated in file"),
+            ("560066", "", "Bangalore", "Missing state"),
+            ("560103",),
+        ]
+        stats = import_pincode_csv(csv_bytes(rows), chunk_size=2)
+
+        self.assertEqual((stats.total_rows, stats.added_rows, stats.skipped_rows, stats.error_rows), (5, 1, 4, 0))
+        self.assertEqual(PincodeMapping.query.filter_by(pincode="560034").one().society, "Koramangala")
+
+    def test_rejects_values_longer_than_columns(self):
+        stats = import_pincode_csv(csv_bytes([("110001", "Delhi", "New Delhi", "x" * 101)]))
+        self.assertEqual(stats.error_rows, 1)
+        self.assertEqual(PincodeMapping.query.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
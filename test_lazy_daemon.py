@@ -0,0 +1,50 @@
+"""
+Tests for lazily started background threads.
+
+Run with: python -m unittest test_lazy_daemon
+"""
+import threading
+import unittest
+
+from lazy_daemon import LazyDaemon, daemon_thread
+
+
+class LazyDaemonTestCase(unittest.TestCase):
+
+    def test_thread_starts_on_first_use_and_again_after_it_dies(self):
+        runs, starts = [], []
+        daemon = daemon_thread(lambda: runs.append(threading.current_thread().name), 'test-daemon',
+                               before_start=lambda: starts.append(True))
+        self.assertIsNone(daemon.current)
+
+        self.assertIsNone(daemon.ensure())  # Usable as a before_request hook
+        daemon.join(timeout=1)
+        self.assertTrue(daemon.current.daemon)
+        daemon.ensure()
+        daemon.join(timeout=1)
+        self.assertEqual(runs, ['test-daemon', 'test-daemon'])
+        self.assertEqual(len(starts), 2)
+
+    def test_live_daemons_are_started_once(self):
+        started = []
+        stop = threading.Event()
+
+        def start():
+            thread = threading.Thread(target=stop.wait)
+            thread.start()
+            started.append(thread)
+            return thread
+
+        daemon = LazyDaemon(start)
+        threads = [threading.Thread(target=daemon.ensure) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(started), 1)
+        stop.set()
+        daemon.join(timeout=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for the background Aadhaar API log writer.
+
+Run with: python -m unittest test_log_sink
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import event
+from extensions import db
+from models import AadhaarAPILog
+from log_sink import APILogSink
+
+
+class APILogSinkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'logs.db')}"
+        self.app.config['API_LOG_BATCH_SIZE'] = 50
+        self.app.config['API_LOG_QUEUE_SIZE'] = 1000
+        self.app.config['API_LOG_FLUSH_INTERVAL'] = 0.05
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+        with mock.patch('log_sink.atexit.register'):
+            self.sink = APILogSink(self.app)
+
+    def tearDown(self):
+        self.sink.shutdown(timeout=2)
+        with self.app.app_context():
+            db.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_rows_are_written_in_batches(self):
+        inserts = []
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda conn, cursor, statement, *args: inserts.append(statement)
+                         if statement.startswith('INSERT') else None)
+
+        for i in range(120):
+            self.sink.enqueue(request_type='generate_otp', aadhaar_id=f"{i:012d}", success=True,
+                              request_payload={"aadhaar_id": f"{i:012d}"})
+        self.assertTrue(self.sink.flush(timeout=5))
+
+        with self.app.app_context():
+            self.assertEqual(AadhaarAPILog.query.count(), 120)
+            log = AadhaarAPILog.query.filter_by(aadhaar_id="000000000007").first()
+            self.assertEqual(log.request_payload, {"aadhaar_id": "000000000007"})
+            self.assertIsNotNone(log.created_at)
+        self.assertLessEqual(len(inserts), 120 // 50 + 2)
+        self.assertEqual(self.sink.stats()['written'], 120)
+
+    def test_full_queue_drops_and_counts(self):
+        with mock.patch('log_sink.atexit.register'):
+            sink = APILogSink(self.app)
+        sink.queue.maxsize = 3
+        with mock.patch.object(sink._worker, 'ensure'):  # Keep the queue from draining
+            results = [sink.enqueue(request_type='token', success=True) for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(sink.stats()['dropped'], 2)
+
+        sink.shutdown(timeout=5)
+        with self.app.app_context():
+            self.assertEqual(AadhaarAPILog.query.count(), 3)
+
+    def test_shutdown_flushes_pending_rows(self):
+        for _ in range(10):
+            self.sink.enqueue(request_type='verify_otp', success=False, error_message='Invalid OTP')
+        self.sink.shutdown(timeout=5)
+        with self.app.app_context():
+            self.assertEqual(AadhaarAPILog.query.filter_by(request_type='verify_otp').count(), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Tests for the background notification sender.
+
+Run with: python -m unittest test_notifications
+"""
+import unittest
+from unittest import mock
+
+from flask import Flask
+from notifications import NotificationQueue
+
+
+class NotificationQueueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        with mock.patch('notifications.atexit.register'):
+            self.notifications = NotificationQueue(self.app)
+
+    def tearDown(self):
+        self.notifications.shutdown(timeout=2)
+
+    def test_notifications_are_sent_in_app_context(self):
+        with mock.patch('notifications.send_notification', return_value=True) as send:
+            for i in range(5):
+                self.notifications.enqueue(f"owner{i}@example.com", "Profile Verified", "Your profile has been verified.")
+            self.assertTrue(self.notifications.flush(timeout=5))
+
+        self.assertEqual(send.call_count, 5)
+        send.assert_any_call(to_email="owner3@example.com", subject="Profile Verified",
+                             message="Your profile has been verified.")
+        self.assertEqual(self.notifications.stats()['sent'], 5)
+
+    def test_failures_are_counted_and_do_not_stop_the_worker(self):
+        with mock.patch('notifications.send_notification', side_effect=[RuntimeError("SMTP down"), True]):
+            self.notifications.enqueue("a@example.com", "Subject", "Message")
+            self.notifications.enqueue("b@example.com", "Subject", "Message")
+            self.assertTrue(self.notifications.flush(timeout=5))
+
+        stats = self.notifications.stats()
+        self.assertEqual((stats['sent'], stats['failed']), (1, 1))
+
+    def test_full_queue_drops(self):
+        self.notifications.queue.maxsize = 2
+        with mock.patch.object(self.notifications._worker, 'ensure'):  # Keep the queue from draining
+            results = [self.notifications.enqueue("a@example.com", "Subject", "Message") for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(self.notifications.stats()['dropped'], 1)
+
+        with mock.patch('notifications.send_notification', return_value=True):
+            self.assertTrue(self.notifications.flush(timeout=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
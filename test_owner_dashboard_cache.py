@@ -0,0 +1,142 @@
+"""
+Tests for the owner dashboard's cached helper cards.
+
+Run with: python -m unittest test_owner_dashboard_cache
+"""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from conftest import AppTestCase
+from extensions import bcrypt, db
+from models import User, HelperProfile, OwnerHelperAssociation
+from owner_dashboard_cache import owner_dashboard_cache
+
+
+class OwnerDashboardCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'dashboard.db')}"
+        self.app.config['OWNER_DASHBOARD_CACHE_TTL'] = 3600
+        db.init_app(self.app)
+        owner_dashboard_cache.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owners = [User(name=f"Owner {n}", email=f"owner{n}@example.com", phone_number="1", password_hash="x")
+                       for n in range(2)]
+        db.session.add_all(self.owners)
+        db.session.commit()
+        self.renders = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def render(self):
+        self.renders += 1
+        return f"cards {self.renders}"
+
+    def cards(self, owner, page=1):
+        return owner_dashboard_cache.cards(owner.id, page, self.render)
+
+    def associate(self, owner, helper_id):
+        helper = HelperProfile(name=helper_id, helper_id=helper_id, helper_type="maid", phone_number="1",
+                               languages="Hindi", created_by=owner.id)
+        db.session.add(helper)
+        db.session.flush()
+        db.session.add(OwnerHelperAssociation(owner_id=owner.id, helper_profile_id=helper.id))
+        return helper
+
+    def test_cards_are_cached_per_owner_and_page(self):
+        first, second = self.owners
+        self.assertEqual(self.cards(first), "cards 1")
+        self.assertEqual(self.cards(first), "cards 1")
+        self.assertEqual(self.cards(first, page=2), "cards 2")
+        self.assertEqual(self.cards(second), "cards 3")
+        self.assertGreaterEqual(owner_dashboard_cache.stats()['hits'], 1)
+
+    def test_association_commit_invalidates_only_that_owner(self):
+        first, second = self.owners
+        self.cards(first), self.cards(second)
+
+        self.associate(first, "H1")
+        self.assertEqual(self.cards(first), "cards 1")  # Not committed yet
+        db.session.rollback()
+        self.assertEqual(self.cards(first), "cards 1")
+
+        self.associate(first, "H1")
+        db.session.commit()
+        self.assertEqual(self.cards(first), "cards 3")
+        self.assertEqual(self.cards(second), "cards 2")
+
+    def test_helper_change_clears_every_owner(self):
+        first, second = self.owners
+        helper = self.associate(first, "H1")
+        db.session.commit()
+        self.cards(first), self.cards(second)
+
+        helper.verification_status = 'Verified'
+        db.session.commit()
+        self.assertEqual((self.cards(first), self.cards(second)), ("cards 3", "cards 4"))
+
+    def test_cards_rendered_during_a_change_are_not_served(self):
+        first = self.owners[0]
+
+        def render_while_changing():
+            self.associate(first, "H1")
+            db.session.commit()
+            return "stale"
+
+        self.assertEqual(owner_dashboard_cache.cards(first.id, 1, render_while_changing), "stale")
+        self.assertEqual(self.cards(first), "cards 1")
+
+    def test_owner_generations_are_bounded_without_reviving_old_cards(self):
+        owner_dashboard_cache.store.max_entries = 2
+        first = self.owners[0]
+        self.assertEqual(self.cards(first), "cards 1")
+        owner_dashboard_cache.invalidate([first.id])
+        self.assertEqual(self.cards(first), "cards 2")
+
+        # Invalidating other owners pushes the first one's generation out of the map
+        owner_dashboard_cache.invalidate(range(1000, 1010))
+        self.assertEqual(owner_dashboard_cache.stats()['tracked_owners'], 2)
+        self.assertNotIn(first.id, owner_dashboard_cache._owner_generations)
+        self.assertEqual(self.cards(first), "cards 2")  # Still current; "cards 1" stays unreachable
+        owner_dashboard_cache.invalidate([first.id])
+        self.assertEqual(self.cards(first), "cards 3")
+
+
+class OwnerDashboardRouteTestCase(AppTestCase):
+
+    def test_contract_modal_lists_helpers_of_every_page(self):
+        app = self.create_app(WTF_CSRF_ENABLED=False, OWNER_DASHBOARD_HELPERS_PER_PAGE=2)
+        with app.app_context():
+            db.create_all()
+            owner = User(name="Owner", email="owner@example.com", phone_number="1",
+                         password_hash=bcrypt.generate_password_hash("secret").decode())
+            db.session.add(owner)
+            db.session.flush()
+            for helper_id in ("H1", "H2", "H3"):
+                helper = HelperProfile(name=helper_id, helper_id=helper_id, helper_type="maid", phone_number="1",
+                                       languages="Hindi", created_by=owner.id)
+                db.session.add(helper)
+                db.session.flush()
+                db.session.add(OwnerHelperAssociation(owner_id=owner.id, helper_profile_id=helper.id))
+            db.session.commit()
+        client = app.test_client()
+        client.post('/login', data={'email': 'owner@example.com', 'password': 'secret'})
+
+        page = client.get('/dashboard').get_data(as_text=True)
+        modal = page[page.index('id="selectHelperModal"'):]
+        for helper_id in ("H1", "H2", "H3"):
+            self.assertIn(f'/contracts/create/{helper_id}', modal)
+
+
+if __name__ == "__main__":
+    unittest.main()
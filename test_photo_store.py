@@ -0,0 +1,145 @@
+"""
+Tests for the content-addressed Aadhaar photo store.
+
+Run with: python -m unittest test_photo_store
+"""
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from conftest import AppTestCase
+from extensions import bcrypt, db
+from models import User, OwnerProfile, HelperProfile, OwnerHelperAssociation
+from photo_store import (extract_photo, is_photo_hash, legacy_photo_root, move_legacy_photos, photo_mimetype,
+                         photo_path, store_photo)
+
+JPEG = b'\xff\xd8\xff\xe0' + b'photo-bytes' * 100
+
+
+class PhotoStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['UPLOAD_FOLDER'] = os.path.join(self.tmp_dir.name, 'uploads')
+        self.app.config['AADHAAR_PHOTO_FOLDER'] = os.path.join(self.tmp_dir.name, 'aadhaar_photos')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def test_photos_are_stored_once_by_content_hash(self):
+        photo_b64 = base64.b64encode(JPEG).decode()
+        photo_hash = store_photo(photo_b64)
+        self.assertEqual(photo_hash, hashlib.sha256(JPEG).hexdigest())
+        self.assertEqual(store_photo(f"data:image/jpeg;base64,{photo_b64}"), photo_hash)
+
+        path = photo_path(photo_hash)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), JPEG)
+        self.assertEqual(photo_mimetype(path), 'image/jpeg')
+        self.assertEqual(len(os.listdir(os.path.dirname(path))), 1)
+
+    def test_empty_or_invalid_photos_are_skipped(self):
+        self.assertIsNone(store_photo(""))
+        self.assertIsNone(store_photo(None))
+        self.assertIsNone(store_photo("not base64!"))
+
+    def test_extract_photo_replaces_base64_with_hash(self):
+        details = {'name': 'Asha', 'photo': base64.b64encode(JPEG).decode()}
+        extract_photo(details)
+        self.assertNotIn('photo', details)
+        self.assertTrue(is_photo_hash(details['photo_hash']))
+        self.assertFalse(is_photo_hash('../../etc/passwd'))
+
+    def test_photos_are_kept_out_of_the_upload_folder(self):
+        self.assertFalse(photo_path(store_photo(base64.b64encode(JPEG).decode())).startswith(
+            self.app.config['UPLOAD_FOLDER']))
+
+    def test_legacy_photos_are_moved_out_of_the_upload_folder(self):
+        photo_hash = hashlib.sha256(JPEG).hexdigest()
+        old_folder = os.path.join(legacy_photo_root(), photo_hash[:2], photo_hash[2:4])
+        os.makedirs(old_folder)
+        for name in (photo_hash, '.tmp-partial'):
+            with open(os.path.join(old_folder, name), 'wb') as f:
+                f.write(JPEG)
+
+        self.assertEqual(move_legacy_photos(), 1)
+        with open(photo_path(photo_hash), 'rb') as f:
+            self.assertEqual(f.read(), JPEG)
+        self.assertFalse(os.path.exists(legacy_photo_root()))
+        self.assertEqual(move_legacy_photos(), 0)
+
+
+class AadhaarPhotoRouteTestCase(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app = self.create_app(AADHAAR_PHOTO_FOLDER=os.path.join(self.tmp_dir.name, 'aadhaar_photos'),
+                                   WTF_CSRF_ENABLED=False)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.photo_hash = store_photo(base64.b64encode(JPEG).decode())
+            self.helper_photo_hash = store_photo(base64.b64encode(JPEG + b'helper').decode())
+            db.create_all()
+            owner = self.add_user("owner@example.com")
+            db.session.add(OwnerProfile(owner_id=owner.id, pincode="600001", state="TN", city="Chennai",
+                                        society="Palm Grove", street="1st Street", apartment_number="4B",
+                                        aadhaar_photo_hash=self.photo_hash))
+            helper = HelperProfile(name="H1", helper_id="H1", helper_type="maid", phone_number="1",
+                                   languages="Hindi", created_by=owner.id)
+            helper.aadhaar_photo_hash = self.helper_photo_hash
+            db.session.add(helper)
+            db.session.flush()
+            employer = self.add_user("employer@example.com")
+            db.session.add(OwnerHelperAssociation(owner_id=employer.id, helper_profile_id=helper.id))
+            self.add_user("stranger@example.com")
+            self.add_user("admin@example.com", role='admin')
+            db.session.commit()
+
+    def add_user(self, email, role='owner'):
+        user = User(name=email, email=email, phone_number="1", role=role,
+                    password_hash=bcrypt.generate_password_hash("secret").decode())
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def fetch_as(self, email, photo_hash):
+        client = self.app.test_client()
+        client.post('/login', data={'email': email, 'password': 'secret'})
+        return client.get(f'/aadhaar-photos/{photo_hash}').status_code
+
+    def test_anonymous_users_cannot_fetch_photos(self):
+        photo_hash = self.photo_hash
+        self.assertEqual(self.client.get(f'/aadhaar-photos/{photo_hash}').status_code, 404)
+        static_path = f'/static/uploads/aadhaar_photos/{photo_hash[:2]}/{photo_hash[2:4]}/{photo_hash}'
+        self.assertEqual(self.client.get(static_path).status_code, 404)
+
+    def test_registrant_can_fetch_their_own_photo(self):
+        with self.client.session_transaction() as session:
+            session['aadhaar_data'] = {'photo_hash': self.photo_hash}
+        response = self.client.get(f'/aadhaar-photos/{self.photo_hash}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, JPEG)
+        self.assertTrue(response.cache_control.private)
+        self.assertFalse(response.cache_control.public)
+
+    def test_only_admins_the_profile_owner_and_linked_owners_can_fetch_photos(self):
+        self.assertEqual(self.fetch_as("owner@example.com", self.photo_hash), 200)
+        self.assertEqual(self.fetch_as("employer@example.com", self.helper_photo_hash), 200)
+        self.assertEqual(self.fetch_as("admin@example.com", self.photo_hash), 200)
+        self.assertEqual(self.fetch_as("admin@example.com", self.helper_photo_hash), 200)
+        # The helper's creator only sees the photo through an association, like everyone else
+        self.assertEqual(self.fetch_as("owner@example.com", self.helper_photo_hash), 404)
+        self.assertEqual(self.fetch_as("employer@example.com", self.photo_hash), 404)
+        self.assertEqual(self.fetch_as("stranger@example.com", self.photo_hash), 404)
+        self.assertEqual(self.fetch_as("stranger@example.com", self.helper_photo_hash), 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for resized helper photo variants.
+
+Run with: python -m unittest test_photo_variants
+"""
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from flask import Flask, render_template_string, send_from_directory
+from photo_variants import PhotoVariants, Image
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class PhotoVariantsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['UPLOAD_FOLDER'] = self.tmp_dir.name
+        self.variants = PhotoVariants(self.app)
+
+        @self.app.route('/uploads/<path:filename>')
+        def uploaded_file(filename):
+            return send_from_directory(self.tmp_dir.name, filename)
+
+        self.photo = os.path.join(self.tmp_dir.name, 'helper_photos', 'ab', 'photo.jpg')
+        os.makedirs(os.path.dirname(self.photo))
+        Image.new('RGB', (1200, 800), (200, 120, 40)).save(self.photo, 'JPEG')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def open_variant(self, path):
+        with open(path, 'rb') as f:
+            image = Image.open(io.BytesIO(f.read()))
+        return image.format, image.size
+
+    def test_variants_are_made_once_per_size_and_format(self):
+        with self.app.app_context():
+            thumb = self.variants.get('helper_photos/ab/photo.jpg', 'thumb', 'webp')
+            self.assertEqual(self.open_variant(thumb), ('WEBP', (160, 160)))
+            medium = self.variants.get('helper_photos/ab/photo.jpg', 'medium', 'jpeg')
+            self.assertEqual(self.open_variant(medium), ('JPEG', (640, 427)))
+
+            self.assertEqual(self.variants.get('helper_photos/ab/photo.jpg', 'thumb', 'webp'), thumb)
+            self.assertEqual(self.variants.stats()['generated'], 2)
+
+            # A replaced photo gets new variants
+            later = time.time() + 10
+            os.utime(self.photo, (later, later))
+            self.variants.get('helper_photos/ab/photo.jpg', 'thumb', 'webp')
+            self.assertEqual(self.variants.stats()['generated'], 3)
+
+    def test_only_helper_photos_and_known_sizes(self):
+        with self.app.app_context():
+            self.assertIsNone(self.variants.get('helper_photos/ab/photo.jpg', 'huge', 'webp'))
+            self.assertIsNone(self.variants.get('helper_photos/ab/missing.jpg', 'thumb', 'webp'))
+            self.assertIsNone(self.variants.get('owner_documents/ab/photo.jpg', 'thumb', 'webp'))
+            self.assertIsNone(self.variants.get('helper_photos/../../etc/passwd.jpg', 'thumb', 'webp'))
+
+    def test_upload_queues_every_variant(self):
+        with self.app.test_request_context():
+            self.variants.generate('/uploads/helper_photos/ab/photo.jpg')
+            self.variants._executor.current.shutdown(wait=True)
+        self.assertEqual(self.variants.stats()['generated'], 4)
+        variants = [name for root, dirs, files in os.walk(os.path.join(self.tmp_dir.name, 'variants')) for name in files]
+        self.assertEqual(sorted(variants), ['photo.jpg.jpeg', 'photo.jpg.jpeg', 'photo.jpg.webp', 'photo.jpg.webp'])
+
+    def test_filter_rewrites_photo_urls(self):
+        with self.app.test_request_context():
+            render = lambda url: render_template_string("{{ url|photo_variant('thumb') }}", url=url)
+            self.assertEqual(render('/uploads/helper_photos/ab/photo.jpg'),
+                             '/uploads/helper_photos/ab/photo.jpg?size=thumb')
+            self.assertEqual(render(f"/{self.tmp_dir.name.strip('/')}/helper_photos/ab/photo.jpg"),
+                             '/uploads/helper_photos/ab/photo.jpg?size=thumb')
+            self.assertEqual(render('https://ucarecdn.com/abc/'), 'https://ucarecdn.com/abc/')
+
+
+if __name__ == "__main__":
+    unittest.main()
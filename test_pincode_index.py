@@ -0,0 +1,92 @@
+"""
+Tests for the in-process pincode index.
+
+Run with: python -m unittest test_pincode_index
+"""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from extensions import db
+from models import PincodeMapping
+from pincode_index import PincodeIndex
+
+
+class PincodeIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'pincodes.db')}"
+        self.app.config['PINCODE_INDEX_CHECK_INTERVAL'] = 3600
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        for pincode, city in [("560034", "Bangalore"), ("560001", "Bangalore"), ("400001", "Mumbai"),
+                              ("560034", "Duplicate")]:
+            db.session.add(PincodeMapping(pincode=pincode, city=city, state="State", society="Society"))
+        db.session.commit()
+        self.index = PincodeIndex()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def test_exact_and_prefix_lookups(self):
+        self.assertEqual(self.index.get("560034")['city'], "Bangalore")
+        self.assertIsNone(self.index.get("999999"))
+        self.assertEqual([row['pincode'] for row in self.index.with_prefix("56")], ["560001", "560034"])
+        self.assertEqual([row['pincode'] for row in self.index.with_prefix("56", limit=1, offset=1)], ["560034"])
+        self.assertEqual(self.index.with_prefix("7"), [])
+
+    def test_search_by_pincode_prefix_then_names(self):
+        db.session.add(PincodeMapping(pincode="110001", city="New Delhi", state="Delhi", society="Bandra-Style Flats"))
+        db.session.add(PincodeMapping(pincode="400050", city="Mumbai", state="Maharashtra", society="Bandra West"))
+        db.session.commit()
+
+        results, has_more = self.index.search("5600")
+        self.assertEqual([row['pincode'] for row in results], ["560001", "560034", "560034"])
+        self.assertFalse(has_more)
+
+        results, _ = self.index.search("  BANDRA ")
+        self.assertEqual([row['pincode'] for row in results], ["110001", "400050"])
+        self.assertEqual([row['society'] for row in self.index.search("new del")[0]], ["Bandra-Style Flats"])
+        self.assertEqual([row['society'] for row in self.index.search("west")[0]], ["Bandra West"])
+
+    def test_search_limit_and_offset(self):
+        first, has_more = self.index.search("bang", limit=1)
+        second, has_more_after = self.index.search("bang", limit=1, offset=1)
+        self.assertTrue(has_more)
+        self.assertFalse(has_more_after)
+        self.assertNotEqual(first[0]['id'], second[0]['id'])
+        self.assertEqual(self.index.search("bang", offset=5), ([], False))
+        self.assertEqual(self.index.search("   "), ([], False))
+
+    def test_invalidate_picks_up_writes(self):
+        self.assertIsNone(self.index.get("110001"))
+        db.session.add(PincodeMapping(pincode="110001", city="New Delhi", state="Delhi", society="CP"))
+        db.session.commit()
+        self.assertIsNone(self.index.get("110001"))  # Still within the check interval
+
+        self.index.invalidate()
+        self.assertEqual(self.index.get("110001")['city'], "New Delhi")
+
+    def test_signature_change_is_detected_after_interval(self):
+        self.index.get("400001")
+        version = self.index.version
+        PincodeMapping.query.filter_by(pincode="400001").delete()
+        db.session.commit()
+
+        self.app.config['PINCODE_INDEX_CHECK_INTERVAL'] = 0
+        self.assertIsNone(self.index.get("400001"))
+        self.assertEqual(self.index.version, version + 1)
+        self.index.get("560001")
+        self.assertEqual(self.index.version, version + 1)  # Unchanged table is not rebuilt
+
+
+if __name__ == "__main__":
+    unittest.main()
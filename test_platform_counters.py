@@ -0,0 +1,150 @@
+"""
+Tests for the admin dashboard counters and recent-row buffers.
+
+Run with: python -m unittest test_platform_counters
+"""
+import datetime
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from sqlalchemy import event
+from extensions import db
+from models import User, OwnerProfile, HelperProfile, Review, PlatformCounter
+from platform_counters import platform_counters
+
+
+class PlatformCountersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'counters.db')}"
+        self.app.config['PLATFORM_COUNTERS_RECONCILE_INTERVAL'] = 0
+        self.app.config['PLATFORM_RECENT_SIZE'] = 2
+        self.app.config['PLATFORM_RECENT_REFRESH_INTERVAL'] = 3600
+        db.init_app(self.app)
+        platform_counters.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = self.add_user("owner@example.com")
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record_statement)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record_statement)
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def record_statement(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def add_user(self, email):
+        user = User(name=email, email=email, phone_number="9000000000", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    def add_helper(self, helper_id):
+        helper = HelperProfile(name=helper_id, helper_id=helper_id, helper_type="maid", phone_number="9000000000",
+                               languages="Hindi", created_by=self.owner.id)
+        db.session.add(helper)
+        db.session.commit()
+        return helper
+
+    def add_owner_profile(self, **values):
+        profile = OwnerProfile(owner_id=self.owner.id, pincode="600001", state="TN", city="Chennai", society="Palm Grove",
+                               street="1st Street", apartment_number="4B", **values)
+        db.session.add(profile)
+        db.session.commit()
+        return profile
+
+    def test_counters_follow_inserts_deletes_and_rollbacks(self):
+        self.assertEqual(platform_counters.values()['users'], 1)  # Missing rows are reconciled first
+        self.add_user("second@example.com")
+        helper = self.add_helper("H1")
+        db.session.add(User(name="x", email="third@example.com", phone_number="1", password_hash="x"))
+        db.session.flush()
+        db.session.rollback()
+
+        self.statements.clear()
+        counts = platform_counters.values()
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual((counts['users'], counts['helpers']), (2, 1))
+
+        db.session.delete(helper)
+        db.session.commit()
+        self.assertEqual(platform_counters.values()['helpers'], 0)
+
+    def test_counters_change_after_the_commit_not_during_the_flush(self):
+        platform_counters.reconcile()
+        self.statements.clear()
+        db.session.add(User(name="x", email="second@example.com", phone_number="1", password_hash="x"))
+        db.session.flush()
+        self.assertFalse([s for s in self.statements if 'platform_counters' in s])
+        db.session.commit()
+        self.assertTrue([s for s in self.statements if s.startswith('UPDATE platform_counters')])
+        self.assertEqual(platform_counters.values()['users'], 2)
+
+    def test_a_missing_counter_row_is_reconciled(self):
+        platform_counters.reconcile()
+        PlatformCounter.query.filter_by(name='helpers').delete()
+        db.session.commit()
+        self.add_helper("H1")
+        self.assertEqual(platform_counters.values()['helpers'], 1)
+        self.assertEqual(platform_counters.values()['helpers'], 1)
+
+    def test_owner_verification_counters(self):
+        platform_counters.reconcile()
+        pending = self.add_owner_profile()
+        self.add_owner_profile(aadhaar_verified=True, verification_status='Verified')
+        counts = platform_counters.values()
+        self.assertEqual((counts['owners'], counts['pending_verifications'], counts['aadhaar_verified_owners']), (2, 1, 1))
+
+        pending.verification_status = 'Verified'
+        db.session.commit()
+        counts = platform_counters.values()
+        self.assertEqual((counts['pending_verifications'], counts['manually_verified_owners']), (0, 1))
+
+    def test_reconcile_fixes_drift(self):
+        platform_counters.reconcile()
+        PlatformCounter.query.filter_by(name='users').update({'value': 40})
+        db.session.commit()
+        with self.assertLogs('platform_counters', level='WARNING'):
+            self.assertEqual(platform_counters.reconcile()['users'], 1)
+        self.assertEqual(platform_counters.values()['users'], 1)
+
+    def test_recent_rows_come_from_the_buffer(self):
+        self.add_helper("H1")
+        self.assertEqual([h['helper_id'] for h in platform_counters.recent('helpers')], ["H1"])
+
+        helper = self.add_helper("H2")
+        self.add_helper("H3")
+        db.session.add(Review(review_id="R1", helper_profile_id=helper.id, owner_id=self.owner.id,
+                              contract_id=1, review_date=datetime.date.today(), punctuality=4, attitude=4,
+                              hygiene=4, reliability=4, communication=4))
+        db.session.commit()
+        self.statements.clear()
+        self.assertEqual([h['helper_id'] for h in platform_counters.recent('helpers')], ["H3", "H2"])
+        self.assertEqual(self.statements, [])
+        self.assertEqual([r['helper_id'] for r in platform_counters.recent('reviews')], ["H2"])
+
+        # A review of a loaded helper takes its helper_id from the relationship, with no extra SELECT
+        helper = HelperProfile.query.filter_by(helper_id="H3").one()
+        self.statements.clear()
+        db.session.add(Review(review_id="R2", helper_profile=helper, owner_id=self.owner.id,
+                              contract_id=1, review_date=datetime.date.today(), punctuality=4, attitude=4,
+                              hygiene=4, reliability=4, communication=4))
+        db.session.commit()
+        self.assertFalse([s for s in self.statements if 'FROM helper_profiles' in s])
+        self.statements.clear()
+        self.assertEqual([r['helper_id'] for r in platform_counters.recent('reviews')], ["H3", "H2"])
+        self.assertEqual(self.statements, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for the per-request SQL profiler.
+
+Run with: python -m unittest test_query_profiler
+"""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from conftest import AppTestCase
+from extensions import bcrypt, db
+from models import Language, User
+from query_profiler import QueryProfiler, query_profiler
+
+
+def create_test_app(tmp_dir, **config):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'profiler.db')}"
+    app.config.update(config)
+    db.init_app(app)
+    profiler = QueryProfiler(app)
+
+    @app.route('/languages')
+    def languages():
+        # One query for the ids, then one per language: an N+1 loop
+        ids = [language_id for (language_id,) in db.session.query(Language.id).all()]
+        return ', '.join(db.session.get(Language, language_id).name for language_id in ids)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Language(name=name) for name in ("English", "Hindi", "Tamil", "Telugu")])
+        db.session.commit()
+    return app, profiler
+
+
+class QueryProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_counts_queries_and_flags_repeats(self):
+        app, profiler = create_test_app(self.tmp_dir.name, QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_HEADERS=True)
+        client = app.test_client()
+        with self.assertLogs('query_profiler', level='WARNING') as logs:
+            response = client.get('/languages')
+        self.assertEqual(response.headers['X-Query-Count'], '5')
+        self.assertTrue(response.headers['Server-Timing'].startswith('db;dur='))
+        self.assertTrue(any('Possible N+1 in languages: sent 4 times' in line for line in logs.output))
+
+        client.get('/languages')
+        stats = profiler.stats()['languages']
+        self.assertEqual((stats['requests'], stats['avg_queries'], stats['max_queries']), (2, 5, 5))
+        self.assertEqual(stats['repeated'][0]['requests'], 2)
+        self.assertIn('FROM languages', stats['repeated'][0]['sql'])
+        with app.app_context():
+            db.engine.dispose()
+
+    def test_disabled_by_default(self):
+        app, profiler = create_test_app(self.tmp_dir.name)
+        response = app.test_client().get('/languages')
+        self.assertNotIn('X-Query-Count', response.headers)
+        self.assertEqual(profiler.stats(), {})
+        with app.app_context():
+            db.engine.dispose()
+
+
+class QueryStatsRouteTestCase(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app = self.create_app(QUERY_PROFILER_ENABLED=True, WTF_CSRF_ENABLED=False)
+        self.addCleanup(query_profiler.reset)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(name='Admin', email='admin@example.com', phone_number='9000000000', role='admin',
+                                password_hash=bcrypt.generate_password_hash('secret').decode()))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'email': 'admin@example.com', 'password': 'secret'})
+
+    def test_only_a_post_resets_the_profile(self):
+        self.assertIn('login', self.client.get('/admin/query-stats').get_json()['endpoints'])
+        self.assertIn('login', self.client.get('/admin/query-stats?reset=1').get_json()['endpoints'])
+        self.assertEqual(self.client.get('/admin/query-stats/reset').status_code, 405)
+
+        self.assertTrue(self.client.post('/admin/query-stats/reset').get_json()['success'])
+        self.assertNotIn('login', self.client.get('/admin/query-stats').get_json()['endpoints'])
+
+
+if __name__ == "__main__":
+    unittest.main()
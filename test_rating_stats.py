@@ -0,0 +1,107 @@
+"""
+Tests for the stored overall rating and the helper_rating_stats running totals.
+
+Run with: python -m unittest test_rating_stats
+"""
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import func
+from benchmark_analytics import create_benchmark_app
+from extensions import db
+from generate_analytics import _helper_rating_rows
+from models import HelperProfile, HelperRatingStats, Review, ReviewTaskRating, TaskList
+
+CORE_VALUES = HelperRatingStats.CORE_VALUES
+
+
+class RatingStatsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = create_benchmark_app(os.path.join(self.tmp_dir.name, 'ratings.db'))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        tasks = [TaskList(name=name, category='Cleaning', helper_type='maid') for name in ('Sweeping', 'Mopping')]
+        helpers = [HelperProfile(name=helper_id, helper_id=helper_id, helper_type='maid', phone_number='9000000000',
+                                 languages=None, created_by=1) for helper_id in ('H1001', 'H1002')]
+        db.session.add_all(tasks + helpers)
+        db.session.commit()
+        self.task_ids = [task.id for task in tasks]
+        self.helper_ids = [helper.id for helper in helpers]
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def submit_review(self, owner_id, helper_pk, core, task_ratings):
+        """Store a review the way submit_review does: task ratings, overall rating, totals, one commit."""
+        review = Review(review_id=f'R{owner_id}', helper_profile_id=helper_pk, owner_id=owner_id,
+                        contract_id=owner_id, **dict(zip(CORE_VALUES, map(float, core))))
+        db.session.add(review)
+        db.session.flush()
+        for task_id, rating in zip(self.task_ids, task_ratings):
+            review.task_ratings.append(ReviewTaskRating(review_id=review.id, task_id=task_id, rating=rating))
+        review.overall_rating = review.calculate_overall_rating()
+        HelperRatingStats.record_review(review)
+        db.session.commit()
+
+    def stats_rows(self):
+        db.session.expire_all()
+        columns = ['review_count', 'overall_sum'] + [f'{value}_sum' for value in CORE_VALUES]
+        return {stats.helper_profile_id: {column: getattr(stats, column) for column in columns}
+                for stats in HelperRatingStats.query.all()}
+
+    def test_reviews_add_up_to_a_rebuild(self):
+        first, second = self.helper_ids
+        self.submit_review(1, first, (5, 4, 3, 4, 5), (5, 3))
+        self.submit_review(2, first, (2, 3, 4, 1, 3), (4, 4))
+        self.submit_review(3, second, (5, 5, 5, 5, 5), (5, 5))
+
+        # (5+4+3+4+5 + 5+3) points of a possible 7 * 5, scaled to 5
+        overall = dict(db.session.query(Review.owner_id, Review.overall_rating))
+        self.assertAlmostEqual(overall[1], 29 / 35 * 5)
+
+        recorded = self.stats_rows()
+        self.assertEqual(recorded[first]['review_count'], 2)
+        self.assertAlmostEqual(recorded[first]['punctuality_sum'], 7)
+        self.assertAlmostEqual(recorded[second]['overall_sum'], 5)
+
+        HelperRatingStats.rebuild()
+        db.session.commit()
+        rebuilt = self.stats_rows()
+        self.assertEqual(rebuilt.keys(), recorded.keys())
+        for helper_pk, totals in rebuilt.items():
+            for column, value in totals.items():
+                self.assertAlmostEqual(recorded[helper_pk][column], value, msg=column)
+
+        # Averages from the totals match the SQL averages admin analytics reads
+        stats = HelperRatingStats.query.filter_by(helper_profile_id=first).one()
+        self.assertAlmostEqual(stats.average('hygiene'), 3.5)
+        rows = {row.helper_pk: row for row in _helper_rating_rows()}
+        self.assertAlmostEqual(stats.avg_overall, rows[first].avg_overall)
+        self.assertAlmostEqual(stats.avg_overall,
+                               db.session.query(func.avg(Review.overall_rating))
+                               .filter(Review.helper_profile_id == first).scalar())
+
+    def test_record_review_creates_then_increments_the_row(self):
+        helper_pk = self.helper_ids[0]
+        for rating in (4.0, 2.0):
+            review = Review(review_id=f'R{rating}', helper_profile_id=helper_pk, owner_id=1, contract_id=1,
+                            overall_rating=rating, **{value: rating for value in CORE_VALUES})
+            HelperRatingStats.record_review(review)
+        db.session.commit()
+        totals = self.stats_rows()[helper_pk]
+        self.assertEqual(totals['review_count'], 2)
+        self.assertAlmostEqual(totals['overall_sum'], 6.0)
+        self.assertAlmostEqual(totals['communication_sum'], 6.0)
+        self.assertEqual(HelperRatingStats.query.filter_by(helper_profile_id=helper_pk).one().average('overall'), 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests for the Sandbox API HTTP client.
+Runs against a local stub server that mimics the Sandbox authenticate and OKYC OTP endpoints,
+so no network access or API credits are needed.
+
+Run with: python -m unittest test_sandbox_api
+"""
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import sandbox_api
+
+
+class StubSandboxHandler(BaseHTTPRequestHandler):
+    """Mimics the Sandbox endpoints. Behaviour is driven by attributes on the server."""
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.calls.append(self.path)
+            server.client_ports.add(self.client_address[1])
+            failures = server.failures.get(self.path, [])
+            status = failures.pop(0) if failures else 200
+
+        delay = server.delays.get(self.path)
+        if delay:
+            time.sleep(delay)
+
+        if status != 200:
+            self._send_json(status, {"message": "Service unavailable"})
+        elif self.path == "/authenticate":
+            self._send_json(200, {"access_token": "stub-token"})
+        elif self.path == "/kyc/aadhaar/okyc/otp":
+            self._send_json(200, {"data": {"reference_id": 1234, "message": "OTP sent successfully"}})
+        elif self.path == "/kyc/aadhaar/okyc/otp/verify":
+            if payload.get("otp") != "123456":
+                self._send_json(422, {"message": "Invalid OTP"})
+            else:
+                self._send_json(200, {"data": {"name": "Test User", "gender": "F"}})
+        else:
+            self._send_json(404, {"message": "Not found"})
+
+
+class SandboxAPITestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubSandboxHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        self.server.client_ports = set()
+        self.server.failures = {}
+        self.server.delays = {}
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = sandbox_api.SandboxHTTPClient(base_url=base_url, backoff_factor=0.01)
+        self._original_client = sandbox_api._client
+        self._original_timeouts = dict(sandbox_api.READ_TIMEOUTS)
+        sandbox_api._client = self.client
+
+    def tearDown(self):
+        sandbox_api._client = self._original_client
+        sandbox_api.READ_TIMEOUTS.clear()
+        sandbox_api.READ_TIMEOUTS.update(self._original_timeouts)
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_otp_flow_reuses_one_connection(self):
+        token = sandbox_api.get_access_token()
+        self.assertTrue(token["success"])
+        self.assertEqual(token["access_token"], "stub-token")
+
+        otp = sandbox_api.request_aadhaar_otp(token["access_token"], "123412341234")
+        self.assertTrue(otp["success"])
+        self.assertEqual(otp["reference_id"], 1234)
+
+        verified = sandbox_api.verify_aadhaar_otp(token["access_token"], otp["reference_id"], "123456")
+        self.assertTrue(verified["success"])
+        self.assertEqual(verified["aadhaar_data"]["name"], "Test User")
+
+        self.assertEqual(len(self.server.calls), 3)
+        self.assertEqual(len(self.server.client_ports), 1)  # Keep-alive: one TCP connection
+
+    def test_error_response_is_not_retried(self):
+        result = sandbox_api.verify_aadhaar_otp("stub-token", 1234, "000000")
+        self.assertFalse(result["success"])
+        self.assertIn("Invalid OTP", result["message"])
+        self.assertEqual(self.server.calls, ["/kyc/aadhaar/okyc/otp/verify"])
+
+    def test_authenticate_retries_unavailable_upstream(self):
+        self.server.failures["/authenticate"] = [503, 503]
+        token = sandbox_api.get_access_token()
+        self.assertTrue(token["success"])
+        self.assertEqual(self.server.calls, ["/authenticate"] * 3)
+
+    def test_authenticate_gives_up_after_max_retries(self):
+        self.server.failures["/authenticate"] = [503] * 5
+        token = sandbox_api.get_access_token()
+        self.assertFalse(token["success"])
+        self.assertEqual(len(self.server.calls), sandbox_api.MAX_RETRIES + 1)
+
+    def test_otp_request_is_not_retried_on_unavailable_upstream(self):
+        self.server.failures["/kyc/aadhaar/okyc/otp"] = [503]
+        otp = sandbox_api.request_aadhaar_otp("stub-token", "123412341234")
+        self.assertFalse(otp["success"])
+        self.assertEqual(len(self.server.calls), 1)
+
+    def test_read_timeout_fails_fast_without_retrying_verification(self):
+        sandbox_api.READ_TIMEOUTS["verify_otp"] = 0.2
+        self.server.delays["/kyc/aadhaar/okyc/otp/verify"] = 1
+        start = time.perf_counter()
+        result = sandbox_api.verify_aadhaar_otp("stub-token", 1234, "123456")
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertFalse(result["success"])
+        self.assertEqual(len(self.server.calls), 1)
+
+    def test_latency_histograms_per_endpoint(self):
+        sandbox_api.get_access_token()
+        sandbox_api.get_access_token()
+        sandbox_api.request_aadhaar_otp("stub-token", "123412341234")
+
+        histograms = sandbox_api.get_latency_histograms()
+        self.assertEqual(histograms["authenticate"]["count"], 2)
+        self.assertEqual(histograms["generate_otp"]["count"], 1)
+        self.assertEqual(sum(histograms["authenticate"]["buckets"].values()), 2)
+        self.assertNotIn("verify_otp", histograms)
+
+
+if __name__ == "__main__":
+    unittest.main()
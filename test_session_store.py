@@ -0,0 +1,140 @@
+"""
+Tests for the server-side session backends.
+
+Run with: python -m unittest test_session_store
+"""
+import datetime
+import os
+import tempfile
+import time
+import unittest
+
+from cachelib.file import FileSystemCache
+from flask import Flask, session
+from extensions import db
+from session_store import LRUSessionStore, init_session, session_size_metric
+
+
+def create_test_app(tmp_dir, backend, **config):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'sessions.db')}"
+    app.config['SESSION_BACKEND'] = backend
+    app.config['SESSION_LEGACY_FILE_DIR'] = os.path.join(tmp_dir, 'flask_session')
+    app.config.update(config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        return session.get('value', 'missing')
+
+    @app.route('/clear')
+    def clear_value():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+class LRUSessionStoreTestCase(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        store = LRUSessionStore(max_entries=2)
+        store.set('a', b'1', ttl=60)
+        store.set('b', b'2', ttl=60)
+        store.get('a')
+        store.set('c', b'3', ttl=60)
+        self.assertIsNone(store.get('b'))
+        self.assertEqual((store.get('a'), store.get('c')), (b'1', b'3'))
+        self.assertEqual(store.evicted, 1)
+
+    def test_expired_entries_are_hidden_and_swept(self):
+        store = LRUSessionStore()
+        store.set('old', b'1', ttl=-1)
+        store.set('new', b'2', ttl=60)
+        self.assertEqual(store.sweep(), 1)
+        self.assertEqual(len(store), 1)
+        store.set('old', b'1', ttl=-1)
+        self.assertIsNone(store.get('old'))
+
+
+class SessionBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        session_size_metric.reset()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def round_trip(self, app):
+        client = app.test_client()
+        self.assertEqual(client.get('/set/hello').status_code, 200)
+        self.assertEqual(client.get('/get').get_data(as_text=True), 'hello')
+        client.get('/clear')
+        self.assertEqual(client.get('/get').get_data(as_text=True), 'missing')
+
+    def test_memory_backend(self):
+        app = create_test_app(self.tmp_dir.name, 'memory')
+        interface = init_session(app)
+        self.round_trip(app)
+        self.assertGreater(session_size_metric.snapshot()['writes'], 0)
+        self.assertEqual(interface.stats()['backend'], 'memory')
+
+    def test_sqlalchemy_backend_shares_sessions_and_sweeps(self):
+        app = create_test_app(self.tmp_dir.name, 'sqlalchemy', PERMANENT_SESSION_LIFETIME=datetime.timedelta(seconds=1))
+        interface = init_session(app)
+        self.round_trip(app)
+
+        # A second app server reading the same table sees the session (and refreshes its expiry)
+        client = app.test_client()
+        client.get('/set/shared')
+        other = create_test_app(self.tmp_dir.name, 'sqlalchemy')
+        init_session(other)
+        other_client = other.test_client()
+        other_client.set_cookie('session', client.get_cookie('session').value)
+        self.assertEqual(other_client.get('/get').get_data(as_text=True), 'shared')
+
+        app.test_client().get('/set/short-lived')
+        time.sleep(1.1)
+        with app.app_context():
+            self.assertEqual(interface.sweep_expired(), 1)
+            db.engine.dispose()
+        with other.app_context():
+            db.engine.dispose()
+
+    def test_saving_a_session_another_request_already_inserted_updates_it(self):
+        app = create_test_app(self.tmp_dir.name, 'sqlalchemy')
+        interface = init_session(app)
+        lifetime = datetime.timedelta(hours=1)
+        with app.app_context():
+            # Both requests of a new session save it; the second write updates the first one's row
+            interface._upsert_session(lifetime, interface.session_class({'value': 'first'}, sid='racy'), 'session:racy')
+            interface._upsert_session(lifetime, interface.session_class({'value': 'second'}, sid='racy'), 'session:racy')
+            with db.engine.connect() as conn:
+                rows = conn.execute(interface.table.select()).all()
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(interface._retrieve_stored('session:racy'), {'value': 'second'})
+            db.engine.dispose()
+
+    def test_legacy_filesystem_sessions_move_on_first_use(self):
+        legacy = FileSystemCache(os.path.join(self.tmp_dir.name, 'flask_session'))
+        legacy.set('session:legacy-sid', {'value': 'from-disk'}, timeout=3600)
+
+        app = create_test_app(self.tmp_dir.name, 'memory')
+        interface = init_session(app)
+        client = app.test_client()
+        client.set_cookie('session', 'legacy-sid')
+        self.assertEqual(client.get('/get').get_data(as_text=True), 'from-disk')
+        self.assertIsNone(legacy.get('session:legacy-sid'))
+        self.assertIsNotNone(interface.store.get('session:legacy-sid'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for the in-memory task catalog used by the contract and review forms.
+
+Run with: python -m unittest test_task_catalog
+"""
+import datetime
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from sqlalchemy import event
+from extensions import db
+from models import Contract, TaskList, User, HelperProfile
+from task_catalog import TaskCatalogCache
+
+
+class TaskCatalogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp_dir.name, 'tasks.db')}"
+        self.app.config['TASK_CATALOG_CHECK_INTERVAL'] = 3600
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.cache = TaskCatalogCache()
+
+        self.cleaning = self.add_task('Cleaning', 'Cleaning', 'maid', main=True)
+        self.driving = self.add_task('Driving', 'Driving', 'driver', main=True)
+        self.cooking = self.add_task('Cooking', 'Cooking', 'maid', main=True)
+        self.sweep = self.add_task('Sweeping', 'Cleaning', 'maid', parent=self.cleaning)
+        self.lunch = self.add_task('Lunch', 'Cooking', 'maid', parent=self.cooking)
+        self.mop = self.add_task('Mopping', 'Cleaning', 'maid', parent=self.cleaning)
+        self.school = self.add_task('School run', 'Driving', 'driver', parent=self.driving)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp_dir.cleanup()
+
+    def add_task(self, name, category, helper_type, main=False, parent=None):
+        task = TaskList(name=name, category=category, helper_type=helper_type, is_main_task=main,
+                        parent_id=parent.id if parent else None)
+        db.session.add(task)
+        db.session.flush()
+        return task
+
+    def count_queries(self, func):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            result = func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return result, len(statements)
+
+    def test_choices_and_tree_per_helper_type(self):
+        self.assertEqual(self.cache.choices('maid'), [
+            (str(self.sweep.id), 'Cleaning - Sweeping'),
+            (str(self.mop.id), 'Cleaning - Mopping'),
+            (str(self.lunch.id), 'Cooking - Lunch'),
+        ])
+        self.assertEqual(self.cache.choices('driver'), [(str(self.school.id), 'Driving - School run')])
+        self.assertEqual(self.cache.choices('cook'), [])
+
+        maid = self.cache.catalog().helper_type('maid')
+        self.assertEqual(maid.categories, ('Cleaning', 'Cooking'))
+        self.assertEqual([(main.name, [task.name for task in subtasks]) for main, subtasks in maid.tree],
+                         [('Cleaning', ['Sweeping', 'Mopping']), ('Cooking', ['Lunch'])])
+
+    def test_reads_are_served_from_memory_until_invalidated(self):
+        catalog = self.cache.catalog()
+        mop, lunch, sweep = self.mop.id, self.lunch.id, self.sweep.id
+        (_, task, tasks), queries = self.count_queries(
+            lambda: (self.cache.choices('maid'), self.cache.get(str(mop)), self.cache.tasks([lunch, sweep, 999])))
+        self.assertEqual(queries, 0)
+        self.assertEqual(task.name, 'Mopping')
+        self.assertEqual([task.name for task in tasks], ['Sweeping', 'Lunch'])
+        self.assertIsNone(self.cache.get('x'))
+
+        self.add_task('Dusting', 'Cleaning', 'maid', parent=self.cleaning)
+        db.session.commit()
+        self.assertEqual(len(self.cache.choices('maid')), 3)
+
+        self.cache.invalidate()
+        self.assertIn('Cleaning - Dusting', [label for _, label in self.cache.choices('maid')])
+        self.assertEqual(self.cache.catalog().version, catalog.version + 1)
+        self.assertEqual(len(catalog.by_id), 7)  # The old version is left as it was
+
+    def test_other_workers_changes_are_noticed_after_the_check_interval(self):
+        self.app.config['TASK_CATALOG_CHECK_INTERVAL'] = 0
+        self.cache.choices('maid')
+        db.session.delete(db.session.get(TaskList, self.lunch.id))
+        db.session.commit()
+        self.assertNotIn('Cooking - Lunch', [label for _, label in self.cache.choices('maid')])
+        self.assertEqual(self.cache.stats()['builds'], 2)
+
+    def test_contract_task_ids_come_from_contract_tasks(self):
+        owner = User(name='Owner', email='owner@example.com', phone_number='9000000000', password_hash='x')
+        helper = HelperProfile(name='H1', helper_id='H1', helper_type='maid', phone_number='9000000001',
+                               languages=None, created_by=1)
+        db.session.add_all([owner, helper])
+        db.session.flush()
+        contract = Contract(contract_id='CT1', helper_profile_id=helper.id, owner_id=owner.id, tasks='',
+                            start_date=datetime.date.today(), monthly_salary=5000)
+        contract.set_tasks([self.mop.id, self.sweep.id])
+        db.session.add(contract)
+        db.session.commit()
+        db.session.expire_all()
+
+        contract = Contract.query.filter_by(contract_id='CT1').one()
+        self.assertEqual(contract.task_ids(), sorted([self.sweep.id, self.mop.id]))
+        self.assertNotIn('task_items', contract.__dict__)
+        self.assertEqual([task.name for task in self.cache.tasks(contract.task_ids())], ['Sweeping', 'Mopping'])
+
+
+if __name__ == "__main__":
+    unittest.main()
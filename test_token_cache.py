@@ -0,0 +1,110 @@
+"""
+Tests for the shared Sandbox access token cache.
+
+Run with: python -m unittest test_token_cache
+"""
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from token_cache import AccessTokenCache, token_expiry
+
+
+def make_jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+class CountingFetcher:
+    """Stands in for sandbox_api.get_access_token and counts authenticate calls."""
+
+    def __init__(self, ttl=3600, delay=0):
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        return {"success": True, "access_token": make_jwt(time.time() + self.ttl) + str(call)}
+
+
+class AccessTokenCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp_dir.name, "token.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_token_is_reused_until_it_needs_refreshing(self):
+        fetch = CountingFetcher()
+        cache = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=60)
+        self.assertEqual(cache.get_token(), cache.get_token())
+        self.assertEqual(fetch.calls, 1)
+
+    def test_concurrent_misses_trigger_one_refresh(self):
+        fetch = CountingFetcher(delay=0.2)
+        cache = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=60)
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(cache.get_token())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(len(set(tokens)), 1)
+
+    def test_token_is_shared_through_the_cache_file(self):
+        fetch = CountingFetcher()
+        worker_a = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=60)
+        worker_b = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=60)
+        self.assertEqual(worker_a.get_token(), worker_b.get_token())
+        self.assertEqual(fetch.calls, 1)
+
+    def test_token_near_expiry_is_served_while_refreshing_in_background(self):
+        fetch = CountingFetcher(ttl=120)
+        cache = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=600)
+        first = cache.get_token()  # Fetched synchronously, but already inside the refresh margin
+        second = cache.get_token()
+        self.assertEqual(first, second)
+        cache._background_refresh.join(timeout=5)
+        self.assertEqual(fetch.calls, 2)
+        cache.refresh_margin = 0  # Stop further background refreshes
+        self.assertNotEqual(cache.get_token(), first)
+
+    def test_expired_token_is_replaced(self):
+        fetch = CountingFetcher(ttl=-10)
+        cache = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=0)
+        cache.get_token()
+        fetch.ttl = 3600
+        cache.get_token()
+        self.assertEqual(fetch.calls, 2)
+
+    def test_invalidated_token_is_not_returned_again(self):
+        fetch = CountingFetcher()
+        cache = AccessTokenCache(fetch, cache_file=self.cache_file, refresh_margin=60)
+        rejected = cache.get_token()
+        cache.invalidate(rejected)
+        self.assertNotEqual(cache.refresh(stale_token=rejected), rejected)
+        self.assertEqual(fetch.calls, 2)
+
+    def test_failed_authentication_returns_none(self):
+        cache = AccessTokenCache(lambda: {"success": False, "message": "bad key"}, cache_file=self.cache_file)
+        self.assertIsNone(cache.get_token())
+
+    def test_token_expiry_reads_jwt_exp_claim(self):
+        self.assertEqual(token_expiry(make_jwt(1234567890)), 1234567890)
+        self.assertGreater(token_expiry("opaque-token", default_ttl=100), time.time() + 90)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for upload responses: ETags, caching headers, 304s, ranges and X-Accel-Redirect.
+
+Run with: python -m unittest test_upload_serving
+"""
+import hashlib
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from conftest import AppTestCase
+from upload_serving import is_private_upload, serve_upload
+
+CONTENT = b'%PDF-1.4\n' + bytes(range(256)) * 40
+CONTENT_HASH = hashlib.sha256(CONTENT).hexdigest()
+
+
+class UploadServingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['UPLOAD_FOLDER'] = self.tmp_dir.name
+
+        @self.app.route('/uploads/<path:filename>')
+        def uploaded_file(filename):
+            return serve_upload(filename)
+
+        self.client = self.app.test_client()
+        for name in (f'owner_documents/ab/{CONTENT_HASH}.pdf', 'helper_photos/H1_1700000000.jpg',
+                     'helper_photos/.tmp-upload'):
+            path = os.path.join(self.tmp_dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(CONTENT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_content_addressed_files_are_immutable_with_their_hash_as_etag(self):
+        url = f'/uploads/owner_documents/ab/{CONTENT_HASH}.pdf'
+        response = self.client.get(url)
+        self.assertEqual(response.data, CONTENT)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertEqual(response.get_etag(), (CONTENT_HASH, False))
+        self.assertTrue(response.cache_control.immutable)
+        self.assertTrue(response.cache_control.private)
+        self.assertFalse(response.cache_control.public)
+        self.assertNotIn('public', response.headers['Cache-Control'])
+        self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': f'"{CONTENT_HASH}"'}).status_code, 304)
+
+        partial = self.client.get(url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.data, CONTENT[100:200])
+        self.assertEqual(partial.headers['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+
+    def test_other_names_get_a_content_etag_and_a_short_lifetime(self):
+        response = self.client.get('/uploads/helper_photos/H1_1700000000.jpg')
+        self.assertEqual(response.get_etag(), (CONTENT_HASH, False))
+        self.assertFalse(response.cache_control.immutable)
+        self.assertTrue(response.cache_control.public)
+        self.assertFalse(response.cache_control.private)
+        self.assertEqual(response.cache_control.max_age, 3600)
+
+    def test_missing_unsafe_and_partial_files_are_not_served(self):
+        self.assertEqual(self.client.get('/uploads/helper_photos/missing.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/uploads/helper_photos/.tmp-upload').status_code, 404)
+        self.assertEqual(self.client.get('/uploads/../test_upload_serving.py').status_code, 404)
+
+    def test_accel_redirect_leaves_the_bytes_to_nginx(self):
+        self.app.config['UPLOAD_ACCEL_REDIRECT_PREFIX'] = '/protected-uploads/'
+        url = f'/uploads/owner_documents/ab/{CONTENT_HASH}.pdf'
+        response = self.client.get(url)
+        self.assertEqual(response.headers['X-Accel-Redirect'], f'/protected-uploads/owner_documents/ab/{CONTENT_HASH}.pdf')
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.get_etag(), (CONTENT_HASH, False))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': f'"{CONTENT_HASH}"'}).status_code, 304)
+
+
+class UploadedFileRouteTestCase(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.create_app(UPLOAD_FOLDER=os.path.join(self.tmp_dir.name, 'uploads')).test_client()
+        for name in ('helper_photos/photo.jpg', 'owner_documents/ab/scan.pdf', 'helper_documents/ab/scan.pdf',
+                     'aadhaar_photos/ab/cd/photo'):
+            path = os.path.join(self.tmp_dir.name, 'uploads', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(CONTENT)
+
+    def test_private_folders_are_not_served(self):
+        self.assertEqual(self.client.get('/uploads/helper_photos/photo.jpg').status_code, 200)
+        for path in ('owner_documents/ab/scan.pdf', 'helper_documents/ab/scan.pdf', 'aadhaar_photos/ab/cd/photo',
+                     'helper_photos/../owner_documents/ab/scan.pdf'):
+            self.assertTrue(is_private_upload(path))
+            self.assertEqual(self.client.get(f'/uploads/{path}').status_code, 404, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
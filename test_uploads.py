@@ -0,0 +1,102 @@
+"""
+Tests for the streaming, content-addressed upload store.
+
+Run with: python -m unittest test_uploads
+"""
+import io
+import os
+import tempfile
+import unittest
+
+from flask import Flask, request
+from flask_login import LoginManager, UserMixin
+from werkzeug.datastructures import FileStorage
+from uploads import (UploadRequest, UploadStream, UnsupportedUpload, UploadTooLarge, save_file,
+                     streamed_upload)
+
+JPEG = b'\xff\xd8\xff\xe0' + b'photo' * 1000
+PDF = b'%PDF-1.4\n' + b'page' * 100
+
+
+class TestUser(UserMixin):
+    id = 1
+
+
+class UploadsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.request_class = UploadRequest
+        self.app.config['UPLOAD_FOLDER'] = os.path.join(self.tmp_dir.name, 'static')
+        self.app.config['HELPER_PHOTO_MAX_BYTES'] = 10000
+        login_manager = LoginManager(self.app)
+        login_manager.request_loader(lambda request: TestUser() if request.headers.get('X-Test-User') else None)
+        self.streamed = None
+
+        @self.app.route('/photo', methods=['POST'])
+        @streamed_upload('helper_photos')
+        def photo():
+            upload = request.files['photo']
+            self.streamed = isinstance(upload.stream, UploadStream)
+            return save_file(upload, 'helper_photos') if request.form.get('save') else 'not saved'
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def stored_files(self):
+        return sorted(name for root, dirs, files in os.walk(self.tmp_dir.name) for name in files)
+
+    def post(self, payload, save=True, logged_in=True):
+        data = {'photo': (io.BytesIO(payload), 'photo.jpg')}
+        if save:
+            data['save'] = '1'
+        headers = {'X-Test-User': '1'} if logged_in else {}
+        return self.client.post('/photo', data=data, content_type='multipart/form-data', headers=headers)
+
+    def test_identical_uploads_are_stored_once(self):
+        first, second = self.post(JPEG), self.post(JPEG)
+        self.assertTrue(self.streamed)
+        self.assertEqual(first.data, second.data)
+        self.assertTrue(first.data.decode().startswith('/uploads/helper_photos/'))
+        self.assertTrue(first.data.decode().endswith('.jpg'))
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_unsaved_and_rejected_uploads_leave_nothing_behind(self):
+        self.assertEqual(self.post(JPEG, save=False).data, b'not saved')
+        self.assertEqual(self.post(b'<html>not a photo</html>').status_code, 415)
+        self.assertEqual(self.post(JPEG * 3).status_code, 413)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_anonymous_uploads_are_refused_before_anything_is_written(self):
+        self.assertEqual(self.post(JPEG, logged_in=False).status_code, 401)
+        self.assertIsNone(self.streamed)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_stream_rejects_on_the_first_chunk_and_the_chunk_over_the_limit(self):
+        with self.app.app_context():
+            upload = UploadStream('helper_photos')
+            with self.assertRaises(UnsupportedUpload):
+                upload.write(b'MZ\x90\x00 not an image')
+
+            upload = UploadStream('helper_photos')
+            upload.write(JPEG)
+            with self.assertRaises(UploadTooLarge):
+                upload.write(JPEG)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_unstreamed_files_are_stored_and_checked_too(self):
+        with self.app.app_context():
+            url = save_file(FileStorage(io.BytesIO(JPEG), 'photo.jpg'), 'helper_photos')
+            self.assertTrue(url.startswith('/uploads/helper_photos/') and url.endswith('.jpg'))
+            self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir.name, 'static', url[len('/uploads/'):])))
+            self.assertIsNone(save_file(FileStorage(io.BytesIO(b''), ''), 'helper_photos'))
+            with self.assertRaises(UnsupportedUpload):
+                save_file(FileStorage(io.BytesIO(PDF), 'scan.pdf'), 'helper_photos')
+        self.assertEqual(len(self.stored_files()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
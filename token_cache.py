@@ -0,0 +1,172 @@
+"""
+TTL-aware access token cache for the Sandbox API.
+
+The token is kept in memory and in a small JSON file shared by every worker on the host, so
+N gunicorn workers cost one authenticate call instead of N. A refresh is single-flight: a
+thread lock covers the threads of one worker and an flock on a lock file covers the other
+workers, and whoever gets the lock second re-reads the file instead of authenticating again.
+Tokens close to expiry are refreshed in a background thread while the current one is served.
+"""
+import base64
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to per-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = os.path.join(tempfile.gettempdir(), "househelpnetwork_sandbox_token.json")
+DEFAULT_TTL = 23 * 3600  # Sandbox tokens are valid for 24 hours; used when the token has no exp claim
+REFRESH_MARGIN = 30 * 60  # Start refreshing this many seconds before expiry
+EXPIRY_SAFETY = 60  # Treat tokens as expired this many seconds early to cover clock skew
+
+
+def token_expiry(token, default_ttl=DEFAULT_TTL):
+    """Return the expiry timestamp of a token: the JWT exp claim if readable, otherwise now + default_ttl."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + default_ttl
+
+
+class AccessTokenCache:
+    """
+    Shared, self-refreshing access token.
+
+    fetch_token is called with no arguments and must return the dict produced by
+    sandbox_api.get_access_token() ({"success": ..., "access_token": ..., "message": ...}).
+    """
+
+    def __init__(self, fetch_token, cache_file=DEFAULT_CACHE_FILE, refresh_margin=REFRESH_MARGIN):
+        self.fetch_token = fetch_token
+        self.cache_file = cache_file
+        self.lock_file = f"{cache_file}.lock"
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._background_lock = threading.Lock()
+        self._background_refresh = None
+
+    def _is_valid(self, expires_at, now):
+        return expires_at - EXPIRY_SAFETY > now
+
+    def _needs_refresh(self, expires_at, now):
+        return expires_at - self.refresh_margin <= now
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_store(self):
+        try:
+            with open(self.cache_file) as f:
+                entry = json.load(f)
+            return entry["access_token"], float(entry["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, 0.0
+
+    def _write_store(self, token, expires_at):
+        directory = os.path.dirname(self.cache_file) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"access_token": token, "expires_at": expires_at}, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            logger.exception("Failed to write access token cache file")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_token(self):
+        """Return a valid access token, or None if authentication failed."""
+        now = time.time()
+        token, expires_at = self._token, self._expires_at
+
+        if not token or self._needs_refresh(expires_at, now):
+            # Another worker may already have refreshed it
+            stored_token, stored_expires_at = self._read_store()
+            if stored_token and stored_expires_at > expires_at:
+                token, expires_at = stored_token, stored_expires_at
+                self._token, self._expires_at = token, expires_at
+
+        if token and self._is_valid(expires_at, now):
+            if self._needs_refresh(expires_at, now):
+                self._start_background_refresh()
+            return token
+
+        return self.refresh()
+
+    def refresh(self, stale_token=None):
+        """
+        Fetch a new token unless someone else already did. Blocks until a token is available.
+        stale_token, if given, is a token known to be rejected and is never returned.
+        """
+        with self._lock:
+            with self._file_lock():
+                now = time.time()
+                for token, expires_at in ((self._token, self._expires_at), self._read_store()):
+                    if (token and token != stale_token and self._is_valid(expires_at, now)
+                            and not self._needs_refresh(expires_at, now)):
+                        self._token, self._expires_at = token, expires_at
+                        return token
+
+                response = self.fetch_token()
+                if not response.get("success"):
+                    logger.error(f"Failed to get access token: {response.get('message')}")
+                    return None
+
+                token = response["access_token"]
+                expires_at = token_expiry(token)
+                self._token, self._expires_at = token, expires_at
+                self._write_store(token, expires_at)
+                logger.info(f"Access token refreshed, valid for {int(expires_at - now)}s")
+                return token
+
+    def _start_background_refresh(self):
+        with self._background_lock:
+            if self._background_refresh and self._background_refresh.is_alive():
+                return
+            self._background_refresh = threading.Thread(
+                target=self._refresh_quietly, name="sandbox-token-refresh", daemon=True
+            )
+            self._background_refresh.start()
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Background access token refresh failed")
+
+    def invalidate(self, token):
+        """Drop a token the API rejected so the next get_token() fetches a new one."""
+        with self._lock:
+            with self._file_lock():
+                if self._token == token:
+                    self._token, self._expires_at = None, 0.0
+                stored_token, _ = self._read_store()
+                if stored_token == token:
+                    try:
+                        os.remove(self.cache_file)
+                    except OSError:
+                        pass
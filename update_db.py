@@ -3,7 +3,7 @@ Database update script for HouseHelpNetwork
 This script will recreate all tables based on the SQLAlchemy models.
 WARNING: This will delete all data in the database!
 """
-from app import app, db
+from app import script_app as app, db
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,117 @@
+"""
+Responses for stored files: uploads and photo variants under UPLOAD_FOLDER, and Aadhaar
+photos from the private photo root (see photo_store.py).
+
+- ETags are strong and come from the content: the hash in a content-addressed name
+  (<sha256>.jpg from uploads.py, Aadhaar photos), otherwise the SHA-256 of the file,
+  remembered per (path, mtime, size).
+- Files whose name can never point at other bytes (content-addressed names, and the
+  <uuid>_<name> files of the old upload code) are cached for a year with `immutable`;
+  anything else for UPLOAD_MAX_AGE seconds. Documents are `private`.
+- Files in PRIVATE_FOLDERS are never served by uploaded_file (is_private_upload()); only
+  routes that check who is asking may hand them out.
+- If-None-Match / If-Modified-Since get a 304 and Range requests a 206, through
+  send_file(conditional=True).
+- With UPLOAD_ACCEL_REDIRECT_PREFIX set, the response is an empty X-Accel-Redirect to that
+  internal nginx location plus the file's path under UPLOAD_FOLDER, and nginx sends the
+  bytes (and handles Range itself). Flask's USE_X_SENDFILE does the same for Apache and
+  lighttpd. Either way the Python worker never streams the file.
+
+An nginx location for the prefix '/protected-uploads/' looks like:
+
+    location /protected-uploads/ {
+        internal;
+        alias /srv/app/static/uploads/;
+    }
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+from urllib.parse import quote
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+CONTENT_HASH_NAME = re.compile(r'^([0-9a-f]{64})(\.[A-Za-z0-9]+)*$')
+UUID_NAME = re.compile(r'^[0-9a-f]{32}_')
+
+PRIVATE_FOLDERS = ('owner_documents', 'helper_documents', 'aadhaar_photos')
+VARIANTS_FOLDER = 'variants'
+
+
+def upload_root(app=None):
+    app = app or current_app
+    return os.path.join(app.root_path, app.config['UPLOAD_FOLDER'])
+
+
+def is_private_upload(filename):
+    """Whether an upload path falls in one of PRIVATE_FOLDERS, once any ../ in it is resolved."""
+    return posixpath.normpath(filename).lstrip('/').split('/', 1)[0] in PRIVATE_FOLDERS
+
+
+def is_immutable_name(filename):
+    """Whether an upload path names fixed content (a content hash or a UUID prefix)."""
+    name = filename.rsplit('/', 1)[-1]
+    return bool(CONTENT_HASH_NAME.match(name) or UUID_NAME.match(name))
+
+
+@lru_cache(maxsize=4096)
+def _file_hash(path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_etag(filename, path):
+    """Strong ETag for an upload: the hash in its name, or the SHA-256 of the file."""
+    match = CONTENT_HASH_NAME.match(filename.rsplit('/', 1)[-1])
+    if match and not filename.startswith(VARIANTS_FOLDER + '/'):
+        return match.group(1)
+    stat = os.stat(path)
+    return _file_hash(path, stat.st_mtime_ns, stat.st_size)
+
+
+def serve_upload(filename, mimetype=None, immutable=None, max_age=None, private=None, root=None,
+                 accel_prefix=None):
+    """
+    Response for a file under UPLOAD_FOLDER, or under root if given (404 if there is none).
+    immutable and private default from the path; max_age overrides the cache lifetime.
+    accel_prefix is the internal nginx location for root; UPLOAD_FOLDER uses
+    UPLOAD_ACCEL_REDIRECT_PREFIX.
+    """
+    if root is None:
+        root = upload_root()
+        accel_prefix = current_app.config.get('UPLOAD_ACCEL_REDIRECT_PREFIX')
+    path = safe_join(root, filename)
+    if not path or filename.rsplit('/', 1)[-1].startswith('.') or not os.path.isfile(path):
+        abort(404)  # Dotfiles are uploads still being written
+    if immutable is None:
+        immutable = is_immutable_name(filename)
+    if private is None:
+        private = filename.split('/', 1)[0] in PRIVATE_FOLDERS
+    if max_age is None:
+        max_age = IMMUTABLE_MAX_AGE if immutable else current_app.config.get('UPLOAD_MAX_AGE', 3600)
+    mimetype = mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag = content_etag(filename, path)
+
+    if accel_prefix:
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(filename)
+        response.set_etag(etag)
+        response.last_modified = int(os.stat(path).st_mtime)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, mimetype=mimetype, etag=etag, max_age=max_age, conditional=True)
+
+    response.cache_control.max_age = max_age
+    # send_file has already marked the response public
+    response.cache_control.public = not private
+    response.cache_control.private = private
+    response.cache_control.immutable = immutable
+    return response
@@ -0,0 +1,205 @@
+"""
+Streaming, content-addressed storage for uploaded helper photos.
+
+Werkzeug's form parser normally spools file parts larger than 500KB to a temporary file,
+which FileStorage.save() then copies to the upload folder. For views marked with
+@streamed_upload(kind), UploadRequest instead hands the parser an UploadStream, so each
+chunk of the body goes straight into a temporary file next to its final location while it
+is hashed. Only logged-in users get one: the form can be parsed (by CSRF protection, for
+one) before the view's login check runs. The stream rejects the upload as soon as it can:
+
+- before reading, if the request's Content-Length is larger than the kind allows;
+- on the first bytes, if they are not one of the kind's file signatures (415);
+- on the chunk that takes the file over the kind's size limit (413).
+
+save_file() then renames the file to UPLOAD_FOLDER/<kind>/<aa>/<sha256>.<ext>. A file
+with that hash is already there when the same image was uploaded before (the same
+WhatsApp photo sent by several owners), so the new copy is dropped and both rows point at
+one file. Files never change once written. Uploads that are never saved are deleted when
+the request ends.
+"""
+import hashlib
+import os
+import tempfile
+from functools import wraps
+from flask import Request, current_app
+from flask_login import current_user
+from werkzeug.exceptions import RequestEntityTooLarge, Unauthorized, UnsupportedMediaType
+from photo_store import IMAGE_SIGNATURES
+
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+}
+
+# Upload kind (also its subfolder of UPLOAD_FOLDER) -> (config key of its size limit, default, signatures)
+UPLOAD_KINDS = {
+    'helper_photos': ('HELPER_PHOTO_MAX_BYTES', 2 * 1024 * 1024, IMAGE_SIGNATURES),
+}
+
+CHUNK_SIZE = 64 * 1024
+FORM_OVERHEAD = 64 * 1024  # Allowance for the other fields and multipart headers in a request
+SIGNATURE_LENGTH = max(len(signature) for signature, mimetype in IMAGE_SIGNATURES)
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    pass
+
+
+class UnsupportedUpload(UnsupportedMediaType):
+    pass
+
+
+def upload_limit(kind, app=None):
+    app = app or current_app
+    config_key, default, signatures = UPLOAD_KINDS[kind]
+    return app.config.get(config_key, default)
+
+
+def upload_folder(kind, app=None):
+    app = app or current_app
+    return os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], kind)
+
+
+class UploadStream:
+    """
+    Writable, readable file for one uploaded file of a kind. Hashes and checks what is
+    written, into a temporary file that commit() moves into place.
+    """
+
+    def __init__(self, kind, app=None):
+        app = app or current_app
+        self.kind = kind
+        self.max_bytes = upload_limit(kind, app)
+        self.signatures = UPLOAD_KINDS[kind][2]
+        self.folder = upload_folder(kind, app)
+        self.size = 0
+        self.mimetype = None
+        self.url = None
+        self._head = b''
+        self._hash = hashlib.sha256()
+        os.makedirs(self.folder, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=self.folder, prefix='.tmp-')
+        self._file = os.fdopen(fd, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.discard()
+            raise UploadTooLarge(f"Files must be smaller than {self.max_bytes // (1024 * 1024)}MB.")
+        if self.mimetype is None:
+            self._head += data[:SIGNATURE_LENGTH]
+            if len(self._head) >= SIGNATURE_LENGTH:
+                self._check_signature()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def _check_signature(self):
+        for signature, mimetype in self.signatures:
+            if self._head.startswith(signature):
+                self.mimetype = mimetype
+                return
+        self.discard()
+        allowed = ', '.join(EXTENSIONS[mimetype][1:].upper() for signature, mimetype in self.signatures)
+        raise UnsupportedUpload(f"Only {allowed} files can be uploaded here.")
+
+    def commit(self):
+        """Move the finished upload into the store and return its URL, or None if it is empty."""
+        if self.url is not None:
+            return self.url
+        if self.mimetype is None:
+            if not self.size:
+                return None
+            self._check_signature()  # Files shorter than every signature
+        self._file.close()
+        digest = self._hash.hexdigest()
+        name = digest + EXTENSIONS[self.mimetype]
+        path = os.path.join(self.folder, digest[:2], name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(self._tmp_path)  # Same content is already stored
+        else:
+            os.chmod(self._tmp_path, 0o644)  # mkstemp creates 0600 files
+            os.replace(self._tmp_path, path)
+        self._tmp_path = None
+        self.url = f"/uploads/{self.kind}/{digest[:2]}/{name}"
+        return self.url
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._tmp_path = None
+
+    def close(self):
+        # Called by the request at teardown; an upload nobody committed is deleted
+        self.discard()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def __getattr__(self, name):
+        # read, readline, seek, tell, seekable, flush, ... for the parser and validators
+        if name == '_file':
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+
+def streamed_upload(kind):
+    """Mark a view whose file fields are streamed into the kind's store as they arrive."""
+    if kind not in UPLOAD_KINDS:
+        raise ValueError(f"Unknown upload kind {kind!r}")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            return view(*args, **kwargs)
+        wrapped.upload_kind = kind
+        return wrapped
+    return decorator
+
+
+class UploadRequest(Request):
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        view = current_app.view_functions.get(self.endpoint) if self.url_rule else None
+        kind = getattr(view, 'upload_kind', None)
+        if kind is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        if not current_user.is_authenticated:
+            # Refuse before anything is written; the view's login check may not have run yet
+            raise Unauthorized("Log in to upload files.")
+        max_bytes = upload_limit(kind)
+        if (content_length or 0) > max_bytes or (total_content_length or 0) > max_bytes + FORM_OVERHEAD:
+            raise UploadTooLarge(f"Files must be smaller than {max_bytes // (1024 * 1024)}MB.")
+        return UploadStream(kind)
+
+
+def store_stream(stream, kind, app=None):
+    """Copy a readable stream into the kind's store in CHUNK_SIZE chunks. Returns the URL or None."""
+    upload = UploadStream(kind, app)
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            upload.write(chunk)
+        return upload.commit()
+    finally:
+        upload.discard()
+
+
+def save_file(file, kind):
+    """
+    Store an uploaded FileStorage and return its /uploads/ URL, or None if it is empty.
+    Raises UploadTooLarge or UnsupportedUpload if the file is not acceptable for the kind.
+    """
+    if not file:
+        return None
+    if isinstance(file.stream, UploadStream) and file.stream.kind == kind:
+        return file.stream.commit()
+    file.stream.seek(0)
+    return store_stream(file.stream, kind)
@@ -3,36 +3,20 @@ import uuid
 import requests
 import json
 from datetime import datetime
-from werkzeug.utils import secure_filename
 from flask import current_app
 import logging
+import uploads
 
 logger = logging.getLogger(__name__)
 
 def save_file(file, subfolder):
-    """Save an uploaded file and return the file path."""
-    if not file:
-        return None
-    
-    # Create a secure filename
-    filename = secure_filename(file.filename)
-    # Generate a unique filename to avoid collisions
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    
-    # Determine the upload folder path
-    upload_folder = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'], subfolder)
-    # Ensure the directory exists
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Create the full file path
-    file_path = os.path.join(upload_folder, unique_filename)
-    
-    # Save the file
+    """
+    Save an uploaded file to the content-addressed store for subfolder (see uploads.py)
+    and return its URL path. Identical files are stored once.
+    """
     try:
-        file.save(file_path)
-        # Return the URL path for the file
-        return f"/uploads/{subfolder}/{unique_filename}"
-    except Exception as e:
+        return uploads.save_file(file, subfolder)
+    except OSError as e:
         current_app.logger.error(f"Error saving file: {e}")
         return None
 